@@ -16,6 +16,8 @@ Python 3.5.2 with lastest Pygame and Pylint
 Visual Studio Code 1.11+ with the Python extension installed.
 """
 import pygame
+import collections
+import math
 
 import framework.coda_kids.color
 import framework.coda_kids.utilities
@@ -23,6 +25,11 @@ import framework.coda_kids.dir
 import framework.coda_kids.event
 import framework.coda_kids.state
 import framework.coda_kids.actions
+import framework.coda_kids.replay
+import framework.coda_kids.quiz
+import framework.coda_kids.trivia
+import framework.coda_kids.text
+import framework.coda_kids.turtle
 
 def start(window_size, game_name):
     """
@@ -52,7 +59,7 @@ class Image:
         else:
             self.data = None
 
-    def update(self, dt):
+    def update(self, dt, owner=None):
         return
 
     def surface(self):
@@ -130,6 +137,7 @@ class SpriteSheet:
         rect.width = frame_size[0]
         rect.height = frame_size[1]
         self.rectangle = rect
+        self.images = None
 
     def image_at(self, index):
         """
@@ -155,34 +163,149 @@ class SpriteSheet:
         """
         return self.columns * self.rows
 
-class Animator:
+    def frames(self):
+        """
+        Returns every frame of the sheet as a list of images. They are cut out
+        the first time and shared after that.
+
+            frames = sheet.frames();
+        """
+        if self.images is None:
+            self.images = [self.image_at(i) for i in range(int(self.num_frames()))]
+        return self.images
 
-    def __init__(self, sheet, duration_seconds):
+class Clip:
+    """
+    The frames and timing of an animation. A clip is cut from its sprite sheet
+    once and never changes, so any number of objects can share it, each playing
+    it with its own Animator.
+
+        RUN = coda.Clip(coda.SpriteSheet("run.png", (64, 64)), 1);
+        player.sprite = coda.Animator(RUN);
+    """
+    def __init__(self, sheet, duration_seconds, looping=True, num_frames=None):
         self.sheet = sheet
-        self.frame_num = 0
+        self.frames = sheet.frames()[:num_frames]
+        self.num_frames = len(self.frames)
+        self.duration = duration_seconds
+        self.transition = duration_seconds / self.num_frames
+        self.looping = looping
 
-        self.frame_time = 0.0
+    def frame_number(self, elapsed):
+        """Returns which frame shows after playing for elapsed seconds."""
+        frame_num = int(elapsed / self.transition)
+        if self.looping:
+            return frame_num % self.num_frames
+        return min(frame_num, self.num_frames - 1)
 
+class Animator:
+    """
+    Plays a Clip. An animator only keeps track of how far it has played, so the
+    frame to show is worked out from that instead of stepped through. Objects
+    sharing an animator show the same frame, and it moves along once a frame
+    however many of them update it. Give each object its own Animator of a
+    shared Clip to play them separately.
+
+        anim = coda.Animator(sheet, 0.4);
+        obj.sprite = anim;
+    """
+    def __init__(self, sheet, duration_seconds=None, looping=True):
+        if isinstance(sheet, Clip):
+            self.clip = sheet
+        else:
+            self.clip = Clip(sheet, duration_seconds, looping)
+        self.elapsed = 0.0
         self.playing = True
         self.playspeed = 1.0
-        self.looping = True
+        self.shown = None
+        self.updated_by = set()
 
-        self.reset()
+    @property
+    def sheet(self):
+        return self.clip.sheet
+
+    @sheet.setter
+    def sheet(self, sheet):
+        self.clip = Clip(sheet, self.clip.duration, self.clip.looping)
+
+    @property
+    def duration(self):
+        return self.clip.duration
+
+    @duration.setter
+    def duration(self, duration_seconds):
         self.set_duration(duration_seconds)
-    
+
+    @property
+    def transition(self):
+        return self.clip.transition
+
+    @transition.setter
+    def transition(self, seconds):
+        self.set_duration(seconds * self.clip.num_frames)
+
+    @property
+    def looping(self):
+        return self.clip.looping
+
+    @looping.setter
+    def looping(self, looping):
+        self.clip = Clip(self.clip.sheet, self.clip.duration, looping, self.clip.num_frames)
+
+    @property
+    def num_frames(self):
+        return self.clip.num_frames
+
+    @num_frames.setter
+    def num_frames(self, num_frames):
+        self.clip = Clip(self.clip.sheet, self.clip.duration, self.clip.looping, int(num_frames))
+
+    @property
+    def frame_num(self):
+        return self.clip.frame_number(self.elapsed)
+
+    @frame_num.setter
+    def frame_num(self, frame_num):
+        self.elapsed = frame_num * self.clip.transition
+
+    @property
+    def frame_time(self):
+        return self.elapsed - self.frame_num * self.clip.transition
+
+    @frame_time.setter
+    def frame_time(self, seconds):
+        self.elapsed = self.frame_num * self.clip.transition + seconds
+
+    @property
+    def current(self):
+        # an image set from outside the clip shows until the next frame.
+        if self.shown is not None and self.shown[0] == self.frame_num:
+            return self.shown[1]
+        return self.clip.frames[self.frame_num]
+
+    @current.setter
+    def current(self, image):
+        self.shown = (self.frame_num, image)
+
+    def copy(self):
+        """Returns a new animator for the same clip, starting from the beginning."""
+        anim = Animator(self.clip)
+        anim.playspeed = self.playspeed
+        return anim
+
     def set_duration(self, duration_seconds):
-        self.duration = duration_seconds
-        self.transition = self.duration / self.num_frames
-    
+        self.clip = Clip(self.clip.sheet, duration_seconds, self.clip.looping, self.clip.num_frames)
+
     def use_anim(self, sheet):
-        self.sheet = sheet
+        if isinstance(sheet, Clip):
+            self.clip = sheet
+        else:
+            self.clip = Clip(sheet, self.clip.duration, self.clip.looping)
         self.reset()
 
     def reset(self):
-        self.frame_num = 0
-        self.current = self.sheet.image_at(self.frame_num)
-        self.frame_time = 0
-        self.num_frames = self.sheet.num_frames()
+        self.elapsed = 0.0
+        self.shown = None
 
     def play(self, playspeed=1.0):
         self.playspeed = playspeed
@@ -195,27 +318,56 @@ class Animator:
     def unpause(self):
         self.playing = True
 
-    def update(self, dt):
-        dt = dt * self.playspeed
+    def update(self, dt, owner=None):
+        # objects pass themselves as owner. When a second object updates the
+        # animator in the same frame it has already moved, so it is left alone.
+        if owner is not None:
+            if id(owner) in self.updated_by:
+                self.updated_by.clear()
+            elif self.updated_by:
+                self.updated_by.add(id(owner))
+                return
+            self.updated_by.add(id(owner))
 
         if self.playing:
-            self.frame_time += dt
+            self.elapsed += dt * self.playspeed
+            if self.clip.looping:
+                self.elapsed %= self.clip.duration
+            elif self.elapsed >= self.clip.duration:
+                self.playing = False
 
-            if self.frame_time >= self.transition:
-                self.frame_time -= self.transition
-                self.frame_num += 1
-
-                if self.looping:
-                    self.frame_num %= self.num_frames
+    def surface(self):
+        return self.current.surface()
 
-                self.current = self.sheet.image_at(self.frame_num)
+# every collision layer, the default mask of an object
+ALL_LAYERS = -1
 
-                if self.frame_num >= self.num_frames:
-                    self.playing = False
+# collision masks by (frame, rotation step, scale). The least recently used
+# ones are dropped once there are more than MASK_CACHE_SIZE.
+MASK_CACHE_SIZE = 512
+MASK_ROTATION_STEP = 5
+_masks = collections.OrderedDict()
 
-    def surface(self):
-        return self.current.surface()
+def get_mask(surface, rotation, scale):
+    """
+    Returns the collision mask of a surface rotated and scaled the way objects
+    draw it. The rotation is rounded to MASK_ROTATION_STEP degrees so close
+    angles share a mask.
 
+        mask = coda.get_mask(obj.sprite.surface(), obj.rotation, obj.scale);
+    """
+    step = int(round(rotation / MASK_ROTATION_STEP)) % (360 // MASK_ROTATION_STEP)
+    key = (surface, step, scale)
+    mask = _masks.get(key)
+    if mask is None:
+        rotated = pygame.transform.rotozoom(surface, step * MASK_ROTATION_STEP, scale)
+        mask = pygame.mask.from_surface(rotated)
+        _masks[key] = mask
+        if len(_masks) > MASK_CACHE_SIZE:
+            _masks.popitem(last=False)
+    else:
+        _masks.move_to_end(key)
+    return mask
 
 class Object:
     """
@@ -226,6 +378,13 @@ class Object:
     location = Vector2(0, 0)
     scale = 1
     velocity = Vector2(0, 0)
+    fast = False
+    swept = None
+    collision_layer = 0
+    collision_mask = ALL_LAYERS
+    collision_active_only = False
+    static = False
+    layer = None
 
     def __init__(self, image):
         self.sprite = image
@@ -246,6 +405,10 @@ class Object:
         else:
             self.__dict__[name] = value
 
+        # static objects ask their layer to redraw when they change.
+        if self.layer is not None and name in ("location", "rotation", "scale", "sprite"):
+            self.layer.invalidate()
+
     def get_transformed_rect(self):
         """
         Returns a transformed version of the object sprite. Generally for internal use only.
@@ -317,13 +480,31 @@ class Object:
         self.velocity = Vector2(-1 * framework.coda_kids.utilities.math.cos(framework.coda_kids.utilities.math.radians(degrees - 90)) * speed,
                                 framework.coda_kids.utilities.math.sin(framework.coda_kids.utilities.math.radians(degrees - 90)) * speed)
 
-    def collides_with(self, other_obj):
+    def get_mask(self):
         """
-        Check if this object collides with the given object.
+        Returns the object's collision mask for its current frame, rotation and scale.
+
+            mask = obj.get_mask();
+        """
+        return get_mask(self.sprite.surface(), self.rotation, self.scale)
+
+    def collides_with(self, other_obj, precise=False):
+        """
+        Check if this object collides with the given object. With precise on,
+        objects whose rectangles touch only collide if their pixels overlap.
 
             if obj1.collides_with(obj2):
                 do_things();
+
+            if bullet.collides_with(asteroid, True):
+                do_things();
         """
+        # fast objects check the whole path they moved this frame.
+        if self.fast:
+            return self.sweep(other_obj, precise)
+        if other_obj.fast:
+            return other_obj.sweep(self, precise)
+
         # check for early rejection.
         dist = (self.location - other_obj.location).length_squared()
         # if distance between objects is greater then 64^2
@@ -339,6 +520,15 @@ class Object:
         if not rect1.colliderect(rect2):
             return False
 
+        if precise:
+            mask1 = self.get_mask()
+            mask2 = other_obj.get_mask()
+            # both masks are centered on their object's location.
+            offset = (int(other_obj.location.x - mask2.get_size()[0] / 2 - (self.location.x - mask1.get_size()[0] / 2)),
+                      int(other_obj.location.y - mask2.get_size()[1] / 2 - (self.location.y - mask1.get_size()[1] / 2)))
+            if mask1.overlap(mask2, offset) is None:
+                return False
+
         self.collision[coda_kids.dir.DOWN] = rect2.collidepoint((rect1.center[0] - rect1.width / 4, rect1.center[1] + rect1.height / 2)) or rect2.collidepoint((rect1.center[0] + rect1.width / 4, rect1.center[1] + rect1.height / 2))
         self.collision[coda_kids.dir.UP] = rect2.collidepoint((rect1.center[0] - rect1.width / 4, rect1.center[1] - rect1.height / 2)) or rect2.collidepoint((rect1.center[0] + rect1.width / 4, rect1.center[1] - rect1.height / 2))
         self.collision[coda_kids.dir.LEFT] = rect2.collidepoint((rect1.center[0] - rect1.width / 2, rect1.center[1] + rect1.height / 4)) or rect2.collidepoint((rect1.center[0] - rect1.width / 2, rect1.center[1] - rect1.height / 4))
@@ -346,6 +536,48 @@ class Object:
 
         return True
 
+    def sweep(self, other_obj, precise=False):
+        """
+        Check if this object hit the given object anywhere along the path it
+        moved in its last update, so fast objects can't skip through things
+        between frames. collides_with does this for objects marked fast.
+
+            bullet.fast = True;
+
+            if bullet.collides_with(ship):
+                do_things();
+        """
+        end = self.location
+        start = end
+        # a path that doesn't end where the object is means it was moved by hand since.
+        if self.swept is not None and self.swept[1] == end:
+            start = self.swept[0]
+
+        rect1 = self.get_transformed_rect()
+        rect2 = other_obj.get_transformed_rect()
+        # growing the target by this object's size lets the path be checked as a line.
+        bounds = rect2.inflate(rect1.width, rect1.height)
+        if start == end:
+            if not bounds.collidepoint(end):
+                return False
+        elif not bounds.clipline(start, end):
+            return False
+        if not precise:
+            return True
+
+        # check the pixels at steps of half this object's size along the path.
+        mask1 = self.get_mask()
+        mask2 = other_obj.get_mask()
+        path = end - start
+        steps = int(path.length() / max(1, min(rect1.width, rect1.height) / 2)) + 1
+        corner2 = other_obj.location - pygame.math.Vector2(mask2.get_size()) / 2
+        for i in range(steps + 1):
+            corner1 = start + path * (i / steps) - pygame.math.Vector2(mask1.get_size()) / 2
+            offset = corner2 - corner1
+            if mask1.overlap(mask2, (int(offset.x), int(offset.y))) is not None:
+                return True
+        return False
+
     def snap_to_object_x(self, other_obj, facing):
         """
         Snaps the object to the left or right of the other object given.
@@ -395,8 +627,11 @@ class Object:
         return rect.collidepoint(point)
 
     def update(self, delta_time):
+        start = pygame.math.Vector2(self.location)
         self.location += self.velocity * delta_time
-        self.sprite.update(delta_time)
+        # remember the path for sweep, and where it ended to notice later moves.
+        self.swept = (start, pygame.math.Vector2(self.location))
+        self.sprite.update(delta_time, self)
 
     def draw(self, screen):
         """
@@ -410,6 +645,310 @@ class Object:
         rect.center = self.location
         screen.blit(sprite, rect)
 
+class TileMap:
+    """
+    The solid tiles of a level, for move_and_collide. rows is a list of strings
+    or lists of tile numbers, and solid is the tile numbers that block movement.
+
+        tiles = coda.TileMap(["1111", "1001", "1111"], 16, [1]);
+    """
+    def __init__(self, rows, tile_size, solid):
+        self.tile_size = tile_size
+        self.solid = [[int(tile) in solid for tile in row] for row in rows]
+
+    def is_solid(self, column, row):
+        """Checks if the tile at column and row blocks movement. Tiles off the map don't."""
+        return (0 <= row < len(self.solid) and 0 <= column < len(self.solid[row])
+                and self.solid[row][column])
+
+    def blocked(self, columns, rows):
+        """Internal helper that checks if any tile in the given ranges blocks movement."""
+        return any(self.is_solid(column, row) for column in columns for row in rows)
+
+def _tiles_between(start, end, size):
+    """Internal helper that returns the tile numbers covered from start up to, not including, end."""
+    return range(int(math.floor(start / size)), int(math.ceil(end / size)))
+
+def move_and_collide(body, delta_time, tilemap):
+    """
+    Moves an object by its velocity, stopping it at solid tiles. It moves
+    sideways first and then up or down, and only looks at the tiles the object
+    passes over. Returns which sides touched a tile, like obj.collision.
+
+        contacts = coda.move_and_collide(MY.player, delta_time, MY.tiles);
+        MY.grounded = contacts[coda.dir.DOWN];
+    """
+    contacts = [False] * 5
+    size = tilemap.tile_size
+    surface = body.sprite.surface()
+    half_width = surface.get_width() * body.scale / 2
+    half_height = surface.get_height() * body.scale / 2
+
+    move = body.velocity.x * delta_time
+    rows = _tiles_between(body.location.y - half_height, body.location.y + half_height, size)
+    if move > 0:
+        edge = body.location.x + half_width
+        # columns from the one the right edge is about to enter to the one it ends in.
+        for column in range(int(math.ceil(edge / size)), int(math.ceil((edge + move) / size))):
+            if tilemap.blocked([column], rows):
+                move = column * size - edge
+                body.velocity.x = 0
+                contacts[framework.coda_kids.dir.RIGHT] = True
+                break
+    elif move < 0:
+        edge = body.location.x - half_width
+        for column in range(int(math.floor(edge / size)) - 1, int(math.floor((edge + move) / size)) - 1, -1):
+            if tilemap.blocked([column], rows):
+                move = (column + 1) * size - edge
+                body.velocity.x = 0
+                contacts[framework.coda_kids.dir.LEFT] = True
+                break
+    body.location.x += move
+
+    move = body.velocity.y * delta_time
+    columns = _tiles_between(body.location.x - half_width, body.location.x + half_width, size)
+    if move > 0:
+        edge = body.location.y + half_height
+        for row in range(int(math.ceil(edge / size)), int(math.ceil((edge + move) / size))):
+            if tilemap.blocked(columns, [row]):
+                move = row * size - edge
+                body.velocity.y = 0
+                contacts[framework.coda_kids.dir.DOWN] = True
+                break
+    elif move < 0:
+        edge = body.location.y - half_height
+        for row in range(int(math.floor(edge / size)) - 1, int(math.floor((edge + move) / size)) - 1, -1):
+            if tilemap.blocked(columns, [row]):
+                move = (row + 1) * size - edge
+                body.velocity.y = 0
+                contacts[framework.coda_kids.dir.UP] = True
+                break
+    body.location.y += move
+
+    body.collision = contacts
+    return contacts
+
+class Collisions:
+    """
+    Finds every contact between a set of objects once a frame and calls the
+    handler declared for each pair of layers. Layers are bits, so an object can
+    be in several and its mask says which layers it can touch. The objects are
+    sorted into a grid first, so only objects near each other are compared.
+
+        PLAYER = 1;
+        COIN = 2;
+        COLLISIONS = coda.Collisions();
+        COLLISIONS.add(MY.player, PLAYER);
+        COLLISIONS.add(coin, COIN);
+        COLLISIONS.on(PLAYER, COIN, pick_up_coin);
+
+        # once a frame, calls pick_up_coin(player, coin) for each coin touched
+        COLLISIONS.update();
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.objects = []
+        self.pairs = []
+        self.skipped = set()
+
+    def add(self, obj, layer, mask=ALL_LAYERS, active_only=False):
+        """
+        Adds an object in the given layers. With active_only, the object is
+        left out while obj.active is False, for example pooled bullets.
+
+            COLLISIONS.add(bullet, BULLET, ASTEROID | SHIP, True);
+        """
+        obj.collision_layer = layer
+        obj.collision_mask = mask
+        obj.collision_active_only = active_only
+        if obj not in self.objects:
+            self.objects.append(obj)
+
+    def remove(self, obj):
+        """
+        Takes an object out. It is safe to call from a handler: the object's
+        other contacts this frame are skipped.
+        """
+        if obj in self.objects:
+            self.objects.remove(obj)
+        self.skipped.add(id(obj))
+
+    def ignore(self, obj):
+        """Skips the object's remaining contacts this frame. Call from a handler."""
+        self.skipped.add(id(obj))
+
+    def clear(self):
+        """Takes every object out, keeping the declared pairs."""
+        self.objects = []
+
+    def on(self, layer_a, layer_b, handler=None, precise=False):
+        """
+        Declares that objects in layer_a and layer_b collide. handler is called
+        with the layer_a object first. With precise on, pixels are compared too.
+        Declaring the same layers again replaces the earlier handler.
+
+            COLLISIONS.on(BULLET, ASTEROID, hit_asteroid, True);
+        """
+        self.pairs = [pair for pair in self.pairs if pair[:2] != (layer_a, layer_b)]
+        self.pairs.append((layer_a, layer_b, handler, precise))
+
+    def match(self, obj1, obj2):
+        """Internal helper that returns (first, second, pair) for two objects that may collide, or None."""
+        if not (obj1.collision_mask & obj2.collision_layer and obj2.collision_mask & obj1.collision_layer):
+            return None
+        for pair in self.pairs:
+            if obj1.collision_layer & pair[0] and obj2.collision_layer & pair[1]:
+                return (obj1, obj2, pair)
+            if obj2.collision_layer & pair[0] and obj1.collision_layer & pair[1]:
+                return (obj2, obj1, pair)
+        return None
+
+    def contacts(self):
+        """
+        Returns every (first, second, handler) contact this frame without calling
+        the handlers. Each pair of objects is checked once.
+        """
+        objects = [obj for obj in self.objects
+                   if obj.collision_layer and not (obj.collision_active_only and not obj.active)]
+        rects = [obj.get_transformed_rect() for obj in objects]
+        size = self.cell_size
+
+        # sort the objects into grid cells by their rectangles, and the path fast ones moved.
+        cells = {}
+        for (index, obj) in enumerate(objects):
+            area = rects[index]
+            if obj.fast and obj.swept is not None and obj.swept[1] == obj.location:
+                area = area.union(area.move(obj.swept[0] - obj.location))
+            for x in range(int(area.left // size), int(area.right // size) + 1):
+                for y in range(int(area.top // size), int(area.bottom // size) + 1):
+                    cells.setdefault((x, y), []).append(index)
+
+        candidates = set()
+        for members in cells.values():
+            for i in range(len(members)):
+                for j in range(i + 1, len(members)):
+                    candidates.add((members[i], members[j]))
+
+        found = []
+        # sorted so handlers run in the same order every time.
+        for (i, j) in sorted(candidates):
+            matched = self.match(objects[i], objects[j])
+            if matched is None:
+                continue
+            (first, second, pair) = matched
+            if first.fast or second.fast:
+                (mover, other) = (first, second) if first.fast else (second, first)
+                if not mover.sweep(other, pair[3]):
+                    continue
+            elif not rects[i].colliderect(rects[j]):
+                continue
+            elif pair[3]:
+                mask1 = first.get_mask()
+                mask2 = second.get_mask()
+                offset = (int(second.location.x - mask2.get_size()[0] / 2 - (first.location.x - mask1.get_size()[0] / 2)),
+                          int(second.location.y - mask2.get_size()[1] / 2 - (first.location.y - mask1.get_size()[1] / 2)))
+                if mask1.overlap(mask2, offset) is None:
+                    continue
+            found.append((first, second, pair[2]))
+        return found
+
+    def update(self):
+        """
+        Finds this frame's contacts, then calls their handlers. Returns the
+        contacts as (first, second) pairs.
+
+            for (bullet, ship) in COLLISIONS.update():
+                do_things();
+        """
+        found = self.contacts()
+        self.skipped = set()
+        touched = []
+        for (first, second, handler) in found:
+            # handlers can remove objects or turn them off while this runs.
+            if id(first) in self.skipped or id(second) in self.skipped:
+                continue
+            if ((first.collision_active_only and not first.active)
+                    or (second.collision_active_only and not second.active)):
+                continue
+            touched.append((first, second))
+            if handler is not None:
+                handler(first, second)
+        self.skipped = set()
+        return touched
+
+class StaticLayer:
+    """
+    A layer of objects that don't move, such as walls and backgrounds. The objects are
+    drawn once onto a surface the size of the window, and after that the whole
+    layer costs a single blit per frame. Changing an object's location, rotation,
+    scale or sprite redraws the layer. Call invalidate() after changing
+    something in place, like obj.location.x.
+
+        walls = coda.StaticLayer(WINDOW);
+        walls.add(wall);
+        walls.draw(SCREEN);
+    """
+
+    def __init__(self, size, transparent=True):
+        self.size = (int(size[0]), int(size[1]))
+        self.transparent = transparent
+        self.objects = []
+        self.surface = None
+        self.dirty = True
+
+    def add(self, obj):
+        """
+        Adds an object to the layer and marks it static.
+
+            walls.add(wall);
+        """
+        self.objects.append(obj)
+        obj.static = True
+        obj.layer = self
+        self.dirty = True
+
+    def remove(self, obj):
+        """
+        Takes an object off the layer so it can move again.
+
+            walls.remove(wall);
+        """
+        if obj in self.objects:
+            self.objects.remove(obj)
+            obj.static = False
+            obj.layer = None
+            self.dirty = True
+
+    def invalidate(self):
+        """
+        Redraws the layer before it is next drawn.
+
+            walls.invalidate();
+        """
+        self.dirty = True
+
+    def rebuild(self):
+        """Draws every object onto the layer surface. Generally for internal use only."""
+        if self.surface is None:
+            if self.transparent:
+                self.surface = pygame.Surface(self.size, pygame.SRCALPHA, 32).convert_alpha()
+            else:
+                self.surface = pygame.Surface(self.size).convert()
+        self.surface.fill((0, 0, 0, 0))
+        for obj in self.objects:
+            obj.draw(self.surface)
+        self.dirty = False
+
+    def draw(self, screen):
+        """
+        Draws the layer to the screen, rebuilding it first if something changed.
+
+            walls.draw(SCREEN);
+        """
+        if self.dirty:
+            self.rebuild()
+        screen.blit(self.surface, (0, 0))
+
 class TextObject:
     """
     Create an object that renders text. Assumes that the default font 
@@ -62,6 +62,10 @@ def update(delta_time):
     for key in to_delete:
         del _data[key]
 
+def active():
+    """Checks if any lerps are still running. Used by the state manager to know when it can sleep."""
+    return any(_data.values())
+
 def clear(obj=None):
     """Clears the list of the given game object. If object is None, clear entire list."""
     if obj is None:
@@ -19,6 +19,31 @@ def listing():
     """
     return pygame.event.get()
 
+def wait(timeout):
+    """
+    Sleeps until an event arrives or timeout milliseconds pass, without using
+    the processor. Returns True if there is an event to read. The events stay
+    in the queue, in order, for listing to return.
+
+        if coda.event.wait(250):
+            handle_input();
+    """
+    try:
+        event = pygame.event.wait(timeout)
+    except TypeError:
+        # pygame before 2.0 can't time out, so poll the queue instead.
+        end = pygame.time.get_ticks() + timeout
+        while not pygame.event.peek() and pygame.time.get_ticks() < end:
+            pygame.time.wait(10)
+        return bool(pygame.event.peek())
+    if event.type == pygame.NOEVENT:
+        return False
+    waiting = pygame.event.get()
+    pygame.event.post(event)
+    for other in waiting:
+        pygame.event.post(other)
+    return True
+
 def quit_game(event):
     """
     Checks for quit game event.
@@ -97,6 +122,8 @@ def mouse_down(event, button):
             if coda.event.mouse_down(coda.dir.LEFT):
                 do_things();
     """
+    if _current is not None:
+        return _current.mouse_buttons[button]
     return pygame.mouse.get_pressed()[button]
 
 def mouse_position():
@@ -105,7 +132,10 @@ def mouse_position():
 
         data = coda.event.mouse_position();
     """
-    pos = pygame.mouse.get_pos()
+    if _current is not None:
+        pos = _current.mouse_position
+    else:
+        pos = pygame.mouse.get_pos()
     return framework.coda_kids.Vector2(pos[0], pos[1])
 
 def key_down(event, key):
@@ -143,5 +173,288 @@ def key_held_down(key):
             do_things();
     """
     if isinstance(key, str):
-        return pygame.key.get_pressed()[ord(key)]
+        key = ord(key)
+    if _current is not None:
+        return _current.keys[key]
     return pygame.key.get_pressed()[key]
+
+# action name -> tuple of key codes, see bind().
+_actions = {}
+
+# snapshot taken by the state machine at the start of the frame.
+_current = None
+
+def _key_code(key):
+    """Internal helper that turns "a" or pygame.K_a into a key code."""
+    if isinstance(key, str):
+        return ord(key)
+    return key
+
+def bind(action, *keys):
+    """
+    Binds a named action to one or more keys. Rebinding replaces the old keys.
+
+        coda.event.bind("thrust", "w", pygame.K_UP);
+    """
+    _actions[action] = tuple(_key_code(key) for key in keys)
+
+def unbind(action):
+    """
+    Removes a named action binding.
+
+        coda.event.unbind("thrust");
+    """
+    _actions.pop(action, None)
+
+class InputState:
+    """
+    Read only snapshot of the keyboard and mouse for a single frame.
+    The state machine captures one at the start of every frame, so
+    asking it questions never polls pygame again.
+
+        state = coda.state.input_state();
+        if state.pressed(" "):
+            jump();
+        if state.action_held("thrust"):
+            go_faster();
+    """
+    __slots__ = ('keys', 'previous_keys', 'mouse_position', 'mouse_buttons',
+                 'previous_mouse_buttons')
+
+    def __init__(self, previous=None, sample=None):
+        if sample is None:
+            keys = pygame.key.get_pressed()
+            position = pygame.mouse.get_pos()
+            buttons = pygame.mouse.get_pressed()
+        else:
+            (keys, position, buttons) = sample
+        object.__setattr__(self, 'keys', keys)
+        object.__setattr__(self, 'mouse_position', position)
+        object.__setattr__(self, 'mouse_buttons', buttons)
+        if previous is None:
+            object.__setattr__(self, 'previous_keys', keys)
+            object.__setattr__(self, 'previous_mouse_buttons', buttons)
+        else:
+            object.__setattr__(self, 'previous_keys', previous.keys)
+            object.__setattr__(self, 'previous_mouse_buttons', previous.mouse_buttons)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("InputState is read only.")
+
+    def held(self, key):
+        """Checks if the key is down this frame."""
+        return bool(self.keys[_key_code(key)])
+
+    def pressed(self, key):
+        """Checks if the key went down this frame."""
+        key = _key_code(key)
+        return bool(self.keys[key]) and not self.previous_keys[key]
+
+    def released(self, key):
+        """Checks if the key went up this frame."""
+        key = _key_code(key)
+        return not self.keys[key] and bool(self.previous_keys[key])
+
+    def mouse_held(self, button):
+        """Checks if the 0 based mouse button (0 left, 1 middle, 2 right) is down."""
+        return bool(self.mouse_buttons[button])
+
+    def mouse_pressed(self, button):
+        """Checks if the 0 based mouse button went down this frame."""
+        return bool(self.mouse_buttons[button]) and not self.previous_mouse_buttons[button]
+
+    def mouse_released(self, button):
+        """Checks if the 0 based mouse button went up this frame."""
+        return not self.mouse_buttons[button] and bool(self.previous_mouse_buttons[button])
+
+    def action_held(self, action):
+        """Checks if any key bound to the action is down this frame."""
+        return any(self.keys[key] for key in _actions.get(action, ()))
+
+    def action_pressed(self, action):
+        """Checks if the action started this frame."""
+        keys = _actions.get(action, ())
+        was_held = any(self.previous_keys[key] for key in keys)
+        return not was_held and any(self.keys[key] for key in keys)
+
+    def action_released(self, action):
+        """Checks if the action stopped this frame."""
+        keys = _actions.get(action, ())
+        is_held = any(self.keys[key] for key in keys)
+        return not is_held and any(self.previous_keys[key] for key in keys)
+
+def capture(sample=None):
+    """
+    Takes the input snapshot for this frame. Called internally by the state manager.
+    A (keys, mouse_position, mouse_buttons) sample is used instead of polling
+    pygame when given, which is how replays feed recorded input back in.
+
+        state = coda.event.capture();
+    """
+    global _current
+    if sample is None:
+        # pump first, so keys pressed since the last frame's events were read count this frame.
+        pygame.event.pump()
+    _current = InputState(_current, sample)
+    return _current
+
+def current():
+    """
+    Returns the input snapshot for this frame, or None if no frame has started.
+
+        state = coda.event.current();
+    """
+    return _current
+
+def _detail(event):
+    """Internal helper that returns the key or mouse button of an event, if any."""
+    if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
+        return event.key
+    if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEBUTTONUP:
+        return event.button
+    return None
+
+# event types a filter never blocks: closing, text entry and window changes.
+_ALWAYS_ALLOWED = ('QUIT', 'TEXTINPUT', 'TEXTEDITING', 'ACTIVEEVENT', 'VIDEORESIZE',
+                   'VIDEOEXPOSE', 'WINDOWEVENT')
+
+class Dispatcher:
+    """
+    Routes events straight to the functions that care about them, instead of
+    every state checking every event against a chain of if statements. Only
+    event types with handlers are taken from the queue, and events no handler
+    wanted are put back, so a state can still read the rest itself.
+
+        events = coda.state.Manager.events;
+        events.on(pygame.QUIT, coda.stop);
+        events.on(pygame.KEYDOWN, jump, " ");
+        events.on(pygame.MOUSEBUTTONDOWN, click, 1);
+    """
+    def __init__(self, coalesce_motion=True):
+        self.handlers = {}
+        self.coalesce_motion = coalesce_motion
+        self.blocking = False
+        self.filtered = False
+        self.dirty = False
+
+    def on(self, event_type, handler, detail=None):
+        """
+        Calls handler(event) for events of the given type. The optional detail
+        narrows it down to a single key or mouse button.
+
+            events.on(pygame.KEYUP, stop_jump, pygame.K_SPACE);
+        """
+        detail = _key_code(detail)
+        self.handlers.setdefault((event_type, detail), []).append(handler)
+        self.dirty = True
+
+    def off(self, event_type, handler, detail=None):
+        """
+        Stops calling handler for the given event type and detail.
+
+            events.off(pygame.KEYUP, stop_jump, pygame.K_SPACE);
+        """
+        route = (event_type, _key_code(detail))
+        handlers = self.handlers.get(route)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+            if not handlers:
+                del self.handlers[route]
+            self.dirty = True
+
+    def block_unused(self, enabled=True):
+        """
+        Blocks event types without a handler so they never reach the queue. Only
+        turn it on when the state reads all its input through handlers, since
+        blocked events don't reach coda.event.listing either. Closing, text entry
+        and window events are always let through.
+
+            events.block_unused();
+        """
+        self.blocking = enabled
+        self.dirty = True
+
+    def clear(self):
+        """Removes every handler and lets all event types through again."""
+        self.handlers.clear()
+        self.blocking = False
+        self.dirty = False
+        if self.filtered:
+            pygame.event.set_allowed(None)
+            self.filtered = False
+
+    def types(self):
+        """Returns the event types that have handlers."""
+        return set(event_type for (event_type, _) in self.handlers)
+
+    def apply_filter(self):
+        """Blocks every event type without a handler, if block_unused is on."""
+        self.dirty = False
+        if not self.blocking:
+            if self.filtered:
+                pygame.event.set_allowed(None)
+                self.filtered = False
+            return
+        types = self.types()
+        types.update(getattr(pygame, name) for name in _ALWAYS_ALLOWED if hasattr(pygame, name))
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(list(types))
+        self.filtered = True
+
+    def dispatch(self, events=None):
+        """
+        Sends each event to its handlers. Reads the events with handlers from the
+        pygame queue if no events are given, and puts back the ones no handler
+        wanted so the game can still read them this frame.
+        Called internally by the state manager.
+        """
+        if self.dirty:
+            self.apply_filter()
+        queued = events is None
+        if queued:
+            types = self.types()
+            if not types:
+                return
+            events = pygame.event.get(list(types))
+
+        # mouse motion is merged into one event, sent where the last one was.
+        last_motion = None
+        if self.coalesce_motion:
+            for (i, event) in enumerate(events):
+                if event.type == pygame.MOUSEMOTION:
+                    last_motion = i
+
+        unhandled = []
+        motions = []
+        for (i, event) in enumerate(events):
+            if getattr(event, 'dispatched', False):
+                # put back last frame and nobody read it since.
+                continue
+            if last_motion is not None and event.type == pygame.MOUSEMOTION:
+                motions.append(event)
+                if i != last_motion:
+                    continue
+                rel = (sum(motion.rel[0] for motion in motions),
+                       sum(motion.rel[1] for motion in motions))
+                event = pygame.event.Event(pygame.MOUSEMOTION, pos=event.pos, rel=rel,
+                                           buttons=event.buttons)
+                if not self._route(event):
+                    unhandled.extend(motions)
+            elif not self._route(event):
+                unhandled.append(event)
+
+        if queued:
+            for event in unhandled:
+                attributes = dict(event.dict)
+                attributes['dispatched'] = True
+                pygame.event.post(pygame.event.Event(event.type, attributes))
+
+    def _route(self, event):
+        """Internal helper that calls the handlers for one event. Returns False if there were none."""
+        handlers = list(self.handlers.get((event.type, None), ()))
+        detail = _detail(event)
+        if detail is not None:
+            handlers = list(self.handlers.get((event.type, detail), ())) + handlers
+        for handler in handlers:
+            handler(event)
+        return bool(handlers)
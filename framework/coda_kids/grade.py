@@ -0,0 +1,521 @@
+"""
+This module checks a whole folder of projects at once, without windows.
+
+Every project runs in its own headless process, several at a time. Each one
+is fed the same scripted input for a number of frames: random key presses
+and clicks from a seed, or a coda.replay recording. A project passes when it
+gets through all the frames without crashing. Runs that take too long or use
+too much memory are stopped. The report lists crashes, frame time
+percentiles and peak memory for each project, and with a baseline report
+it also flags projects whose frames got slower.
+
+    python -m framework.coda_kids.grade project-solutions project-templates
+    python -m framework.coda_kids.grade submissions --frames 900 --baseline last-week.json
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import random
+import re
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# project statuses
+PASSED = 'passed'
+EXITED = 'exited'
+CRASHED = 'crashed'
+TIMEOUT = 'timeout'
+MEMORY = 'memory'
+
+FRAME_TIME = 1000 / 60
+_IMPORT = re.compile(r'^\s*(?:from|import)\s+([\w.]+)', re.MULTILINE)
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class _Finished(BaseException):
+    """Internal helper raised when a project has run all its frames. Not an Exception, so students' code can't catch it."""
+
+def discover(paths):
+    """
+    Finds the programs to check. Files are used as they are. In folders, every
+    .py file that no other file in the same folder imports is a program.
+
+        programs = grade.discover(["project-solutions"]);
+    """
+    programs = []
+    for path in paths:
+        if os.path.isfile(path):
+            programs.append(os.path.abspath(path))
+            continue
+        for (folder, folders, files) in os.walk(path):
+            folders[:] = sorted(name for name in folders
+                                if name != '__pycache__' and not name.startswith('.'))
+            scripts = sorted(name for name in files if name.endswith('.py'))
+            imported = set()
+            for name in scripts:
+                with open(os.path.join(folder, name), encoding='utf-8', errors='replace') as file:
+                    for module in _IMPORT.findall(file.read()):
+                        if module.split('.')[0] != name[:-3]:
+                            imported.add(module.split('.')[0])
+            programs.extend(os.path.abspath(os.path.join(folder, name)) for name in scripts
+                            if name[:-3] not in imported and not name.startswith('_'))
+    return programs
+
+def percentile(values, percent):
+    """Returns the value percent of the way through a sorted list, by nearest rank."""
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1, int(round(percent / 100 * len(values))) - 1))
+    return values[rank]
+
+def _peak_memory():
+    """Internal helper that returns the most memory this process has used, in megabytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, everything else kilobytes.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class _Keys:
+    """Internal helper that stands in for pygame.key.get_pressed with the scripted keys."""
+    def __init__(self, held):
+        self.held = held
+
+    def __getitem__(self, key):
+        return key in self.held
+
+class _Clock:
+    """
+    Internal helper that stands in for pygame.time.Clock. It never waits, and
+    reports the scripted frame length so games run the same every time.
+    """
+    def __init__(self, harness):
+        self.harness = harness
+
+    def tick(self, framerate=0):
+        return int(self.harness.milliseconds)
+
+    tick_busy_loop = tick
+
+    def get_time(self):
+        return int(self.harness.milliseconds)
+
+    get_rawtime = get_time
+
+    def get_fps(self):
+        return 1000 / self.harness.milliseconds if self.harness.milliseconds else 0
+
+class _Monkey:
+    """Internal helper that makes up a stream of key presses and clicks from a seed."""
+    def __init__(self, seed, keys):
+        self.random = random.Random(seed)
+        self.keys = keys
+        self.held = {}
+        self.position = (0, 0)
+        self.buttons = (False, False, False)
+
+    def next_frame(self, size):
+        """Returns (milliseconds, keys, mouse position, mouse buttons, events) for a frame."""
+        import pygame
+        events = []
+        for key in list(self.held):
+            self.held[key] -= 1
+            if self.held[key] <= 0:
+                del self.held[key]
+                events.append(pygame.event.Event(pygame.KEYUP, key=key, mod=0, scancode=0))
+        if self.random.random() < 0.15:
+            (key, text) = self.random.choice(self.keys)
+            if key not in self.held:
+                self.held[key] = self.random.randint(1, 30)
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, scancode=0,
+                                                 unicode=text))
+        if self.buttons[0]:
+            self.buttons = (False, False, False)
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, button=1, pos=self.position))
+        elif self.random.random() < 0.05:
+            old = self.position
+            self.position = (self.random.randrange(max(1, size[0])),
+                             self.random.randrange(max(1, size[1])))
+            self.buttons = (True, False, False)
+            events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=self.position,
+                                             rel=(self.position[0] - old[0],
+                                                  self.position[1] - old[1]),
+                                             buttons=(0, 0, 0)))
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=self.position))
+        return (FRAME_TIME, _Keys(set(self.held)), self.position, self.buttons, events)
+
+class _Recording:
+    """Internal helper that reads the scripted input from a coda.replay recording."""
+    def __init__(self, filename):
+        import framework.coda_kids.replay
+        self.player = framework.coda_kids.replay.Player(filename)
+
+    def next_frame(self, size):
+        """Returns (milliseconds, keys, mouse position, mouse buttons, events) for a frame."""
+        frame = self.player.next_frame()
+        if frame is None:
+            raise _Finished()
+        (keys, position, buttons) = frame.sample
+        return (frame.milliseconds, keys, position, buttons, frame.events)
+
+class _Harness:
+    """
+    Internal helper that runs one program inside the child process. Each call to
+    pygame.display.flip or update ends a frame: its time is measured, and the next
+    frame's scripted input is put in place. Scripted events are kept in a list and
+    handed out by the event functions instead of going through pygame's queue,
+    which loses the attributes of posted events once they have been peeked at.
+    """
+    def __init__(self, frames, source):
+        self.frames = frames
+        self.source = source
+        self.frame_times = []
+        self.milliseconds = FRAME_TIME
+        self.keys = _Keys(set())
+        self.position = (0, 0)
+        self.buttons = (False, False, False)
+        self.events = collections.deque()
+        self.now = 0
+        self.timers = {}
+        self.started = None
+
+    def install(self):
+        """Swaps the parts of pygame that wait, read input or show frames."""
+        import pygame
+        self.pygame = pygame
+        self.flip = pygame.display.flip
+        self.update = pygame.display.update
+        self.get = pygame.event.get
+        self.poll = pygame.event.poll
+        pygame.display.flip = self.end_frame
+        pygame.display.update = self.end_frame
+        pygame.event.get = self.get_events
+        pygame.event.poll = self.poll_event
+        pygame.event.wait = self.wait_event
+        pygame.event.peek = self.peek_events
+        pygame.event.clear = self.clear_events
+        pygame.event.post = self.events.append
+        pygame.time.Clock = lambda: _Clock(self)
+        pygame.time.set_timer = self.set_timer
+        pygame.time.get_ticks = lambda: int(self.now)
+        pygame.time.wait = lambda milliseconds: 0
+        pygame.time.delay = lambda milliseconds: 0
+        pygame.key.get_pressed = lambda: self.keys
+        pygame.mouse.get_pos = lambda: self.position
+        pygame.mouse.get_pressed = lambda *args, **kwargs: self.buttons
+        # coda.start and older quizzes pause with time.sleep, which only slows checking down.
+        time.sleep = lambda seconds: None
+        self.started = time.perf_counter()
+
+    def next_input(self):
+        """Internal helper that puts the next frame's scripted input in place."""
+        surface = self.pygame.display.get_surface()
+        size = surface.get_size() if surface is not None else (800, 600)
+        (self.milliseconds, self.keys, self.position, self.buttons, events) = \
+            self.source.next_frame(size)
+        self.events.extend(events)
+        self.now += self.milliseconds
+        self.fire_timers()
+
+    def set_timer(self, event, millis, loops=0):
+        """
+        Stands in for pygame.time.set_timer. Timers run on the scripted frame
+        times instead of the real clock, so waiting for one costs no real time.
+        """
+        event_type = event if isinstance(event, int) else event.type
+        if millis <= 0:
+            self.timers.pop(event_type, None)
+            return
+        if isinstance(event, int):
+            event = self.pygame.event.Event(event)
+        self.timers[event_type] = [self.now + millis, millis, event, loops]
+
+    def fire_timers(self):
+        """Internal helper that queues the events of the timers that are due."""
+        for (event_type, timer) in list(self.timers.items()):
+            (due, millis, event, loops) = timer
+            if due > self.now:
+                continue
+            self.events.append(event)
+            if loops == 1:
+                del self.timers[event_type]
+            else:
+                timer[0] = max(due + millis, self.now)
+                timer[3] = loops - 1 if loops else 0
+
+    def end_frame(self, *args):
+        """Stands in for pygame.display.flip and update."""
+        if args:
+            self.update(*args)
+        else:
+            self.flip()
+        now = time.perf_counter()
+        self.frame_times.append((now - self.started) * 1000)
+        if len(self.frame_times) >= self.frames:
+            raise _Finished()
+        self.next_input()
+        self.started = time.perf_counter()
+
+    def take(self, eventtype=None, exclude=None):
+        """Internal helper that removes and returns the waiting events of the given types."""
+        if self.pygame.display.get_init():
+            # pygame's own events, like timers, are read without peeking at them.
+            self.events.extend(self.get())
+        if isinstance(eventtype, int):
+            eventtype = [eventtype]
+        if isinstance(exclude, int):
+            exclude = [exclude]
+        taken = []
+        kept = collections.deque()
+        for event in self.events:
+            if ((eventtype is None or event.type in eventtype)
+                    and (exclude is None or event.type not in exclude)):
+                taken.append(event)
+            else:
+                kept.append(event)
+        self.events.clear()
+        self.events.extend(kept)
+        return taken
+
+    def get_events(self, eventtype=None, pump=True, exclude=None):
+        """Stands in for pygame.event.get."""
+        return self.take(eventtype, exclude)
+
+    def peek_events(self, eventtype=None, pump=True):
+        """Stands in for pygame.event.peek."""
+        waiting = self.take()
+        self.events.extend(waiting)
+        if eventtype is None:
+            return bool(waiting)
+        if isinstance(eventtype, int):
+            eventtype = [eventtype]
+        return any(event.type in eventtype for event in waiting)
+
+    def clear_events(self, eventtype=None, pump=True):
+        """Stands in for pygame.event.clear."""
+        self.take(eventtype)
+
+    def poll_event(self):
+        """Stands in for pygame.event.poll."""
+        if not self.events and self.pygame.display.get_init():
+            return self.poll()
+        if not self.events:
+            return self.pygame.event.Event(self.pygame.NOEVENT)
+        return self.events.popleft()
+
+    def wait_event(self, *args):
+        """Stands in for pygame.event.wait, feeding input until there is an event."""
+        for _ in range(self.frames):
+            event = self.poll_event()
+            if event.type != self.pygame.NOEVENT:
+                return event
+            self.next_input()
+        raise _Finished()
+
+def _run_child(program, frames, seed, recording, memory_limit):
+    """Internal helper that runs a program in this process and returns its result."""
+    if resource is not None and memory_limit:
+        limit = int(memory_limit * 1024 * 1024)
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    folder = os.path.dirname(program)
+    os.chdir(folder)
+    sys.path[:0] = [folder, _ROOT, os.path.join(_ROOT, 'framework')]
+    with open(program, encoding='utf-8', errors='replace') as file:
+        turtle_program = re.search(r'^\s*import turtle', file.read(), re.MULTILINE) is not None
+
+    result = {'status': PASSED, 'error': None, 'frame_times': []}
+    harness = None
+    try:
+        if turtle_program:
+            import framework.coda_kids.turtle
+            started = time.perf_counter()
+            framework.coda_kids.turtle.run_script(program)
+            result['frame_times'] = [(time.perf_counter() - started) * 1000]
+        else:
+            import pygame
+            keys = [(pygame.K_LEFT, ''), (pygame.K_RIGHT, ''), (pygame.K_UP, ''),
+                    (pygame.K_DOWN, ''), (pygame.K_SPACE, ' '), (pygame.K_RETURN, '\r'),
+                    (pygame.K_a, 'a'), (pygame.K_d, 'd'), (pygame.K_s, 's'), (pygame.K_w, 'w')]
+            source = _Recording(recording) if recording else _Monkey(seed, keys)
+            random.seed(seed)
+            harness = _Harness(frames, source)
+            harness.install()
+            runpy.run_path(program, run_name='__main__')
+    except _Finished:
+        pass
+    except SystemExit:
+        result['status'] = EXITED
+    except MemoryError:
+        result['status'] = MEMORY
+    except BaseException:
+        result['status'] = CRASHED
+        result['error'] = ''.join(traceback.format_exc().splitlines(True)[-6:])
+    if harness is not None:
+        result['frame_times'] = harness.frame_times
+    result['peak_memory'] = _peak_memory()
+    return result
+
+def _summary(frame_times):
+    """Internal helper that sums up frame times in milliseconds."""
+    ordered = sorted(frame_times)
+    if not ordered:
+        return {'frames': 0}
+    return {'frames': len(ordered),
+            'mean': sum(ordered) / len(ordered),
+            'p50': percentile(ordered, 50),
+            'p90': percentile(ordered, 90),
+            'p99': percentile(ordered, 99),
+            'max': ordered[-1]}
+
+def check(program, frames=600, seed=0, recording=None, time_limit=60, memory_limit=1024):
+    """
+    Runs one program in a new headless process and returns its report entry.
+
+        entry = grade.check("project-solutions/level-4/SpaceWars.py");
+    """
+    (handle, result_file) = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    command = [sys.executable, '-m', 'framework.coda_kids.grade', '--child', program,
+               '--frames', str(frames), '--seed', str(seed), '--memory-limit', str(memory_limit),
+               '--result', result_file]
+    if recording:
+        command.extend(['--input', os.path.abspath(recording)])
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join(filter(None, [_ROOT, environment.get('PYTHONPATH')]))
+
+    entry = {'program': program, 'status': CRASHED, 'error': None}
+    process = None
+    started = time.perf_counter()
+    try:
+        process = subprocess.run(command, cwd=_ROOT, env=environment, timeout=time_limit,
+                                 stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE)
+        with open(result_file) as file:
+            result = json.load(file)
+        entry['status'] = result['status']
+        entry['error'] = result['error']
+        entry['peak_memory'] = result['peak_memory']
+        entry.update(_summary(result['frame_times']))
+    except subprocess.TimeoutExpired:
+        entry['status'] = TIMEOUT
+        entry['error'] = "Still running after {} seconds.".format(time_limit)
+    except (OSError, ValueError):
+        # the child died before writing its result, for example from a crash in C code.
+        if process is None:
+            raise
+        text = process.stderr.decode('utf-8', 'replace')
+        entry['error'] = text[-1000:] or "Stopped with code {}.".format(process.returncode)
+        if 'MemoryError' in text:
+            entry['status'] = MEMORY
+    finally:
+        os.remove(result_file)
+    entry['seconds'] = time.perf_counter() - started
+    return entry
+
+def compare(report, baseline, slower=1.25):
+    """
+    Marks projects whose 90th percentile frame time is more than slower times
+    the one in the baseline report. Returns the programs that got slower.
+    """
+    before = dict((entry['program'], entry) for entry in baseline['projects'])
+    regressions = []
+    for entry in report['projects']:
+        old = before.get(entry['program'])
+        if old is None or not old.get('p90') or not entry.get('p90'):
+            continue
+        entry['baseline_p90'] = old['p90']
+        if entry['p90'] > old['p90'] * slower:
+            entry['regressed'] = True
+            regressions.append(entry['program'])
+    return regressions
+
+def grade(paths, frames=600, seed=0, recording=None, time_limit=60, memory_limit=1024, workers=None):
+    """
+    Checks every program found in paths, several at a time, and returns the report.
+
+        report = grade.grade(["project-solutions"], 300);
+    """
+    programs = discover(paths)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    # each check waits on its own process, so threads are enough to keep them all busy.
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        entries = list(pool.map(lambda program: check(program, frames, seed, recording,
+                                                      time_limit, memory_limit), programs))
+    return {'frames': frames,
+            'seed': seed,
+            'input': recording,
+            'seconds': time.perf_counter() - started,
+            'projects': entries}
+
+def _print_report(report):
+    """Internal helper that prints one line per project."""
+    for entry in report['projects']:
+        line = "{:8} {}".format(entry['status'], os.path.relpath(entry['program']))
+        if entry.get('frames'):
+            line += "  {} frames, p50 {:.1f}ms p90 {:.1f}ms p99 {:.1f}ms".format(
+                entry['frames'], entry['p50'], entry['p90'], entry['p99'])
+        if entry.get('peak_memory'):
+            line += ", {:.0f}MB".format(entry['peak_memory'])
+        if entry.get('regressed'):
+            line += "  SLOWER (p90 was {:.1f}ms)".format(entry['baseline_p90'])
+        print(line)
+        if entry['error'] and entry['status'] != PASSED:
+            print('    ' + entry['error'].strip().replace('\n', '\n    '))
+    print("{} projects in {:.1f} seconds.".format(len(report['projects']), report['seconds']))
+
+def main(arguments=None):
+    """Reads the command line and runs the checks."""
+    parser = argparse.ArgumentParser(description="Check coda projects headless.")
+    parser.add_argument('paths', nargs='*', default=['project-solutions', 'project-templates'],
+                        help="project folders or files")
+    parser.add_argument('--frames', type=int, default=600, help="frames each project must survive")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the scripted input")
+    parser.add_argument('--input', help="coda.replay recording to use as the input")
+    parser.add_argument('--time-limit', type=float, default=60, help="seconds per project")
+    parser.add_argument('--memory-limit', type=float, default=1024, help="megabytes per project")
+    parser.add_argument('--workers', type=int, help="projects to run at once")
+    parser.add_argument('--report', default='grade-report.json', help="where to write the report")
+    parser.add_argument('--baseline', help="earlier report to compare frame times with")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    options = parser.parse_args(arguments)
+
+    if options.child:
+        result = _run_child(options.child, options.frames, options.seed, options.input,
+                            options.memory_limit)
+        with open(options.result, 'w') as file:
+            json.dump(result, file)
+        # skip students' atexit and pygame shutdown, the result is already written.
+        os._exit(0)
+
+    report = grade(options.paths, options.frames, options.seed, options.input,
+                   options.time_limit, options.memory_limit, options.workers)
+    if options.baseline:
+        with open(options.baseline) as file:
+            compare(report, json.load(file))
+    with open(options.report, 'w') as file:
+        json.dump(report, file, indent=1)
+    _print_report(report)
+    failed = [entry for entry in report['projects']
+              if entry['status'] not in (PASSED, EXITED) or entry.get('regressed')]
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+This module contains a ready made quiz state for the state machine.
+
+Each question screen is drawn once and kept, answers are picked with the
+mouse, and the reaction to an answer stays up on a timer instead of freezing
+the whole game with time.sleep. The quiz lets the state machine sleep, so it
+only redraws when something changes.
+
+    QUIZ = coda.quiz.Quiz(QUESTIONS, coda.Image("Background.png"));
+    coda.state.Manager.register(QUIZ);
+"""
+import random
+import pygame
+import framework.coda_kids
+import framework.coda_kids.state
+
+# what the quiz is showing
+_QUESTION = 0
+_FEEDBACK = 1
+_END = 2
+
+def _surface(image):
+    """Internal helper that accepts a coda Image or a pygame surface."""
+    if image is not None and hasattr(image, 'surface'):
+        return image.surface()
+    return image
+
+class Quiz:
+    """
+    A quiz state. questions is a list of (question, answer, wrong answer, ...),
+    or a sample from a coda.trivia.QuestionBank.
+    correct and incorrect are lists of images shown after an answer, picked
+    by which answer was clicked. When the quiz ends it changes to next_state,
+    or stops the game if there is none.
+
+        QUIZ = coda.quiz.Quiz(QUESTIONS, BACKGROUND, [CORRECT_A, CORRECT_B], [INCORRECT_A, INCORRECT_B], END);
+    """
+    def __init__(self, questions, background=None, correct=None, incorrect=None,
+                 end=None, font_size=35, feedback_time=5, next_state=None):
+        self.questions = list(questions)
+        self.background = background
+        self.correct = correct or []
+        self.incorrect = incorrect or []
+        self.end = end
+        self.font_size = font_size
+        self.feedback_time = feedback_time
+        self.next_state = next_state
+        self.text_color = (0, 0, 0)
+        self.question_location = (200, 150)
+        self.answer_location = (200, 230)
+        self.answer_spacing = 70
+        self.feedback_location = (300, 0)
+        self.font = None
+        self.window = None
+        self.screens = {}
+        self.index = 0
+        self.score = 0
+        self.showing = _QUESTION
+        self.screen = None
+        self.timer = 0
+        self.was_idle = False
+
+    def initialize(self, window):
+        """Starts the quiz from the first question. Called by the state machine."""
+        manager = framework.coda_kids.state.Manager
+        self.font = pygame.font.Font(None, self.font_size)
+        self.window = (int(window[0]), int(window[1]))
+        self.index = 0
+        self.score = 0
+        self.was_idle = manager.idle
+        manager.sleep(True, manager.idle_timeout)
+        manager.events.on(pygame.QUIT, self.quit)
+        manager.events.on(pygame.MOUSEBUTTONDOWN, self.click, 1)
+        # the quiz only reads clicks, so mouse motion doesn't wake the machine.
+        manager.events.block_unused()
+        self.show_question()
+
+    def question_screen(self, index):
+        """
+        Returns the screen for a question and where its answers are. It is drawn
+        the first time it is needed, with the answers shuffled, and then kept.
+        """
+        if index not in self.screens:
+            question = self.questions[index]
+            choices = list(question[1:])
+            random.shuffle(choices)
+
+            screen = pygame.Surface(self.window)
+            screen.fill((255, 255, 255))
+            if self.background is not None:
+                screen.blit(_surface(self.background), (0, 0))
+            screen.blit(self.font.render(question[0], True, self.text_color), self.question_location)
+
+            rects = []
+            for (i, choice) in enumerate(choices):
+                location = (self.answer_location[0], self.answer_location[1] + i * self.answer_spacing)
+                text = self.font.render(choice, True, self.text_color)
+                rects.append(screen.blit(text, location))
+            self.screens[index] = (screen, choices, rects)
+        return self.screens[index]
+
+    def show_question(self):
+        """Internal helper that switches to the current question."""
+        self.showing = _QUESTION
+        self.screen = self.question_screen(self.index)[0]
+        framework.coda_kids.state.Manager.wake()
+
+    def show_feedback(self, slot, right):
+        """Internal helper that draws the reaction to an answer once and starts its timer."""
+        if right:
+            (text, color, images) = ("That is correct.", (0, 128, 0), self.correct)
+        else:
+            (text, color, images) = ("That is incorrect.", (255, 0, 0), self.incorrect)
+
+        screen = self.screen.copy()
+        screen.blit(self.font.render(text, True, color), self.feedback_location)
+        if images:
+            screen.blit(_surface(images[slot % len(images)]), (0, 0))
+        self.showing = _FEEDBACK
+        self.screen = screen
+        self.timer = self.feedback_time
+        framework.coda_kids.state.Manager.wake()
+
+    def show_end(self):
+        """Internal helper that shows the end screen until its timer runs out."""
+        screen = pygame.Surface(self.window)
+        screen.fill((255, 255, 255))
+        if self.background is not None:
+            screen.blit(_surface(self.background), (0, 0))
+        if self.end is not None:
+            screen.blit(_surface(self.end), (0, 0))
+        self.showing = _END
+        self.screen = screen
+        self.timer = self.feedback_time
+        framework.coda_kids.state.Manager.wake()
+
+    def click(self, event):
+        """Checks a mouse click against the answers. Called by the event dispatcher."""
+        if self.showing != _QUESTION:
+            return
+        (_, choices, rects) = self.question_screen(self.index)
+        for (slot, rect) in enumerate(rects):
+            if rect.collidepoint(event.pos):
+                right = choices[slot] == self.questions[self.index][1]
+                if right:
+                    self.score += 1
+                self.show_feedback(slot, right)
+                return
+
+    def quit(self, event):
+        """Stops the game when the window is closed. Called by the event dispatcher."""
+        framework.coda_kids.stop()
+
+    def update(self, delta_time):
+        """Counts down the feedback and end timers. Called by the state machine."""
+        if self.showing == _QUESTION:
+            return
+        self.timer -= delta_time
+        if self.timer > 0:
+            return
+        if self.showing == _FEEDBACK:
+            self.index += 1
+            if self.index < len(self.questions):
+                self.show_question()
+            else:
+                self.show_end()
+        elif self.next_state is not None:
+            framework.coda_kids.state.change(self.next_state)
+        else:
+            framework.coda_kids.stop()
+
+    def draw(self, screen):
+        """Shows the current screen. Called by the state machine."""
+        screen.blit(self.screen, (0, 0))
+
+    def cleanup(self):
+        """Puts the state machine's sleep setting back. Called by the state machine."""
+        manager = framework.coda_kids.state.Manager
+        manager.sleep(self.was_idle, manager.idle_timeout)
@@ -0,0 +1,375 @@
+"""
+This module records play sessions and plays them back.
+
+A recording holds the random seed, the time of every frame, the keyboard
+and mouse snapshot of every frame and the events the game read during it.
+Only what changed since the previous frame is written, so an hour of play
+stays small. Playing a recording back runs the same game code with the
+same input, as fast as the computer allows, so a slow frame or a bug can
+be reproduced exactly.
+
+    # record
+    coda.state.Manager.record("session.rec");
+
+    # replay later, without a window
+    coda.replay.headless();
+    coda.state.Manager.replay("session.rec");
+"""
+import ast
+import os
+import random
+import struct
+import time
+import zlib
+
+import pygame
+
+MAGIC = b'CODAREC'
+VERSION = 2
+
+# frame flags
+_KEYS = 1
+_MOUSE_POSITION = 2
+_MOUSE_BUTTONS = 4
+_EVENTS = 8
+_CHECKSUM = 16
+
+_HEADER = struct.Struct('<7sBQH')
+_FRAME = struct.Struct('<BH')
+_COUNT = struct.Struct('<H')
+_INDEX = struct.Struct('<H')
+_POSITION = struct.Struct('<hh')
+_BUTTONS = struct.Struct('<BB')
+_CRC = struct.Struct('<I')
+_EVENT_TYPE = struct.Struct('<I')
+_KEY_EVENT = struct.Struct('<IH')
+_BUTTON_EVENT = struct.Struct('<Bhh')
+_MOTION_EVENT = struct.Struct('<hhhhB')
+_EDITING_EVENT = struct.Struct('<ii')
+_LENGTH = struct.Struct('<I')
+
+def headless():
+    """
+    Lets pygame run without a window or sound card. Call before coda.start.
+
+        coda.replay.headless();
+    """
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+def checksum(value):
+    """
+    Turns any printable game data into a number for comparing frames.
+
+        coda.state.Manager.replay("session.rec", lambda: coda.replay.checksum(MY.player.location));
+    """
+    return zlib.crc32(repr(value).encode('utf-8')) & 0xffffffff
+
+def _button_mask(buttons):
+    """Internal helper that packs mouse buttons into a bit mask."""
+    mask = 0
+    for (i, down) in enumerate(buttons):
+        if down:
+            mask |= 1 << i
+    return mask
+
+def _wrap_keys(keys):
+    """Internal helper that makes a key tuple indexable by pygame key constants."""
+    wrapper = getattr(pygame.key, 'ScancodeWrapper', tuple)
+    return wrapper(keys)
+
+def _text_events():
+    """Internal helper that returns the text entry event types this pygame has."""
+    return tuple(getattr(pygame, name) for name in ('TEXTINPUT', 'TEXTEDITING')
+                 if hasattr(pygame, name))
+
+def _user_event(event_type):
+    """Internal helper that checks if an event type is one a game made."""
+    return pygame.USEREVENT <= event_type < pygame.NUMEVENTS
+
+def _recorded(event):
+    """Internal helper that checks if an event is one games read and replays need."""
+    return (event.type in (pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEMOTION,
+                           pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+            or event.type in _text_events() or _user_event(event.type))
+
+def _literal(value):
+    """Internal helper that checks if a value can be written out and read back unchanged."""
+    try:
+        return ast.literal_eval(repr(value)) == value
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return False
+
+def _write_text(out, text):
+    """Internal helper that writes a string with its length."""
+    data = text.encode('utf-8')
+    out.append(_INDEX.pack(len(data)))
+    out.append(data)
+
+def _read_text(data, offset):
+    """Internal helper that reads a string written by _write_text."""
+    (length,) = _INDEX.unpack_from(data, offset)
+    offset += _INDEX.size
+    return (data[offset:offset + length].decode('utf-8'), offset + length)
+
+def _write_event(out, event):
+    """Internal helper that writes the parts of an event games read."""
+    out.append(_EVENT_TYPE.pack(event.type))
+    if event.type == pygame.KEYDOWN:
+        out.append(_KEY_EVENT.pack(event.key, event.mod))
+        _write_text(out, event.unicode)
+    elif event.type == pygame.KEYUP:
+        out.append(_KEY_EVENT.pack(event.key, event.mod))
+    elif event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEBUTTONUP:
+        out.append(_BUTTON_EVENT.pack(event.button, event.pos[0], event.pos[1]))
+    elif event.type == pygame.MOUSEMOTION:
+        out.append(_MOTION_EVENT.pack(event.pos[0], event.pos[1], event.rel[0],
+                                      event.rel[1], _button_mask(event.buttons)))
+    elif event.type == getattr(pygame, 'TEXTINPUT', None):
+        _write_text(out, event.text)
+    elif event.type == getattr(pygame, 'TEXTEDITING', None):
+        _write_text(out, event.text)
+        out.append(_EDITING_EVENT.pack(event.start, event.length))
+    elif _user_event(event.type):
+        # values that can't be read back, like game objects, are left out.
+        attributes = dict((name, value) for (name, value) in event.dict.items()
+                          if _literal(value))
+        data = repr(attributes).encode('utf-8')
+        out.append(_LENGTH.pack(len(data)))
+        out.append(data)
+
+def _read_event(data, offset, version=VERSION):
+    """Internal helper that reads an event written by _write_event."""
+    (event_type,) = _EVENT_TYPE.unpack_from(data, offset)
+    offset += _EVENT_TYPE.size
+    if event_type == pygame.KEYDOWN:
+        (key, mod) = _KEY_EVENT.unpack_from(data, offset)
+        offset += _KEY_EVENT.size
+        (text, offset) = _read_text(data, offset)
+        return (pygame.event.Event(event_type, key=key, mod=mod, unicode=text), offset)
+    if event_type == pygame.KEYUP:
+        (key, mod) = _KEY_EVENT.unpack_from(data, offset)
+        offset += _KEY_EVENT.size
+        return (pygame.event.Event(event_type, key=key, mod=mod), offset)
+    if event_type == pygame.MOUSEBUTTONDOWN or event_type == pygame.MOUSEBUTTONUP:
+        (button, x, y) = _BUTTON_EVENT.unpack_from(data, offset)
+        offset += _BUTTON_EVENT.size
+        return (pygame.event.Event(event_type, button=button, pos=(x, y)), offset)
+    if event_type == pygame.MOUSEMOTION:
+        (x, y, rel_x, rel_y, mask) = _MOTION_EVENT.unpack_from(data, offset)
+        offset += _MOTION_EVENT.size
+        buttons = tuple(bool(mask & (1 << i)) for i in range(3))
+        return (pygame.event.Event(event_type, pos=(x, y), rel=(rel_x, rel_y),
+                                   buttons=buttons), offset)
+    if event_type == getattr(pygame, 'TEXTINPUT', None):
+        (text, offset) = _read_text(data, offset)
+        return (pygame.event.Event(event_type, text=text), offset)
+    if event_type == getattr(pygame, 'TEXTEDITING', None):
+        (text, offset) = _read_text(data, offset)
+        (start, length) = _EDITING_EVENT.unpack_from(data, offset)
+        offset += _EDITING_EVENT.size
+        return (pygame.event.Event(event_type, text=text, start=start, length=length), offset)
+    if _user_event(event_type) and version >= 2:
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        attributes = ast.literal_eval(data[offset:offset + length].decode('utf-8'))
+        offset += length
+        return (pygame.event.Event(event_type, attributes), offset)
+    return (pygame.event.Event(event_type), offset)
+
+class Recorder:
+    """
+    Writes a recording one frame at a time. Used by the state machine.
+
+        recorder = Recorder("session.rec");
+    """
+    def __init__(self, filename, seed=None):
+        if seed is None:
+            seed = int(time.time() * 1000) & 0xffffffffffffffff
+        self.seed = seed
+        self.file = open(filename, 'wb')
+        self.keys = None
+        self.mouse_position = None
+        self.mouse_buttons = None
+        self.frame = None
+        self.events = []
+        random.seed(seed)
+
+        # the game's reads go through the recorder, so events pumped in the
+        # middle of a frame by the game's own pygame.event.get are kept too.
+        self.get = pygame.event.get
+        self.poll = pygame.event.poll
+        self.wait = pygame.event.wait
+        self.post = pygame.event.post
+        pygame.event.get = self.get_events
+        pygame.event.poll = self.poll_event
+        pygame.event.wait = self.wait_event
+        pygame.event.post = self.post_event
+
+    def read(self, events):
+        """Internal helper that keeps the events the game reads for this frame."""
+        for event in events:
+            if (_recorded(event) and not getattr(event, 'dispatched', False)
+                    and not getattr(event, 'posted', False)):
+                self.events.append(event)
+        return events
+
+    def get_events(self, *args, **kwargs):
+        """Stands in for pygame.event.get while recording."""
+        return self.read(self.get(*args, **kwargs))
+
+    def poll_event(self):
+        """Stands in for pygame.event.poll while recording."""
+        return self.read([self.poll()])[0]
+
+    def wait_event(self, *args, **kwargs):
+        """Stands in for pygame.event.wait while recording."""
+        return self.read([self.wait(*args, **kwargs)])[0]
+
+    def post_event(self, event):
+        """Stands in for pygame.event.post while recording."""
+        for (i, read) in enumerate(self.events):
+            if read is event:
+                # put back, like coda.event.wait does, so it is kept when read again.
+                del self.events[i]
+                return self.post(event)
+        if not getattr(event, 'dispatched', False):
+            # events the game makes itself are made again when it is replayed.
+            attributes = dict(event.dict)
+            attributes['posted'] = True
+            event = pygame.event.Event(event.type, attributes)
+        return self.post(event)
+
+    def begin_frame(self, milliseconds, state):
+        """
+        Starts a frame with its length and input snapshot. The events the game
+        reads until end_frame are recorded with it.
+        """
+        keys = tuple(bool(down) for down in state.keys)
+        if self.keys is None:
+            self.file.write(_HEADER.pack(MAGIC, VERSION, self.seed, len(keys)))
+            self.keys = (False,) * len(keys)
+
+        flags = 0
+        out = []
+
+        changed = [i for i in range(len(keys)) if keys[i] != self.keys[i]]
+        if changed:
+            flags |= _KEYS
+            out.append(_COUNT.pack(len(changed)))
+            out.extend(_INDEX.pack(i) for i in changed)
+            self.keys = keys
+
+        if state.mouse_position != self.mouse_position:
+            flags |= _MOUSE_POSITION
+            out.append(_POSITION.pack(state.mouse_position[0], state.mouse_position[1]))
+            self.mouse_position = state.mouse_position
+
+        if tuple(state.mouse_buttons) != self.mouse_buttons:
+            flags |= _MOUSE_BUTTONS
+            out.append(_BUTTONS.pack(len(state.mouse_buttons),
+                                     _button_mask(state.mouse_buttons)))
+            self.mouse_buttons = tuple(state.mouse_buttons)
+
+        self.frame = [_FRAME.pack(flags, min(milliseconds, 0xffff))] + out
+
+    def end_frame(self, value=None):
+        """
+        Finishes the frame with the events the game read during it, adding the
+        game's checksum if one is given.
+        """
+        (flags, milliseconds) = _FRAME.unpack(self.frame[0])
+        if self.events:
+            flags |= _EVENTS
+            self.frame.append(_COUNT.pack(len(self.events)))
+            for event in self.events:
+                _write_event(self.frame, event)
+            self.events = []
+        if value is not None:
+            flags |= _CHECKSUM
+            self.frame.append(_CRC.pack(value & 0xffffffff))
+        self.frame[0] = _FRAME.pack(flags, milliseconds)
+        self.file.write(b''.join(self.frame))
+        self.frame = None
+
+    def close(self):
+        """Writes anything left over, closes the file and stops watching the game's reads."""
+        self.file.close()
+        pygame.event.get = self.get
+        pygame.event.poll = self.poll
+        pygame.event.wait = self.wait
+        pygame.event.post = self.post
+
+class Frame:
+    """A single frame read back from a recording."""
+    def __init__(self, milliseconds, sample, events, checksum_value):
+        self.milliseconds = milliseconds
+        self.sample = sample
+        self.events = events
+        self.checksum = checksum_value
+
+class Player:
+    """
+    Reads a recording back one frame at a time. Used by the state machine.
+
+        player = Player("session.rec");
+    """
+    def __init__(self, filename):
+        with open(filename, 'rb') as file:
+            self.data = file.read()
+        (magic, version, self.seed, key_count) = _HEADER.unpack_from(self.data, 0)
+        # version 1 recordings didn't keep text entry or the data of user events.
+        if magic != MAGIC or not 1 <= version <= VERSION:
+            raise ValueError("{} is not a coda recording.".format(filename))
+        self.version = version
+        self.offset = _HEADER.size
+        self.keys = [False] * key_count
+        self.mouse_position = (0, 0)
+        self.mouse_buttons = (False, False, False)
+        self.frame_number = 0
+        random.seed(self.seed)
+
+    def next_frame(self):
+        """Returns the next Frame, or None at the end of the recording."""
+        data = self.data
+        offset = self.offset
+        if offset >= len(data):
+            return None
+
+        (flags, milliseconds) = _FRAME.unpack_from(data, offset)
+        offset += _FRAME.size
+
+        if flags & _KEYS:
+            (count,) = _COUNT.unpack_from(data, offset)
+            offset += _COUNT.size
+            for _ in range(count):
+                (i,) = _INDEX.unpack_from(data, offset)
+                offset += _INDEX.size
+                self.keys[i] = not self.keys[i]
+
+        if flags & _MOUSE_POSITION:
+            self.mouse_position = _POSITION.unpack_from(data, offset)
+            offset += _POSITION.size
+
+        if flags & _MOUSE_BUTTONS:
+            (count, mask) = _BUTTONS.unpack_from(data, offset)
+            offset += _BUTTONS.size
+            self.mouse_buttons = tuple(bool(mask & (1 << i)) for i in range(count))
+
+        events = []
+        if flags & _EVENTS:
+            (count,) = _COUNT.unpack_from(data, offset)
+            offset += _COUNT.size
+            for _ in range(count):
+                (event, offset) = _read_event(data, offset, self.version)
+                events.append(event)
+
+        checksum_value = None
+        if flags & _CHECKSUM:
+            (checksum_value,) = _CRC.unpack_from(data, offset)
+            offset += _CRC.size
+
+        self.offset = offset
+        self.frame_number += 1
+        sample = (_wrap_keys(self.keys), self.mouse_position, self.mouse_buttons)
+        return Frame(milliseconds, sample, events, checksum_value)
@@ -1,6 +1,23 @@
-"""This file contains functionality related to game state management."""
+"""
+This file contains functionality related to game state management.
+
+Besides switching between registered states by number, scenes can be stacked.
+push pauses the current scene and keeps it in memory, so pop returns to it
+instantly, for example from a pause menu. A scene with a preload function has
+it run on a worker thread first, and the current scene keeps running until it
+is done, so switching never stalls a frame.
+
+    coda.state.preload(LEVEL_2);
+    coda.state.push(PAUSE_MENU);
+    coda.state.pop();
+    coda.state.replace(LEVEL_2, 0.5);
+"""
+import concurrent.futures
 import pygame
 import framework.coda_kids.actions
+import framework.coda_kids.event
+import framework.coda_kids.replay
+from framework.coda_kids.event import Dispatcher
 
 class Machine:
     """Game state machine class."""
@@ -8,35 +25,350 @@ class Machine:
         self.current = 0
         self.previous = 0
         self.states = []
+        self.input = None
+        # Manager is made while the package is still importing, so framework.coda_kids can't be used yet.
+        self.events = Dispatcher()
+        self.recorder = None
+        self.player = None
+        self.frame = None
+        self.checksum = None
+        self.headless = False
+        self.idle = False
+        self.idle_timeout = 250
+        self.awake = 0
+        self.redraw = True
+        self.stack = []
+        self.scenes = {}
+        self.preloads = {}
+        self.loader = None
+        self.pending = None
+        self.window = None
+        self.snapshot = None
+        self.transition = 0
+        self.transition_time = 0
 
     def register(self, module):
         """Registers the state's init, update, draw, and cleanup functions."""
-        self.states.append({'initialize': module.initialize,
-                            'update': module.update,
-                            'draw': module.draw,
-                            'cleanup': module.cleanup})
+        self.states.append(_describe(module))
+
+    def scene(self, scene):
+        """Internal helper that returns the functions for a state number, or a scene module or object."""
+        if isinstance(scene, int):
+            return self.states[scene]
+        if isinstance(scene, dict):
+            return scene
+        # the scene is kept with its functions so its id can't be reused.
+        if id(scene) not in self.scenes:
+            self.scenes[id(scene)] = (scene, _describe(scene))
+        return self.scenes[id(scene)][1]
+
+    def preload(self, scene):
+        """
+        Starts a scene's preload function on a worker thread and returns right
+        away. push and replace call this for you, so calling it early just means
+        there's nothing left to wait for. A scene is preloaded once each time it
+        is entered, so it loads again if it comes back after being cleaned up.
+        """
+        functions = self.scene(scene)
+        if id(functions) not in self.preloads:
+            future = None
+            if functions['preload'] is not None:
+                if self.loader is None:
+                    self.loader = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+                future = self.loader.submit(functions['preload'])
+            self.preloads[id(functions)] = future
+        return self.preloads[id(functions)]
+
+    def push(self, scene, transition=0):
+        """
+        Pauses the current scene, keeping it in memory, and starts scene on top
+        of it once it has preloaded. transition is how many seconds to fade over.
+        """
+        self.pending = ('push', self.scene(scene), transition)
+        self.preload(scene)
+
+    def pop(self, transition=0):
+        """Cleans up the current scene and resumes the one that was paused under it."""
+        self.pending = ('pop', None, transition)
+
+    def replace(self, scene, transition=0):
+        """Cleans up the current scene and starts scene in its place once it has preloaded."""
+        self.pending = ('replace', self.scene(scene), transition)
+        self.preload(scene)
+
+    def switch(self, screen):
+        """Internal helper that carries out a waiting push, pop or replace if it is ready."""
+        (operation, functions, transition) = self.pending
+        if functions is not None:
+            future = self.preloads.get(id(functions))
+            # recordings switch on the frame that asked, so replays stay in step.
+            waiting = self.recorder is None and self.player is None
+            if future is not None and waiting and not future.done():
+                # keep running the current scene until the next one has loaded.
+                return
+            if future is not None:
+                # errors from the worker thread are raised here.
+                future.result()
+        if operation == 'pop' and len(self.stack) < 2:
+            raise RuntimeError("There is no paused scene to pop back to.")
+        self.pending = None
+        if functions is not None:
+            self.preloads.pop(id(functions), None)
+
+        if transition > 0:
+            self.snapshot = screen.copy()
+            self.transition = transition
+            self.transition_time = transition
+        (top, _) = self.stack[-1]
+        if operation == 'push':
+            if top['pause'] is not None:
+                top['pause']()
+            # the paused scene's event handlers are put back when it resumes.
+            self.stack[-1] = (top, (self.events.handlers, self.events.blocking))
+            self.events.handlers = {}
+            self.events.clear()
+            self.stack.append((functions, None))
+            functions['initialize'](self.window)
+        else:
+            top['cleanup']()
+            self.events.clear()
+            self.stack.pop()
+            self.forget(top)
+            if operation == 'pop':
+                (top, (handlers, blocking)) = self.stack[-1]
+                self.events.handlers = handlers
+                self.events.blocking = blocking
+                self.events.dirty = True
+                self.stack[-1] = (top, None)
+                if top['resume'] is not None:
+                    top['resume']()
+            else:
+                self.stack.append((functions, None))
+                functions['initialize'](self.window)
+        self.redraw = True
+
+    def forget(self, functions):
+        """Internal helper that drops what was kept for a scene once it has been cleaned up."""
+        self.preloads.pop(id(functions), None)
+        if any(entry is functions for (entry, _) in self.stack):
+            return
+        for (key, (_, entry)) in list(self.scenes.items()):
+            if entry is functions:
+                del self.scenes[key]
+
+    def draw(self, screen, delta_time):
+        """Internal helper that draws the top scene, any scenes it overlays, and the fade between scenes."""
+        first = len(self.stack) - 1
+        while first > 0 and self.stack[first][0]['overlay']:
+            first -= 1
+        for (functions, _) in self.stack[first:]:
+            functions['draw'](screen)
+
+        if self.snapshot is not None:
+            self.transition -= delta_time
+            if self.transition <= 0:
+                self.snapshot = None
+            else:
+                self.snapshot.set_alpha(int(255 * self.transition / self.transition_time))
+                screen.blit(self.snapshot, (0, 0))
+
+    def record(self, filename, checksum=None):
+        """
+        Records the session to the given file while the game runs. Call before run.
+        checksum is an optional function returning a number that sums up the game
+        data, so a replay can check it ends up in the same place every frame.
+        """
+        self.recorder = framework.coda_kids.replay.Recorder(filename)
+        self.checksum = checksum
+
+    def replay(self, filename, checksum=None, headless=True):
+        """
+        Plays a recording back as fast as possible instead of reading real input.
+        run returns when the recording ends. Call before run.
+        """
+        self.player = framework.coda_kids.replay.Player(filename)
+        self.checksum = checksum
+        self.headless = headless
+
+    def sleep(self, enabled=True, timeout=250):
+        """
+        Lets the game sleep while nothing is moving. When no coda.actions are
+        running and wake hasn't been called, the machine waits for input instead
+        of running 60 frames a second. It still updates every timeout
+        milliseconds so timers keep counting, but only draws when there was input.
+        """
+        self.idle = enabled
+        self.idle_timeout = timeout
+
+    def wake(self, seconds=0):
+        """
+        Keeps frames running and drawing for the given number of seconds. Call it
+        for animations and timers the machine can't see while sleep is on.
+        """
+        self.awake = max(self.awake, seconds)
+        self.redraw = True
+
+    def sleeping(self):
+        """Internal helper that checks if the machine can wait for input."""
+        return (self.idle and self.player is None and self.awake <= 0 and not self.redraw
+                and not framework.coda_kids.actions.active()
+                and self.current == self.previous and self.pending is None
+                and self.snapshot is None)
+
+    def next_frame(self, clock):
+        """Internal helper that starts a frame and returns its delta time."""
+        if self.player is not None:
+            frame = self.player.next_frame()
+            if frame is None:
+                return None
+            clock.tick()
+            self.input = framework.coda_kids.event.capture(frame.sample)
+            # live events are dropped so only recorded ones reach the game.
+            pygame.event.clear()
+            for event in frame.events:
+                pygame.event.post(event)
+            if frame.events:
+                self.redraw = True
+            self.frame = frame
+            return frame.milliseconds / 1000
+
+        milliseconds = clock.tick(60)
+        self.input = framework.coda_kids.event.capture()
+        if self.recorder is not None:
+            self.recorder.begin_frame(milliseconds, self.input)
+        return milliseconds / 1000
+
+    def end_frame(self):
+        """Internal helper that finishes recording or checking a frame."""
+        if self.recorder is not None:
+            value = None if self.checksum is None else self.checksum()
+            self.recorder.end_frame(value)
+        elif self.player is not None:
+            if self.checksum is not None and self.frame.checksum is not None:
+                value = self.checksum() & 0xffffffff
+                if value != self.frame.checksum:
+                    raise RuntimeError("Replay went out of sync on frame {}."
+                                       .format(self.player.frame_number))
 
     def run(self, screen, window, fill_color):
         """Runs the state given machine."""
         clock = pygame.time.Clock()
+        self.window = window
+        first = self.states[self.current]
+        # the first scene has nothing to show while it loads, so wait for it.
+        future = self.preload(first)
+        if future is not None:
+            future.result()
+        self.preloads.pop(id(first), None)
+        self.stack = [(first, None)]
         # first run initialize!
-        self.states[self.current]['initialize'](window)
+        first['initialize'](window)
+
+        try:
+            while True:
+                if self.sleeping() and framework.coda_kids.event.wait(self.idle_timeout):
+                    self.redraw = True
+                delta_time = self.next_frame(clock)
+                if delta_time is None:
+                    return
+                if self.current != self.previous:
+                    self.replace(self.current)
+                    self.previous = self.current
+                if self.pending is not None:
+                    self.switch(screen)
 
-        while True:
-            delta_time = clock.tick(60) / 1000
-            if self.current != self.previous:
-                self.states[self.current]['cleanup']()
-                self.states[self.current]['initialize'](window)
-                self.previous = self.current
+                # states that registered handlers get their events routed for them.
+                if self.events.handlers:
+                    self.events.dispatch()
 
-            framework.coda_kids.actions.update(delta_time)
-            self.states[self.current]['update'](delta_time)
-            screen.fill(fill_color)
-            self.states[self.current]['draw'](screen)
-            pygame.display.flip()
+                moving = (framework.coda_kids.actions.active() or self.awake > 0
+                          or self.snapshot is not None)
+                framework.coda_kids.actions.update(delta_time)
+                self.stack[-1][0]['update'](delta_time)
+                self.awake = max(0, self.awake - delta_time)
+                # while sleeping, frames without input only update.
+                if not self.idle or self.redraw or moving:
+                    screen.fill(fill_color)
+                    self.draw(screen, delta_time)
+                    self.redraw = False
+                    if not (self.player is not None and self.headless):
+                        pygame.display.flip()
+                self.end_frame()
+        finally:
+            if self.recorder is not None:
+                self.recorder.close()
+            if self.loader is not None:
+                self.loader.shutdown(wait=False)
+                self.loader = None
+
+def _describe(scene):
+    """
+    Internal helper that collects a scene's functions. preload, pause and
+    resume are optional, and overlay means the scene under it is drawn too.
+    """
+    return {'initialize': scene.initialize,
+            'update': scene.update,
+            'draw': scene.draw,
+            'cleanup': scene.cleanup,
+            'preload': getattr(scene, 'preload', None),
+            'pause': getattr(scene, 'pause', None),
+            'resume': getattr(scene, 'resume', None),
+            'overlay': getattr(scene, 'overlay', False)}
 
 Manager = Machine()
 
 def change(new_state):
     """Requests a change in game state."""
     Manager.current = new_state
+
+def preload(scene):
+    """
+    Starts loading a scene's assets in the background, before it is needed.
+
+        coda.state.preload(LEVEL_2);
+    """
+    Manager.preload(scene)
+
+def push(scene, transition=0):
+    """
+    Pauses the current scene and shows another on top of it.
+
+        coda.state.push(PAUSE_MENU);
+    """
+    Manager.push(scene, transition)
+
+def pop(transition=0):
+    """
+    Leaves the current scene and goes back to the paused one under it.
+
+        coda.state.pop();
+    """
+    Manager.pop(transition)
+
+def replace(scene, transition=0):
+    """
+    Swaps the current scene for another, fading between them over transition seconds.
+
+        coda.state.replace(LEVEL_2, 0.5);
+    """
+    Manager.replace(scene, transition)
+
+def sleep(enabled=True, timeout=250):
+    """
+    Lets the game wait for input instead of redrawing while nothing moves.
+
+        coda.state.sleep();
+    """
+    Manager.sleep(enabled, timeout)
+
+def wake(seconds=0):
+    """
+    Keeps the game running at full speed for a while, for example during an animation.
+
+        coda.state.wake(2);
+    """
+    Manager.wake(seconds)
+
+def input_state():
+    """Returns the keyboard and mouse snapshot for the current frame."""
+    return Manager.input
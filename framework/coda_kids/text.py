@@ -0,0 +1,174 @@
+"""
+This module draws text from a glyph atlas instead of rendering it every time.
+
+A GlyphAtlas renders each character of a font once, in one size and color,
+onto a single surface. Drawing a string then blits those glyphs next to each
+other, spaced by the font's own advances and kerning, so text that changes
+every frame, like scores, timers and health, costs no new surfaces. Atlases
+are saved to disk, so later launches load them instead of rendering again.
+
+    SCORE_TEXT = coda.text.GlyphAtlas(24, coda.color.WHITE);
+    SCORE_TEXT.draw(SCREEN, "Score: {}".format(score), (10, 10));
+"""
+import json
+import os
+import string
+
+import pygame
+
+CHARACTERS = string.digits + string.ascii_letters + string.punctuation + ' '
+CACHE_FOLDER = os.path.join(os.path.expanduser('~'), '.cache', 'coda_kids', 'glyphs')
+_ATLAS_WIDTH = 1024
+_VERSION = 1
+
+class GlyphAtlas:
+    """
+    Every character of a font in one size and color, ready to blit.
+
+        TIMER_TEXT = coda.text.GlyphAtlas(32, coda.color.BLACK);
+        TIMER_TEXT.draw(SCREEN, "0:42", (400, 20));
+    """
+    def __init__(self, font_size, color, font_file='freesansbold.ttf',
+                 characters=CHARACTERS, cache_folder=CACHE_FOLDER):
+        self.font_size = int(font_size)
+        self.color = tuple(color)
+        self.font_file = font_file
+        self.characters = characters
+        self.font = pygame.font.Font(font_file, self.font_size)
+        self.height = self.font.get_linesize()
+        self.surface = None
+        self.rects = {}
+        self.advances = {}
+        self.kerning = {}
+        self.extra = {}
+        self.cache_file = None
+        if cache_folder is not None:
+            name = '{}-{}-{}'.format(os.path.basename(str(font_file)), self.font_size,
+                                     '_'.join(str(part) for part in self.color))
+            self.cache_file = os.path.join(cache_folder, name)
+        if not self.load():
+            self.build()
+            self.save()
+
+    def _stamp(self):
+        """Internal helper that describes the font file, to notice when it changes."""
+        try:
+            stat = os.stat(self.font_file)
+            return [stat.st_size, stat.st_mtime]
+        except (OSError, TypeError):
+            return None
+
+    def build(self):
+        """Renders every character onto the atlas and measures the font's spacing."""
+        glyphs = [(char, self.font.render(char, True, self.color)) for char in self.characters]
+        (x, y) = (0, 0)
+        for (char, glyph) in glyphs:
+            if x + glyph.get_width() > _ATLAS_WIDTH:
+                (x, y) = (0, y + self.height)
+            self.rects[char] = pygame.Rect(x, y, glyph.get_width(), glyph.get_height())
+            x += glyph.get_width()
+
+        self.surface = pygame.Surface((_ATLAS_WIDTH, y + self.height), pygame.SRCALPHA)
+        for (char, glyph) in glyphs:
+            self.surface.blit(glyph, self.rects[char])
+
+        for (char, metric) in zip(self.characters, self.font.metrics(self.characters)):
+            self.advances[char] = metric[4] if metric is not None else self.rects[char].width
+
+        # kerning is whatever space a pair of characters takes beyond their advances.
+        for first in self.characters:
+            for second in self.characters:
+                pair_width = self.font.size(first + second)[0]
+                adjust = pair_width - self.advances[first] - self.advances[second]
+                if adjust:
+                    self.kerning[first + second] = adjust
+
+    def load(self):
+        """Loads a saved atlas. Returns False if there isn't a matching one."""
+        if self.cache_file is None:
+            return False
+        try:
+            with open(self.cache_file + '.json') as file:
+                data = json.load(file)
+            if (data['version'] != _VERSION or data['characters'] != self.characters
+                    or data['font'] != self._stamp()):
+                return False
+            self.surface = pygame.image.load(self.cache_file + '.png')
+            if pygame.display.get_surface() is not None:
+                self.surface = self.surface.convert_alpha()
+        except (OSError, ValueError, KeyError, pygame.error):
+            return False
+        self.rects = dict((char, pygame.Rect(rect)) for (char, rect) in data['rects'].items())
+        self.advances = data['advances']
+        self.kerning = data['kerning']
+        return True
+
+    def save(self):
+        """Saves the atlas so the next launch can load it."""
+        if self.cache_file is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            pygame.image.save(self.surface, self.cache_file + '.png')
+            data = {'version': _VERSION,
+                    'characters': self.characters,
+                    'font': self._stamp(),
+                    'rects': dict((char, list(rect)) for (char, rect) in self.rects.items()),
+                    'advances': self.advances,
+                    'kerning': self.kerning}
+            with open(self.cache_file + '.json', 'w') as file:
+                json.dump(data, file)
+        except (OSError, pygame.error):
+            pass
+
+    def glyph(self, char):
+        """Internal helper that returns the surface and area to blit for a character."""
+        rect = self.rects.get(char)
+        if rect is not None:
+            return (self.surface, rect)
+        # characters that aren't in the atlas are rendered once on their own.
+        if char not in self.extra:
+            glyph = self.font.render(char, True, self.color)
+            self.extra[char] = (glyph, glyph.get_rect())
+            self.advances[char] = glyph.get_width()
+        return self.extra[char]
+
+    def size(self, text):
+        """
+        Returns the width and height the text takes up.
+
+            (width, height) = SCORE_TEXT.size("Score: 100");
+        """
+        width = 0
+        previous = None
+        for char in text:
+            self.glyph(char)
+            if previous is not None:
+                width += self.kerning.get(previous + char, 0)
+            width += self.advances[char]
+            previous = char
+        return (width, self.height)
+
+    def draw(self, screen, text, location):
+        """
+        Draws text with its top left corner at location.
+
+            SCORE_TEXT.draw(SCREEN, str(score), (10, 10));
+        """
+        (x, y) = (int(location[0]), int(location[1]))
+        blits = []
+        previous = None
+        for char in text:
+            (surface, area) = self.glyph(char)
+            if previous is not None:
+                x += self.kerning.get(previous + char, 0)
+            blits.append((surface, (x, y), area))
+            x += self.advances[char]
+            previous = char
+
+        if hasattr(screen, 'blits'):
+            screen.blits(blits, False)
+        else:
+            for blit in blits:
+                screen.blit(*blit)
+        return pygame.Rect(int(location[0]), y, x - int(location[0]), self.height)
@@ -0,0 +1,237 @@
+"""
+This module reads trivia questions from a text file without loading the whole
+file, so a bank can hold as many questions as you like.
+
+Each question is four lines: the question, the right answer and two wrong
+answers. A line like [Animals] puts the questions after it in that category.
+The first time a bank is opened, an index of where each question starts is
+written next to it (trivia.txt.idx). Questions are read straight out of the
+file through mmap when they are asked for.
+
+    BANK = coda.trivia.QuestionBank("trivia.txt");
+    QUIZ = coda.quiz.Quiz(BANK.sample(8, "Animals"), BACKGROUND);
+"""
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+
+MAGIC = b'CODAIDX'
+VERSION = 2
+
+_HEADER = struct.Struct('<7sBQQQBH')
+_CATEGORY = struct.Struct('<HQQ')
+_OFFSET = struct.Struct('<Q')
+_ROUNDS = 4
+
+def _build_index(filename, lines_per_question):
+    """Internal helper that reads the bank once and returns its index as bytes."""
+    categories = {}
+    order = []
+    category = ''
+    with open(filename, 'rb') as file:
+        position = 0
+        line_number = 0
+        for line in file:
+            text = line.strip()
+            if text.startswith(b'[') and text.endswith(b']') and line_number == 0:
+                category = text[1:-1].decode('utf-8')
+            elif text:
+                if line_number == 0:
+                    if category not in categories:
+                        categories[category] = array('Q')
+                        order.append(category)
+                    categories[category].append(position)
+                line_number = (line_number + 1) % lines_per_question
+            position += len(line)
+
+    # a question cut short at the end of the file is left out.
+    if line_number != 0:
+        categories[category].pop()
+        if not categories[category]:
+            del categories[category]
+            order.remove(category)
+
+    stat = os.stat(filename)
+    count = sum(len(offsets) for offsets in categories.values())
+    out = [_HEADER.pack(MAGIC, VERSION, stat.st_size, stat.st_mtime_ns, count,
+                        lines_per_question, len(order))]
+    start = 0
+    for name in order:
+        encoded = name.encode('utf-8')
+        out.append(_CATEGORY.pack(len(encoded), start, len(categories[name])))
+        out.append(encoded)
+        start += len(categories[name])
+    # the offsets are grouped by category, so a category is one run of them.
+    for name in order:
+        offsets = categories[name]
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        out.append(offsets.tobytes())
+    return b''.join(out)
+
+class QuestionBank:
+    """
+    A file of trivia questions with an index for reading any question quickly.
+
+        BANK = coda.trivia.QuestionBank("trivia.txt");
+        question = BANK[0];
+    """
+    def __init__(self, filename, lines_per_question=4, index_filename=None):
+        self.filename = filename
+        self.index_filename = index_filename or filename + '.idx'
+        self.lines_per_question = lines_per_question
+        self.file = open(filename, 'rb')
+        if os.fstat(self.file.fileno()).st_size:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # an empty file can't be mapped, and there is nothing to read anyway.
+            self.data = b''
+        self.index_file = None
+        self.index = self._open_index()
+
+        (_, _, _, _, self.count, _, category_count) = _HEADER.unpack_from(self.index, 0)
+        self.categories = {}
+        position = _HEADER.size
+        for _ in range(category_count):
+            (length, start, count) = _CATEGORY.unpack_from(self.index, position)
+            position += _CATEGORY.size
+            name = bytes(self.index[position:position + length]).decode('utf-8')
+            position += length
+            self.categories[name] = (start, count)
+        self.offsets = position
+
+    def _open_index(self):
+        """Internal helper that maps the index, building it if it is missing or old."""
+        stat = os.stat(self.filename)
+        try:
+            self.index_file = open(self.index_filename, 'rb')
+            index = mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            (magic, version, size, mtime, _, lines, _) = _HEADER.unpack_from(index, 0)
+            if (magic, version, size, mtime, lines) == (MAGIC, VERSION, stat.st_size,
+                                                        stat.st_mtime_ns,
+                                                        self.lines_per_question):
+                return index
+            index.close()
+            self.index_file.close()
+        except (OSError, ValueError, struct.error):
+            if self.index_file is not None:
+                self.index_file.close()
+        self.index_file = None
+
+        data = _build_index(self.filename, self.lines_per_question)
+        try:
+            temp_filename = self.index_filename + '.tmp'
+            with open(temp_filename, 'wb') as file:
+                file.write(data)
+            os.replace(temp_filename, self.index_filename)
+            self.index_file = open(self.index_filename, 'rb')
+            return mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            # the folder can't be written to, so keep the index in memory.
+            return data
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, number):
+        """
+        Reads one question as (question, answer, wrong answer, ...).
+
+            (question, answer, wrong_1, wrong_2) = BANK[12];
+        """
+        if not 0 <= number < self.count:
+            raise IndexError("question {} is not in the bank".format(number))
+        (position,) = _OFFSET.unpack_from(self.index, self.offsets + number * _OFFSET.size)
+        lines = []
+        while len(lines) < self.lines_per_question and position < len(self.data):
+            end = self.data.find(b'\n', position)
+            if end == -1:
+                end = len(self.data)
+            text = self.data[position:end].strip()
+            if text:
+                lines.append(text.decode('utf-8'))
+            position = end + 1
+        return tuple(lines)
+
+    def sample(self, count=None, categories=None):
+        """
+        Picks count questions at random without repeats, from the given category
+        or list of categories, or from the whole bank. All of them if count is None.
+
+            for question in BANK.sample(8, ["Animals", "Movies"]):
+                ask(question);
+        """
+        if categories is None:
+            ranges = [(0, self.count)]
+        else:
+            if isinstance(categories, str):
+                categories = [categories]
+            ranges = [self.categories[name] for name in categories if name in self.categories]
+        return Sample(self, ranges, count)
+
+    def close(self):
+        """Closes the bank's files."""
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+        if self.index_file is not None:
+            self.index.close()
+            self.index_file.close()
+
+def _round(value, key, mask):
+    """Internal helper that scrambles half of a number for one round of the shuffle."""
+    value = ((value ^ key) * 0x9e3779b1) & 0xffffffff
+    value ^= value >> 16
+    value = (value * 0x85ebca6b) & 0xffffffff
+    value ^= value >> 13
+    return value & mask
+
+class Sample:
+    """
+    Questions picked from a bank in a random order without repeats. Nothing is
+    stored per question: each place in the order is worked out when it is asked
+    for by a small Feistel network, a shuffle of the question numbers made from
+    a few random keys, and questions are read when used.
+    """
+    def __init__(self, bank, ranges, count=None):
+        self.bank = bank
+        self.ranges = ranges
+        total = sum(size for (_, size) in ranges)
+        self.total = total
+        self.count = total if count is None else min(count, total)
+        # the network shuffles every number with an even number of bits, so it
+        # covers up to four times total, and numbers past the end are shuffled
+        # again until they land inside it.
+        self.half_bits = max(1, (max(1, total - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half_bits) - 1
+        self.keys = [random.getrandbits(32) for _ in range(_ROUNDS)]
+
+    def shuffle(self, number):
+        """Internal helper that returns which question comes at a place in the order."""
+        while True:
+            (left, right) = (number >> self.half_bits, number & self.mask)
+            for key in self.keys:
+                (left, right) = (right, left ^ _round(right, key, self.mask))
+            number = (left << self.half_bits) | right
+            if number < self.total:
+                return number
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, number):
+        if not 0 <= number < self.count:
+            raise IndexError("sample only has {} questions".format(self.count))
+        position = self.shuffle(number)
+        for (start, size) in self.ranges:
+            if position < size:
+                return self.bank[start + position]
+            position -= size
+        raise IndexError(number)
+
+    def __iter__(self):
+        for number in range(self.count):
+            yield self[number]
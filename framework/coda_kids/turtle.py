@@ -0,0 +1,412 @@
+"""
+This module is a stand in for python's turtle graphics that records the
+drawing instead of animating it.
+
+Moves are kept as lines of points, with straight runs merged into single
+segments, and the whole drawing is rendered with pygame in one pass, with or
+without a window. A recorded route can be compared against a reference route,
+so a class worth of TurtleMap programs can be checked in seconds.
+
+    import coda_kids.turtle as turtle
+
+    turtle.forward(100);
+    turtle.left(90);
+    turtle.done();
+
+    # checking a student's program
+    path = coda.turtle.run_script("TurtleMap.py");
+    (matches, distance) = path.compare(REFERENCE);
+"""
+import math
+import os
+import runpy
+import sys
+
+import pygame
+
+class Path:
+    """
+    A recorded drawing: lines of (x, y) points in turtle coordinates, where
+    (0, 0) is the middle of the screen and y goes up.
+
+        path = coda.turtle.Path([[(0, 0), (100, 0)]]);
+    """
+    def __init__(self, lines=None, end=None):
+        self.lines = [list(line) for line in lines if line] if lines else []
+        if end is None:
+            end = self.lines[-1][-1] if self.lines else (0, 0)
+        self.end = end
+
+    def segments(self):
+        """Returns every ((x1, y1), (x2, y2)) segment in the drawing."""
+        for line in self.lines:
+            for i in range(1, len(line)):
+                yield (line[i - 1], line[i])
+
+    def length(self):
+        """Returns how far the pen travelled while drawing."""
+        return sum(math.hypot(b[0] - a[0], b[1] - a[1]) for (a, b) in self.segments())
+
+    def points(self, spacing):
+        """Internal helper that returns points every spacing pixels along the drawing."""
+        points = []
+        for (a, b) in self.segments():
+            distance = math.hypot(b[0] - a[0], b[1] - a[1])
+            steps = max(1, int(distance // spacing))
+            for i in range(steps):
+                points.append((a[0] + (b[0] - a[0]) * i / steps, a[1] + (b[1] - a[1]) * i / steps))
+            points.append(b)
+        return points
+
+    def distance_to(self, point):
+        """Returns how far a point is from the nearest part of the drawing."""
+        best = math.inf
+        for (a, b) in self.segments():
+            best = min(best, _segment_distance(point, a, b))
+        return best
+
+    def compare(self, reference, tolerance=5, spacing=5):
+        """
+        Checks if this drawing follows the reference route. Returns (matches, distance)
+        where distance is the furthest either route strays from the other, and matches
+        is True when that and the distance between end points are within tolerance.
+
+            (matches, distance) = path.compare(REFERENCE, 5);
+        """
+        if not isinstance(reference, Path):
+            reference = Path([reference])
+        if not self.lines or not reference.lines:
+            return (not self.lines and not reference.lines, 0 if not self.lines else math.inf)
+
+        distance = 0
+        for point in self.points(spacing):
+            distance = max(distance, reference.distance_to(point))
+        for point in reference.points(spacing):
+            distance = max(distance, self.distance_to(point))
+        end_distance = math.hypot(self.end[0] - reference.end[0], self.end[1] - reference.end[1])
+        return (distance <= tolerance and end_distance <= tolerance, distance)
+
+    def render(self, surface=None, size=(1280, 800), color=(0, 0, 0), width=3, background=None):
+        """
+        Draws the whole path onto a surface in one pass and returns it. Works
+        without a window, so it can be saved with pygame.image.save.
+
+            image = path.render();
+        """
+        if surface is None:
+            surface = pygame.Surface(size)
+            surface.fill((255, 255, 255))
+        if background is not None:
+            surface.blit(background, background.get_rect(center=surface.get_rect().center))
+        (center_x, center_y) = (surface.get_width() / 2, surface.get_height() / 2)
+        for line in self.lines:
+            points = [(center_x + x, center_y - y) for (x, y) in line]
+            if len(points) > 1:
+                pygame.draw.lines(surface, color, False, points, width)
+        return surface
+
+def _segment_distance(point, a, b):
+    """Internal helper that returns the distance from a point to a line segment."""
+    (dx, dy) = (b[0] - a[0], b[1] - a[1])
+    length = dx * dx + dy * dy
+    if length == 0:
+        return math.hypot(point[0] - a[0], point[1] - a[1])
+    t = max(0, min(1, ((point[0] - a[0]) * dx + (point[1] - a[1]) * dy) / length))
+    return math.hypot(point[0] - (a[0] + t * dx), point[1] - (a[1] + t * dy))
+
+class Turtle:
+    """
+    A turtle that records where it goes instead of animating it.
+
+        car = coda.turtle.Turtle();
+        car.forward(100);
+    """
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+        self.heading = 0
+        self.drawing = True
+        self.lines = []
+        self.line = None
+        self.straight = False
+
+    def move_to(self, x, y):
+        """Internal helper that moves the turtle, adding to the path if the pen is down."""
+        # round away floating point noise so right angles stay exact.
+        (x, y) = (round(x, 6), round(y, 6))
+        if self.drawing and (x, y) != (self.x, self.y):
+            if self.line is None:
+                self.line = [(self.x, self.y)]
+                self.lines.append(self.line)
+                self.straight = False
+            if self.straight:
+                # still going the same way, so stretch the last segment.
+                self.line[-1] = (x, y)
+            else:
+                self.line.append((x, y))
+            self.straight = True
+        self.x = x
+        self.y = y
+
+    def forward(self, distance):
+        """Moves forward by distance pixels."""
+        angle = math.radians(self.heading)
+        self.move_to(self.x + distance * math.cos(angle), self.y + distance * math.sin(angle))
+
+    def back(self, distance):
+        """Moves backward by distance pixels."""
+        self.forward(-distance)
+
+    def left(self, angle):
+        """Turns left by angle degrees."""
+        self.setheading(self.heading + angle)
+
+    def right(self, angle):
+        """Turns right by angle degrees."""
+        self.setheading(self.heading - angle)
+
+    def setheading(self, angle):
+        """Points the turtle at angle degrees, where 0 is to the right."""
+        angle %= 360
+        if angle != self.heading:
+            self.heading = angle
+            self.straight = False
+
+    def goto(self, x, y=None):
+        """Moves straight to a location."""
+        if y is None:
+            (x, y) = x
+        self.straight = False
+        self.move_to(x, y)
+        self.straight = False
+
+    def setx(self, x):
+        """Moves to a new x location."""
+        self.goto(x, self.y)
+
+    def sety(self, y):
+        """Moves to a new y location."""
+        self.goto(self.x, y)
+
+    def position(self):
+        """Returns the turtle's location."""
+        return (self.x, self.y)
+
+    def penup(self):
+        """Stops drawing when moving."""
+        self.drawing = False
+        self.line = None
+
+    def pendown(self):
+        """Starts drawing when moving."""
+        self.drawing = True
+
+    def path(self):
+        """Returns what the turtle has drawn so far as a Path."""
+        return Path(self.lines, (self.x, self.y))
+
+class _Screen:
+    """Internal helper that remembers the screen settings so done can show the drawing with them."""
+    def __init__(self):
+        self.size = (1280, 800)
+        self.picture = None
+        self.caption = "Turtle"
+
+    def title(self, text):
+        """Sets the window title."""
+        self.caption = text
+
+    def setup(self, width, height):
+        """Sets the window size."""
+        self.size = (int(width), int(height))
+
+    def bgpic(self, filename):
+        """Sets the background picture."""
+        self.picture = filename
+
+    def register_shape(self, name, shape=None):
+        """Accepted for turtle compatibility. Shapes aren't drawn."""
+        return
+
+_turtle = Turtle()
+_screen = _Screen()
+
+def Screen():
+    """
+    Stands in for turtle.Screen. Like turtle, there is only one screen.
+
+        SCREEN = turtle.Screen();
+    """
+    return _screen
+
+def headless():
+    """
+    Checks if there is no screen to show the drawing on. Set the environment
+    variable CODA_TURTLE_HEADLESS, or SDL_VIDEODRIVER to dummy, to turn it on.
+    """
+    return bool(os.environ.get('CODA_TURTLE_HEADLESS')) or os.environ.get('SDL_VIDEODRIVER') == 'dummy'
+
+def reset():
+    """Starts a new drawing with a fresh turtle and screen."""
+    global _turtle, _screen
+    _turtle = Turtle()
+    _screen = _Screen()
+
+def forward(distance):
+    """
+    Moves the turtle forward.
+
+        turtle.forward(100);
+    """
+    _turtle.forward(distance)
+
+def back(distance):
+    """
+    Moves the turtle backward.
+
+        turtle.back(100);
+    """
+    _turtle.back(distance)
+
+def left(angle):
+    """
+    Turns the turtle left.
+
+        turtle.left(90);
+    """
+    _turtle.left(angle)
+
+def right(angle):
+    """
+    Turns the turtle right.
+
+        turtle.right(90);
+    """
+    _turtle.right(angle)
+
+def setheading(angle):
+    """
+    Points the turtle in a direction.
+
+        turtle.setheading(90);
+    """
+    _turtle.setheading(angle)
+
+def goto(x, y=None):
+    """
+    Moves the turtle to a location.
+
+        turtle.goto(0, 0);
+    """
+    _turtle.goto(x, y)
+
+def setx(x):
+    """
+    Moves the turtle to a new x location.
+
+        turtle.setx(460);
+    """
+    _turtle.setx(x)
+
+def sety(y):
+    """
+    Moves the turtle to a new y location.
+
+        turtle.sety(-275);
+    """
+    _turtle.sety(y)
+
+def position():
+    """Returns the turtle's location."""
+    return _turtle.position()
+
+def penup():
+    """
+    Lifts the pen so moving doesn't draw.
+
+        turtle.penup();
+    """
+    _turtle.penup()
+
+def pendown():
+    """
+    Puts the pen down so moving draws.
+
+        turtle.pendown();
+    """
+    _turtle.pendown()
+
+def shape(name=None):
+    """Accepted for turtle compatibility. Shapes aren't drawn."""
+    return
+
+def speed(value=None):
+    """Accepted for turtle compatibility. Drawing is always instant."""
+    return
+
+def path():
+    """
+    Returns what the turtle has drawn so far.
+
+        route = turtle.path();
+    """
+    return _turtle.path()
+
+def render(surface=None):
+    """
+    Draws everything the turtle has drawn onto a surface, on top of the
+    screen's background picture if it has one.
+
+        image = turtle.render();
+    """
+    background = None
+    if _screen.picture is not None and os.path.exists(_screen.picture):
+        background = pygame.image.load(_screen.picture)
+    return _turtle.path().render(surface, _screen.size, background=background)
+
+def done():
+    """
+    Shows the drawing in a window until it is closed. Returns right away when headless.
+
+        turtle.done();
+    """
+    if headless():
+        return
+    pygame.init()
+    window = pygame.display.set_mode(_screen.size)
+    pygame.display.set_caption(_screen.caption)
+    render(window)
+    pygame.display.flip()
+    while pygame.event.wait().type != pygame.QUIT:
+        pass
+    pygame.quit()
+
+mainloop = done
+
+def run_script(filename):
+    """
+    Runs a turtle program with this module standing in for turtle, without a
+    window, and returns the Path it drew.
+
+        path = coda.turtle.run_script("students/alex/TurtleMap.py");
+    """
+    reset()
+    saved_turtle = sys.modules.get('turtle')
+    saved_headless = os.environ.get('CODA_TURTLE_HEADLESS')
+    saved_folder = os.getcwd()
+    sys.modules['turtle'] = sys.modules[__name__]
+    os.environ['CODA_TURTLE_HEADLESS'] = '1'
+    try:
+        os.chdir(os.path.dirname(os.path.abspath(filename)))
+        runpy.run_path(os.path.basename(filename), run_name='__main__')
+    finally:
+        os.chdir(saved_folder)
+        if saved_turtle is None:
+            del sys.modules['turtle']
+        else:
+            sys.modules['turtle'] = saved_turtle
+        if saved_headless is None:
+            del os.environ['CODA_TURTLE_HEADLESS']
+        else:
+            os.environ['CODA_TURTLE_HEADLESS'] = saved_headless
+    return path()
@@ -4,6 +4,7 @@ import time
 import math
 import random
 
+import pygame
 import framework.coda_kids
 
 def read_file(filename):
@@ -34,9 +35,23 @@ def near(num, near_value):
     return min < num < max
 
 class OutputConsole:
-    """Class that displays strings in a console."""
+    """
+    Class that displays strings in a console. The strings are kept in a ring
+    buffer and each one is rendered once when written. The visible lines are
+    kept on one surface that scrolls by a line when a new string arrives, so
+    drawing is a single blit no matter how many lines the console holds.
+
+        console = OutputConsole((10, 10), 200, 16, coda.color.WHITE);
+        console.write("hello");
+        console.draw(SCREEN);
+    """
     def __init__(self, location, num_of_lines, font_size, color):
-        self.strings = []
+        self.strings = [None] * num_of_lines
+        self.surfaces = [None] * num_of_lines
+        self.first = 0
+        self.count = 0
+        self.block = None
+        self.block_width = 1
         self.text = framework.coda_kids.TextObject(color, font_size, "")
         self.location = location
         self.lines = num_of_lines
@@ -50,41 +65,70 @@ class OutputConsole:
         elif name == "font_size":
             self.__dict__[name] = value
             self.text.font_size = value
+            self.__dict__["block"] = None
+        elif name in ("color", "decending"):
+            self.__dict__[name] = value
+            self.__dict__["block"] = None
         else:
             self.__dict__[name] = value
 
     def write(self, string):
         """Appends a string to the given console."""
-        if len(self.strings) < self.lines:
-            self.strings.append(string)
+        surface = self.text.font.render(string, 1, self.color)
+        full = self.count == self.lines
+        if full:
+            slot = self.first
+            self.first = (self.first + 1) % self.lines
+        else:
+            slot = (self.first + self.count) % self.lines
+            self.count += 1
+        self.strings[slot] = string
+        self.surfaces[slot] = surface
+
+        if self.block is None:
+            return
+        if surface.get_width() > self.block.get_width():
+            # grow by doubling so a few long lines don't rebuild every time.
+            self.block_width = max(surface.get_width(), 2 * self.block.get_width())
+            self.block = None
+            return
+
+        offset = self.font_size
+        if self.decending:
+            if full:
+                self.block.scroll(0, -offset)
+            row = self.count - 1
         else:
-            i = 1
-            while i < self.lines:
-                self.strings[i - 1] = self.strings[i]
-                i += 1
-            self.strings[self.lines - 1] = string
+            self.block.scroll(0, offset)
+            row = 0
+        self.block.fill((0, 0, 0, 0), (0, row * offset, self.block.get_width(), offset))
+        self.block.blit(surface, (0, row * offset))
 
     def clear(self):
         """Clears the console."""
-        del self.strings[:]
+        self.first = 0
+        self.count = 0
+        for i in range(self.lines):
+            self.strings[i] = None
+            self.surfaces[i] = None
+        if self.block is not None:
+            self.block.fill((0, 0, 0, 0))
 
-    def draw(self, screen):
-        """Draws the console strings to the screen"""
-        def_loc = self.location
-        string_num = 0
+    def rebuild(self):
+        """Internal helper that renders every line again onto a new block."""
         offset = self.font_size
+        order = [(self.first + i) % self.lines for i in range(self.count)]
+        for slot in order:
+            self.surfaces[slot] = self.text.font.render(self.strings[slot], 1, self.color)
+            self.block_width = max(self.block_width, self.surfaces[slot].get_width())
 
-        if self.decending:
-            for string in self.strings:
-                loc = framework.coda_kids.Vector2(def_loc.x, def_loc.y + string_num * offset)
-                self.text.location = loc
-                self.text.text = string
-                self.text.draw(screen)
-                string_num += 1
-        else:
-            for string in reversed(self.strings):
-                loc = framework.coda_kids.Vector2(def_loc.x, def_loc.y + string_num * offset)
-                self.text.location = loc
-                self.text.text = string
-                self.text.draw(screen)
-                string_num += 1
+        self.block = pygame.Surface((self.block_width, self.lines * offset), pygame.SRCALPHA)
+        for (string_num, slot) in enumerate(order):
+            row = string_num if self.decending else self.count - 1 - string_num
+            self.block.blit(self.surfaces[slot], (0, row * offset))
+
+    def draw(self, screen):
+        """Draws the console strings to the screen"""
+        if self.block is None:
+            self.rebuild()
+        screen.blit(self.block, self.location)
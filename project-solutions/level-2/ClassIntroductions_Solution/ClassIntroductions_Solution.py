@@ -1,6 +1,5 @@
 import pygame #Gives us our gaming methods
 from os import path
-import textwrap
 
 """Initialize Font Object"""
 #We pick our text style and size.
@@ -12,13 +11,48 @@ def get_file(fileName):
     #This grabs the image files from your folder.
     return path.join(path.dirname(__file__), fileName)
 
+TEXT_LAYOUTS = {} #Paragraphs we already drew, so we never draw them twice.
+
+def wrap_text(text, font, width):
+    """Splits text into lines that fit in width pixels"""
+    #We measure each line with the font, because a "W" is wider than an "i".
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split():
+            test_line = word if line == "" else line + " " + word
+            if font.size(test_line)[0] <= width:
+                line = test_line
+                continue
+            if line != "":
+                lines.append(line)
+            line = word
+            #A word wider than the whole box is broken up letter by letter.
+            while font.size(line)[0] > width and len(line) > 1:
+                cut = 1
+                while cut < len(line) - 1 and font.size(line[:cut + 1])[0] <= width:
+                    cut = cut + 1
+                lines.append(line[:cut])
+                line = line[cut:]
+        #An empty paragraph stays as a blank line, so breaks between paragraphs show.
+        lines.append(line)
+    return lines
+
+def layout_text(text, font, width, color):
+    """Draws a paragraph onto its own surface once and saves it"""
+    key = (text, font, width, tuple(color))
+    if key not in TEXT_LAYOUTS:
+        lines = wrap_text(text, font, width)
+        surface = pygame.Surface((width, max(1, len(lines)) * 30), pygame.SRCALPHA)
+        for i in range(len(lines)):
+            if lines[i] != "":
+                surface.blit(font.render(lines[i], True, color), (0, i * 30))
+        TEXT_LAYOUTS[key] = surface
+    return TEXT_LAYOUTS[key]
+
 def display_text(screen, current_text):
     """Displays text to the screen"""
-    WRAPPED_TEXT = textwrap.wrap(current_text, 30)
-    y = 230
-    for i in range(len(WRAPPED_TEXT)):
-        screen.blit(myfont.render(WRAPPED_TEXT[i], True, (0, 0, 0)), (230,y))
-        y = y + 30
+    screen.blit(layout_text(current_text, myfont, 300, (0, 0, 0)), (230,230))
 
 """Loads the background and images"""
 background = pygame.image.load(get_file("assets/Background.png"))
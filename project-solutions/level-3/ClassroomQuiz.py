@@ -100,15 +100,19 @@ display_intro_screen() #Gets the screen ready.
 running = False
 while running == False: 
     #We're waiting for the player to click "Click here to start the game."
-    EVENTS = pygame.event.get()
+    #pygame.event.wait() sleeps until something happens, so the computer can rest.
+    EVENTS = [pygame.event.wait()]
     for event in EVENTS:
         mpos = pygame.mouse.get_pos()
         if event.type == pygame.MOUSEBUTTONDOWN:
             if sample_click_rect.collidepoint(mpos):
                 running = True
+shown_question = None
 while running:
-    display_question() #Displays the new question and the three answer choices.
-    EVENTS = pygame.event.get()
+    if shown_question != i: #We only draw the question again when it changes.
+        display_question() #Displays the new question and the three answer choices.
+        shown_question = i
+    EVENTS = [pygame.event.wait()]
     for event in EVENTS:
         mpos = pygame.mouse.get_pos() 
         if event.type == pygame.MOUSEBUTTONDOWN: #If the player clicks the mouse.
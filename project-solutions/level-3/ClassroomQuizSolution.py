@@ -1,6 +1,5 @@
 import pygame
 import random
-import time
 from os import path
 
 """Initialize Font Objects"""
@@ -29,21 +28,55 @@ def randomize_answers(answerChoices):
     return answerChoices
 
 def display_question():
-    #This code loads and displays the next question and Mrs. Codala's reaction.
-    question_text = myfont.render(question, True, (0, 0, 0))
-    question_rect = question_text.get_rect(topleft=(200,150))
-    answer_1_text = myfont.render(ANSWER_CHOICES[0], True, (0, 0, 0))
-    answer_1_rect = answer_1_text.get_rect(topleft=(200,230))
-    answer_2_text = myfont.render(ANSWER_CHOICES[1], True, (0, 0, 0))
-    answer_2_rect = answer_2_text.get_rect(topleft=(200,300))
-    answer_3_text = myfont.render(ANSWER_CHOICES[2], True, (0, 0, 0))
-    answer_3_rect = answer_3_text.get_rect(topleft=(200,370))
-    screen.blit(background, (0,0))
-    screen.blit(question_text, question_rect)
-    screen.blit(answer_1_text, answer_1_rect)
-    screen.blit(answer_2_text, answer_2_rect)
-    screen.blit(answer_3_text, answer_3_rect)
+    #This code loads and displays the next question.
+    #Each question screen is drawn once and saved, so showing it again is a single blit.
+    if i not in QUESTION_SCREENS:
+        question_screen = pygame.Surface((width, height))
+        question_text = myfont.render(question, True, (0, 0, 0))
+        question_rect = question_text.get_rect(topleft=(200,150))
+        answer_1_text = myfont.render(ANSWER_CHOICES[0], True, (0, 0, 0))
+        answer_1_rect = answer_1_text.get_rect(topleft=(200,230))
+        answer_2_text = myfont.render(ANSWER_CHOICES[1], True, (0, 0, 0))
+        answer_2_rect = answer_2_text.get_rect(topleft=(200,300))
+        answer_3_text = myfont.render(ANSWER_CHOICES[2], True, (0, 0, 0))
+        answer_3_rect = answer_3_text.get_rect(topleft=(200,370))
+        question_screen.blit(background, (0,0))
+        question_screen.blit(question_text, question_rect)
+        question_screen.blit(answer_1_text, answer_1_rect)
+        question_screen.blit(answer_2_text, answer_2_rect)
+        question_screen.blit(answer_3_text, answer_3_rect)
+        QUESTION_SCREENS[i] = question_screen
+    screen.blit(QUESTION_SCREENS[i], (0,0))
+    pygame.display.update()
+
+def display_answer(choice, correct_image, incorrect_image):
+    #This shows Mrs. Codala's reaction and starts a 5 second timer instead of
+    #freezing the game with time.sleep, so the window keeps working.
+    if ANSWER_CHOICES[choice] == answer: #If it's the correct answer.
+        screen.blit(correct_text,(300,0))
+        screen.blit(correct_image, (0,0))
+    else: #If it's an incorrect answer.
+        screen.blit(incorrect_text,(300,0))
+        screen.blit(incorrect_image, (0,0))
     pygame.display.update()
+    pygame.time.set_timer(TIMER_DONE, 5000)
+
+def next_question():
+    #This moves on to the next question, or shows the end screen after the last one.
+    global i, question, answer, ANSWER_CHOICES
+    if i >= (number_of_questions * 4)-4: #If it's the last question.
+        display_end_screen()
+        pygame.time.set_timer(TIMER_DONE, 5000)
+        return False
+    i = i+4
+    question = TRIVIA[i]
+    answer = TRIVIA[i+1]
+    wrong_choice_1 = TRIVIA[i+2]
+    wrong_choice_2 = TRIVIA[i+3]
+    ANSWER_CHOICES = [answer, wrong_choice_1, wrong_choice_2]
+    randomize_answers(ANSWER_CHOICES)
+    display_question()
+    return True
 
 def display_intro_screen():
     #This shows the intro text (so we only run it once, at the beginning).
@@ -100,127 +133,38 @@ display_intro_screen() #Gets the screen ready.
 running = False
 while running == False: 
     #We're waiting for the player to click "Click here to start the game."
-    EVENTS = pygame.event.get()
+    #pygame.event.wait() sleeps until something happens, so the computer can rest.
+    EVENTS = [pygame.event.wait()]
     for event in EVENTS:
         mpos = pygame.mouse.get_pos()
         if event.type == pygame.MOUSEBUTTONDOWN:
             if sample_click_rect.collidepoint(mpos):
                 running = True
+#The timer event tells us when Mrs. Codala's reaction has been up long enough.
+TIMER_DONE = pygame.USEREVENT
+QUESTION_SCREENS = {}
+answering = True #False while the reaction or end screen is showing.
+game_over = False
+display_question() #Displays the first question and the three answer choices.
 while running:
-    display_question() #Displays the new question and the three answer choices.
-    EVENTS = pygame.event.get()
-    for event in EVENTS:
-        mpos = pygame.mouse.get_pos() 
-        if event.type == pygame.MOUSEBUTTONDOWN: #If the player clicks the mouse.
-            if answer_1_rect.collidepoint(mpos): #If the player clicks the first answer on the top.
-                if ANSWER_CHOICES[0] == answer: #If it's the correct answer.
-                    screen.blit(correct_text,(300,0))
-                    kodala = correct_a
-                    screen.blit(kodala, (0,0))
-                    pygame.display.update()
-                    time.sleep(5)
-                    if i >= (number_of_questions * 4)-4: #If it's the last question.
-                        display_end_screen()
-                        time.sleep(5)
-                        running = False
-                    else: #If it's the not the last question, we display the next question.
-                        i = i+4
-                        question = TRIVIA[i]
-                        answer = TRIVIA[i+1]
-                        wrong_choice_1 = TRIVIA[i+2]
-                        wrong_choice_2 = TRIVIA[i+3]
-                        ANSWER_CHOICES = [answer, wrong_choice_1, wrong_choice_2]
-                        randomize_answers(ANSWER_CHOICES)
-                else: #If it's an incorrect answer.
-                    screen.blit(incorrect_text,(300,0))
-                    kodala = incorrect_a
-                    screen.blit(kodala, (0,0))
-                    pygame.display.update()
-                    time.sleep(5)
-                    if i >= (number_of_questions * 4)-4: #If it's the last question.
-                        display_end_screen()
-                        time.sleep(5)
-                        running = False
-                    else: #If it's the not the last question, we display the next question.
-                        i = i+4
-                        question = TRIVIA[i]
-                        answer = TRIVIA[i+1]
-                        wrong_choice_1 = TRIVIA[i+2]
-                        wrong_choice_2 = TRIVIA[i+3]
-                        ANSWER_CHOICES = [answer, wrong_choice_1, wrong_choice_2]
-                        randomize_answers(ANSWER_CHOICES)
-            if answer_2_rect.collidepoint(mpos): #If the player clicks the second answer.
-                if ANSWER_CHOICES[1] == answer: #If it's the correct answer.
-                    screen.blit(correct_text,(300,0))
-                    kodala = correct_b
-                    screen.blit(kodala, (0,0))
-                    pygame.display.update()
-                    time.sleep(5)
-                    if i >= (number_of_questions * 4)-4: #If it's the last question.
-                        display_end_screen()
-                        time.sleep(5)
-                        running = False
-                    #Copy from the book to move to the next question.
-                    else: #If it's the not the last question, we display the next question.
-                        i = i+4
-                        question = TRIVIA[i]
-                        answer = TRIVIA[i+1]
-                        wrong_choice_1 = TRIVIA[i+2]
-                        wrong_choice_2 = TRIVIA[i+3]
-                        ANSWER_CHOICES = [answer, wrong_choice_1, wrong_choice_2]
-                        randomize_answers(ANSWER_CHOICES)
-                else: #If it's an incorrect answer.
-                    screen.blit(incorrect_text,(300,0))
-                    kodala = incorrect_b
-                    screen.blit(kodala,(0,0))
-                    pygame.display.update()
-                    time.sleep(5)
-                    if i >= (number_of_questions * 4)-4: #If it's the last question.
-                        display_end_screen()
-                        time.sleep(5)
-                        running = False
-                    #Copy from the book to move to the next question.
-                    else: #If it's the not the last question, we display the next question.
-                        i = i+4
-                        question = TRIVIA[i]
-                        answer = TRIVIA[i+1]
-                        wrong_choice_1 = TRIVIA[i+2]
-                        wrong_choice_2 = TRIVIA[i+3]
-                        ANSWER_CHOICES = [answer, wrong_choice_1, wrong_choice_2]
-                        randomize_answers(ANSWER_CHOICES)
-            if answer_3_rect.collidepoint(mpos): #If the player clicks the third answer.
-                if ANSWER_CHOICES[2] == answer: #If it's the correct answer.
-                    screen.blit(correct_text,(300,0))
-                    kodala = correct_a
-                    screen.blit(kodala, (0,0))
-                    pygame.display.update()
-                    time.sleep(5)
-                    if i >= (number_of_questions * 4)-4: #If it's the last question.
-                        display_end_screen()
-                        time.sleep(5)
-                        running = False
-                    else: #If it's the not the last question, we display the next question.
-                        i = i+4
-                        question = TRIVIA[i]
-                        answer = TRIVIA[i+1]
-                        wrong_choice_1 = TRIVIA[i+2]
-                        wrong_choice_2 = TRIVIA[i+3]
-                        ANSWER_CHOICES = [answer, wrong_choice_1, wrong_choice_2]
-                        randomize_answers(ANSWER_CHOICES)
-                else: #If it's an incorrect answer.
-                    screen.blit(incorrect_text,(300,0))
-                    kodala = incorrect_a
-                    screen.blit(kodala, (0,0))
-                    pygame.display.update()
-                    time.sleep(5)
-                    if i >= (number_of_questions * 4)-4: #If it's the last question.
-                        display_end_screen()
-                        running = False
-                    else: #If it's the not the last question, we display the next question.
-                        i = i+4
-                        question = TRIVIA[i]
-                        answer = TRIVIA[i+1]
-                        wrong_choice_1 = TRIVIA[i+2]
-                        wrong_choice_2 = TRIVIA[i+3]
-                        ANSWER_CHOICES = [answer, wrong_choice_1, wrong_choice_2]
-                        randomize_answers(ANSWER_CHOICES)
+    event = pygame.event.wait() #Sleeps until the player does something or the timer runs out.
+    if event.type == pygame.QUIT:
+        running = False
+    elif event.type == TIMER_DONE:
+        pygame.time.set_timer(TIMER_DONE, 0) #Stops the timer so it only fires once.
+        if game_over:
+            running = False
+        else:
+            answering = next_question()
+            game_over = not answering
+    elif event.type == pygame.MOUSEBUTTONDOWN and answering: #If the player clicks the mouse.
+        mpos = event.pos
+        if answer_1_rect.collidepoint(mpos): #If the player clicks the first answer on the top.
+            display_answer(0, correct_a, incorrect_a)
+            answering = False
+        elif answer_2_rect.collidepoint(mpos): #If the player clicks the second answer.
+            display_answer(1, correct_b, incorrect_b)
+            answering = False
+        elif answer_3_rect.collidepoint(mpos): #If the player clicks the third answer.
+            display_answer(2, correct_a, incorrect_a)
+            answering = False
@@ -54,6 +54,9 @@ def update(delta_time):
     # Updates asteroid objects on screen
     update_asteroids(delta_time)
 
+    # Checks for hits between ships, bullets and asteroids
+    check_collisions()
+
     # Check win condition
     check_win()   
 
@@ -6,6 +6,7 @@ import sys
 import math
 import time
 import random
+import collections
 from os import path
 
 #Global color values
@@ -148,7 +149,7 @@ class Image:
         else:
             self.data = None
 
-    def update(self, dt):
+    def update(self, dt, owner=None):
         return
 
     def surface(self):
@@ -177,6 +178,7 @@ class SpriteSheet:
         rect.width = frame_size[0]
         rect.height = frame_size[1]
         self.rectangle = rect
+        self.images = None
 
     def image_at(self, index):
         """
@@ -202,34 +204,149 @@ class SpriteSheet:
         """
         return self.columns * self.rows
 
-class Animator:
-    """Animator class for animation functions"""
-    def __init__(self, sheet, duration_seconds):
+    def frames(self):
+        """
+        Returns every frame of the sheet as a list of images. They are cut out
+        the first time and shared after that.
+
+            frames = sheet.frames();
+        """
+        if self.images is None:
+            self.images = [self.image_at(i) for i in range(int(self.num_frames()))]
+        return self.images
+
+class Clip:
+    """
+    The frames and timing of an animation. A clip is cut from its sprite sheet
+    once and never changes, so any number of objects can share it, each playing
+    it with its own Animator.
+
+        RUN = Clip(SpriteSheet("run.png", (64, 64)), 1);
+        player.sprite = Animator(RUN);
+    """
+    def __init__(self, sheet, duration_seconds, looping=True, num_frames=None):
         self.sheet = sheet
-        self.frame_num = 0
+        self.frames = sheet.frames()[:num_frames]
+        self.num_frames = len(self.frames)
+        self.duration = duration_seconds
+        self.transition = duration_seconds / self.num_frames
+        self.looping = looping
 
-        self.frame_time = 0.0
+    def frame_number(self, elapsed):
+        """Returns which frame shows after playing for elapsed seconds."""
+        frame_num = int(elapsed / self.transition)
+        if self.looping:
+            return frame_num % self.num_frames
+        return min(frame_num, self.num_frames - 1)
 
+class Animator:
+    """
+    Plays a Clip. An animator only keeps track of how far it has played, so the
+    frame to show is worked out from that instead of stepped through. Objects
+    sharing an animator show the same frame, and it moves along once a frame
+    however many of them update it. Give each object its own Animator of a
+    shared Clip to play them separately.
+
+        anim = Animator(sheet, 0.4);
+        obj.sprite = anim;
+    """
+    def __init__(self, sheet, duration_seconds=None, looping=True):
+        if isinstance(sheet, Clip):
+            self.clip = sheet
+        else:
+            self.clip = Clip(sheet, duration_seconds, looping)
+        self.elapsed = 0.0
         self.playing = True
         self.playspeed = 1.0
-        self.looping = True
+        self.shown = None
+        self.updated_by = set()
 
-        self.reset()
+    @property
+    def sheet(self):
+        return self.clip.sheet
+
+    @sheet.setter
+    def sheet(self, sheet):
+        self.clip = Clip(sheet, self.clip.duration, self.clip.looping)
+
+    @property
+    def duration(self):
+        return self.clip.duration
+
+    @duration.setter
+    def duration(self, duration_seconds):
         self.set_duration(duration_seconds)
-    
+
+    @property
+    def transition(self):
+        return self.clip.transition
+
+    @transition.setter
+    def transition(self, seconds):
+        self.set_duration(seconds * self.clip.num_frames)
+
+    @property
+    def looping(self):
+        return self.clip.looping
+
+    @looping.setter
+    def looping(self, looping):
+        self.clip = Clip(self.clip.sheet, self.clip.duration, looping, self.clip.num_frames)
+
+    @property
+    def num_frames(self):
+        return self.clip.num_frames
+
+    @num_frames.setter
+    def num_frames(self, num_frames):
+        self.clip = Clip(self.clip.sheet, self.clip.duration, self.clip.looping, int(num_frames))
+
+    @property
+    def frame_num(self):
+        return self.clip.frame_number(self.elapsed)
+
+    @frame_num.setter
+    def frame_num(self, frame_num):
+        self.elapsed = frame_num * self.clip.transition
+
+    @property
+    def frame_time(self):
+        return self.elapsed - self.frame_num * self.clip.transition
+
+    @frame_time.setter
+    def frame_time(self, seconds):
+        self.elapsed = self.frame_num * self.clip.transition + seconds
+
+    @property
+    def current(self):
+        # an image set from outside the clip shows until the next frame.
+        if self.shown is not None and self.shown[0] == self.frame_num:
+            return self.shown[1]
+        return self.clip.frames[self.frame_num]
+
+    @current.setter
+    def current(self, image):
+        self.shown = (self.frame_num, image)
+
+    def copy(self):
+        """Returns a new animator for the same clip, starting from the beginning."""
+        anim = Animator(self.clip)
+        anim.playspeed = self.playspeed
+        return anim
+
     def set_duration(self, duration_seconds):
-        self.duration = duration_seconds
-        self.transition = self.duration / self.num_frames
-    
+        self.clip = Clip(self.clip.sheet, duration_seconds, self.clip.looping, self.clip.num_frames)
+
     def use_anim(self, sheet):
-        self.sheet = sheet
+        if isinstance(sheet, Clip):
+            self.clip = sheet
+        else:
+            self.clip = Clip(sheet, self.clip.duration, self.clip.looping)
         self.reset()
 
     def reset(self):
-        self.frame_num = 0
-        self.current = self.sheet.image_at(self.frame_num)
-        self.frame_time = 0
-        self.num_frames = self.sheet.num_frames()
+        self.elapsed = 0.0
+        self.shown = None
 
     def play(self, playspeed=1.0):
         self.playspeed = playspeed
@@ -242,26 +359,56 @@ class Animator:
     def unpause(self):
         self.playing = True
 
-    def update(self, dt):
-        dt = dt * self.playspeed
+    def update(self, dt, owner=None):
+        # objects pass themselves as owner. When a second object updates the
+        # animator in the same frame it has already moved, so it is left alone.
+        if owner is not None:
+            if id(owner) in self.updated_by:
+                self.updated_by.clear()
+            elif self.updated_by:
+                self.updated_by.add(id(owner))
+                return
+            self.updated_by.add(id(owner))
 
         if self.playing:
-            self.frame_time += dt
+            self.elapsed += dt * self.playspeed
+            if self.clip.looping:
+                self.elapsed %= self.clip.duration
+            elif self.elapsed >= self.clip.duration:
+                self.playing = False
 
-            if self.frame_time >= self.transition:
-                self.frame_time -= self.transition
-                self.frame_num += 1
+    def surface(self):
+        return self.current.surface()
 
-                if self.looping:
-                    self.frame_num %= self.num_frames
+# every collision layer, the default mask of an object
+ALL_LAYERS = -1
 
-                self.current = self.sheet.image_at(self.frame_num)
+# collision masks by (frame, rotation step, scale). The least recently used
+# ones are dropped once there are more than MASK_CACHE_SIZE.
+MASK_CACHE_SIZE = 512
+MASK_ROTATION_STEP = 5
+_masks = collections.OrderedDict()
 
-                if self.frame_num >= self.num_frames:
-                    self.playing = False
+def get_mask(surface, rotation, scale):
+    """
+    Returns the collision mask of a surface rotated and scaled the way objects
+    draw it. The rotation is rounded to MASK_ROTATION_STEP degrees so close
+    angles share a mask.
 
-    def surface(self):
-        return self.current.surface()
+        mask = get_mask(obj.sprite.surface(), obj.rotation, obj.scale);
+    """
+    step = int(round(rotation / MASK_ROTATION_STEP)) % (360 // MASK_ROTATION_STEP)
+    key = (surface, step, scale)
+    mask = _masks.get(key)
+    if mask is None:
+        rotated = pygame.transform.rotozoom(surface, step * MASK_ROTATION_STEP, scale)
+        mask = pygame.mask.from_surface(rotated)
+        _masks[key] = mask
+        if len(_masks) > MASK_CACHE_SIZE:
+            _masks.popitem(last=False)
+    else:
+        _masks.move_to_end(key)
+    return mask
 
 class Object:
     """
@@ -272,6 +419,11 @@ class Object:
     location = pygame.math.Vector2(0, 0)
     scale = 1
     velocity = pygame.math.Vector2(0, 0)
+    fast = False
+    swept = None
+    collision_layer = 0
+    collision_mask = ALL_LAYERS
+    collision_active_only = False
 
     def __init__(self, image):
         self.sprite = image
@@ -363,13 +515,31 @@ class Object:
         self.velocity = pygame.math.Vector2(-1 * math.cos(math.radians(degrees - 90)) * speed,
                                 math.sin(math.radians(degrees - 90)) * speed)
 
-    def collides_with(self, other_obj):
+    def get_mask(self):
+        """
+        Returns the object's collision mask for its current frame, rotation and scale.
+
+            mask = obj.get_mask();
         """
-        Check if this object collides with the given object.
+        return get_mask(self.sprite.surface(), self.rotation, self.scale)
+
+    def collides_with(self, other_obj, precise=False):
+        """
+        Check if this object collides with the given object. With precise on,
+        objects whose rectangles touch only collide if their pixels overlap.
 
             if obj1.collides_with(obj2):
                 do_things();
+
+            if bullet.collides_with(asteroid, True):
+                do_things();
         """
+        # fast objects check the whole path they moved this frame.
+        if self.fast:
+            return self.sweep(other_obj, precise)
+        if other_obj.fast:
+            return other_obj.sweep(self, precise)
+
         # check for early rejection.
         dist = (self.location - other_obj.location).length_squared()
         # if distance between objects is greater then 64^2
@@ -385,6 +555,15 @@ class Object:
         if not rect1.colliderect(rect2):
             return False
 
+        if precise:
+            mask1 = self.get_mask()
+            mask2 = other_obj.get_mask()
+            # both masks are centered on their object's location.
+            offset = (int(other_obj.location.x - mask2.get_size()[0] / 2 - (self.location.x - mask1.get_size()[0] / 2)),
+                      int(other_obj.location.y - mask2.get_size()[1] / 2 - (self.location.y - mask1.get_size()[1] / 2)))
+            if mask1.overlap(mask2, offset) is None:
+                return False
+
         self.collision[DOWN] = rect2.collidepoint((rect1.center[0] - rect1.width / 4, rect1.center[1] + rect1.height / 2)) or rect2.collidepoint((rect1.center[0] + rect1.width / 4, rect1.center[1] + rect1.height / 2))
         self.collision[UP] = rect2.collidepoint((rect1.center[0] - rect1.width / 4, rect1.center[1] - rect1.height / 2)) or rect2.collidepoint((rect1.center[0] + rect1.width / 4, rect1.center[1] - rect1.height / 2))
         self.collision[LEFT] = rect2.collidepoint((rect1.center[0] - rect1.width / 2, rect1.center[1] + rect1.height / 4)) or rect2.collidepoint((rect1.center[0] - rect1.width / 2, rect1.center[1] - rect1.height / 4))
@@ -392,6 +571,48 @@ class Object:
 
         return True
 
+    def sweep(self, other_obj, precise=False):
+        """
+        Check if this object hit the given object anywhere along the path it
+        moved in its last update, so fast objects can't skip through things
+        between frames. collides_with does this for objects marked fast.
+
+            bullet.fast = True;
+
+            if bullet.collides_with(ship):
+                do_things();
+        """
+        end = self.location
+        start = end
+        # a path that doesn't end where the object is means it was moved by hand since.
+        if self.swept is not None and self.swept[1] == end:
+            start = self.swept[0]
+
+        rect1 = self.get_transformed_rect()
+        rect2 = other_obj.get_transformed_rect()
+        # growing the target by this object's size lets the path be checked as a line.
+        bounds = rect2.inflate(rect1.width, rect1.height)
+        if start == end:
+            if not bounds.collidepoint(end):
+                return False
+        elif not bounds.clipline(start, end):
+            return False
+        if not precise:
+            return True
+
+        # check the pixels at steps of half this object's size along the path.
+        mask1 = self.get_mask()
+        mask2 = other_obj.get_mask()
+        path = end - start
+        steps = int(path.length() / max(1, min(rect1.width, rect1.height) / 2)) + 1
+        corner2 = other_obj.location - pygame.math.Vector2(mask2.get_size()) / 2
+        for i in range(steps + 1):
+            corner1 = start + path * (i / steps) - pygame.math.Vector2(mask1.get_size()) / 2
+            offset = corner2 - corner1
+            if mask1.overlap(mask2, (int(offset.x), int(offset.y))) is not None:
+                return True
+        return False
+
     def snap_to_object_x(self, other_obj, facing):
         """
         Snaps the object to the left or right of the other object given.
@@ -441,8 +662,11 @@ class Object:
         return rect.collidepoint(point)
 
     def update(self, delta_time):
+        start = pygame.math.Vector2(self.location)
         self.location += self.velocity * delta_time
-        self.sprite.update(delta_time)
+        # remember the path for sweep, and where it ended to notice later moves.
+        self.swept = (start, pygame.math.Vector2(self.location))
+        self.sprite.update(delta_time, self)
 
     def draw(self, screen):
         """
@@ -456,6 +680,154 @@ class Object:
         rect.center = self.location
         screen.blit(sprite, rect)
 
+class Collisions:
+    """
+    Finds every contact between a set of objects once a frame and calls the
+    handler declared for each pair of layers. Layers are bits, so an object can
+    be in several and its mask says which layers it can touch. The objects are
+    sorted into a grid first, so only objects near each other are compared.
+
+        PLAYER = 1;
+        COIN = 2;
+        COLLISIONS = Collisions();
+        COLLISIONS.add(MY.player, PLAYER);
+        COLLISIONS.add(coin, COIN);
+        COLLISIONS.on(PLAYER, COIN, pick_up_coin);
+
+        # once a frame, calls pick_up_coin(player, coin) for each coin touched
+        COLLISIONS.update();
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.objects = []
+        self.pairs = []
+        self.skipped = set()
+
+    def add(self, obj, layer, mask=ALL_LAYERS, active_only=False):
+        """
+        Adds an object in the given layers. With active_only, the object is
+        left out while obj.active is False, for example pooled bullets.
+
+            COLLISIONS.add(bullet, BULLET, ASTEROID | SHIP, True);
+        """
+        obj.collision_layer = layer
+        obj.collision_mask = mask
+        obj.collision_active_only = active_only
+        if obj not in self.objects:
+            self.objects.append(obj)
+
+    def remove(self, obj):
+        """
+        Takes an object out. It is safe to call from a handler: the object's
+        other contacts this frame are skipped.
+        """
+        if obj in self.objects:
+            self.objects.remove(obj)
+        self.skipped.add(id(obj))
+
+    def ignore(self, obj):
+        """Skips the object's remaining contacts this frame. Call from a handler."""
+        self.skipped.add(id(obj))
+
+    def clear(self):
+        """Takes every object out, keeping the declared pairs."""
+        self.objects = []
+
+    def on(self, layer_a, layer_b, handler=None, precise=False):
+        """
+        Declares that objects in layer_a and layer_b collide. handler is called
+        with the layer_a object first. With precise on, pixels are compared too.
+        Declaring the same layers again replaces the earlier handler.
+
+            COLLISIONS.on(BULLET, ASTEROID, hit_asteroid, True);
+        """
+        self.pairs = [pair for pair in self.pairs if pair[:2] != (layer_a, layer_b)]
+        self.pairs.append((layer_a, layer_b, handler, precise))
+
+    def match(self, obj1, obj2):
+        """Internal helper that returns (first, second, pair) for two objects that may collide, or None."""
+        if not (obj1.collision_mask & obj2.collision_layer and obj2.collision_mask & obj1.collision_layer):
+            return None
+        for pair in self.pairs:
+            if obj1.collision_layer & pair[0] and obj2.collision_layer & pair[1]:
+                return (obj1, obj2, pair)
+            if obj2.collision_layer & pair[0] and obj1.collision_layer & pair[1]:
+                return (obj2, obj1, pair)
+        return None
+
+    def contacts(self):
+        """
+        Returns every (first, second, handler) contact this frame without calling
+        the handlers. Each pair of objects is checked once.
+        """
+        objects = [obj for obj in self.objects
+                   if obj.collision_layer and not (obj.collision_active_only and not obj.active)]
+        rects = [obj.get_transformed_rect() for obj in objects]
+        size = self.cell_size
+
+        # sort the objects into grid cells by their rectangles, and the path fast ones moved.
+        cells = {}
+        for (index, obj) in enumerate(objects):
+            area = rects[index]
+            if obj.fast and obj.swept is not None and obj.swept[1] == obj.location:
+                area = area.union(area.move(obj.swept[0] - obj.location))
+            for x in range(int(area.left // size), int(area.right // size) + 1):
+                for y in range(int(area.top // size), int(area.bottom // size) + 1):
+                    cells.setdefault((x, y), []).append(index)
+
+        candidates = set()
+        for members in cells.values():
+            for i in range(len(members)):
+                for j in range(i + 1, len(members)):
+                    candidates.add((members[i], members[j]))
+
+        found = []
+        # sorted so handlers run in the same order every time.
+        for (i, j) in sorted(candidates):
+            matched = self.match(objects[i], objects[j])
+            if matched is None:
+                continue
+            (first, second, pair) = matched
+            if first.fast or second.fast:
+                (mover, other) = (first, second) if first.fast else (second, first)
+                if not mover.sweep(other, pair[3]):
+                    continue
+            elif not rects[i].colliderect(rects[j]):
+                continue
+            elif pair[3]:
+                mask1 = first.get_mask()
+                mask2 = second.get_mask()
+                offset = (int(second.location.x - mask2.get_size()[0] / 2 - (first.location.x - mask1.get_size()[0] / 2)),
+                          int(second.location.y - mask2.get_size()[1] / 2 - (first.location.y - mask1.get_size()[1] / 2)))
+                if mask1.overlap(mask2, offset) is None:
+                    continue
+            found.append((first, second, pair[2]))
+        return found
+
+    def update(self):
+        """
+        Finds this frame's contacts, then calls their handlers. Returns the
+        contacts as (first, second) pairs.
+
+            for (bullet, ship) in COLLISIONS.update():
+                do_things();
+        """
+        found = self.contacts()
+        self.skipped = set()
+        touched = []
+        for (first, second, handler) in found:
+            # handlers can remove objects or turn them off while this runs.
+            if id(first) in self.skipped or id(second) in self.skipped:
+                continue
+            if ((first.collision_active_only and not first.active)
+                    or (second.collision_active_only and not second.active)):
+                continue
+            touched.append((first, second))
+            if handler is not None:
+                handler(first, second)
+        self.skipped = set()
+        return touched
+
 def draw_rect(screen, color, top_left, size):
     """
     Draw's a rectangle with the given values. Doesn't return.
@@ -562,6 +934,14 @@ ship_rotate = 120
 ship_max_speed = 500
 ship_accel = 10
 BULLET_SPEED = 1000
+
+# collision layers
+PLAYER1_LAYER = 1
+PLAYER2_LAYER = 2
+BULLET_LAYER = 4
+ASTEROID_LAYER = 8
+
+COLLISIONS = Collisions()
 PLAYER_MAX_HP = 10
 
 #Loads the changeable data for gameplay
@@ -637,6 +1017,9 @@ def initialize(window):
         MY.display_text = TextObject(WHITE, 24, "")
     while count < 20:
         MY.bullets.append(Object(PROJECTILE_ANIMATION[1]))
+        # bullets move far in one frame, so check their whole path for hits
+        MY.bullets[-1].fast = True
+        COLLISIONS.add(MY.bullets[-1], BULLET_LAYER, ASTEROID_LAYER, True)
         MY.bullet_owner.append(1)
         count = count + 1
 
@@ -652,8 +1035,12 @@ def initialize(window):
         obj.scale = 2
         obj.active = True
         MY.asteroids.append(obj)
+        COLLISIONS.add(obj, ASTEROID_LAYER, ALL_LAYERS, True)
         count = count + 1
 
+    COLLISIONS.add(MY.player1, PLAYER1_LAYER)
+    COLLISIONS.add(MY.player2, PLAYER2_LAYER)
+
 def fire_bullet(player_number):
     """fire a bullet for the player"""
     index = -1
@@ -667,10 +1054,12 @@ def fire_bullet(player_number):
             MY.bullets[index].location = MY.player1.location
             MY.bullets[index].set_velocity(MY.player1.rotation, BULLET_SPEED)
             MY.bullets[index].rotation = MY.player1.rotation
+            MY.bullets[index].collision_mask = PLAYER2_LAYER | ASTEROID_LAYER
         else:
             MY.bullets[index].location = MY.player2.location
             MY.bullets[index].set_velocity(MY.player2.rotation, BULLET_SPEED)
             MY.bullets[index].rotation = MY.player2.rotation
+            MY.bullets[index].collision_mask = PLAYER1_LAYER | ASTEROID_LAYER
 
         MY.bullet_owner[index] = player_number
         MY.bullets[index].sprite = PROJECTILE_ANIMATION[player_number]
@@ -701,6 +1090,7 @@ def cleanup():
     """Cleans up the Intro State for SpaceWars."""
     MY.bullets = []
     MY.asteroids = []
+    COLLISIONS.clear()
 
 class GameOver:
     """Restarter class to be loaded if Player 1 wins."""
@@ -740,16 +1130,30 @@ class GameOver:
         MY.restart_button.draw(screen)
         MY.display_text.draw(screen)
 
-def check_collision(i):
-    """Checks for bullet collision and responds appropriately in SpaceWars"""
-    if MY.bullet_owner[i] == 1 and MY.bullets[i].collides_with(MY.player2):
-        MY.player2_hp = MY.player2_hp - 1
-        MY.bullets[i].active = False
-        sound_explosions[random.randint(0, len(sound_explosions) - 1)].play()
-    elif MY.bullet_owner[i] == 2 and MY.bullets[i].collides_with(MY.player1):
+def bullet_hits_ship(bullet, ship):
+    """Damages the ship a bullet hit in SpaceWars"""
+    if ship is MY.player1:
         MY.player1_hp = MY.player1_hp - 1
-        MY.bullets[i].active = False
-        sound_explosions[random.randint(0, len(sound_explosions) - 1)].play()
+    else:
+        MY.player2_hp = MY.player2_hp - 1
+    bullet.active = False
+    sound_explosions[random.randint(0, len(sound_explosions) - 1)].play()
+
+def bullet_hits_asteroid(bullet, asteroid):
+    """Destroys a bullet that hit an asteroid"""
+    bullet.active = False
+
+def ship_hits_asteroid(ship, asteroid):
+    """Stops a ship that hit an asteroid"""
+    ship.velocity = pygame.math.Vector2(0, 0)
+
+COLLISIONS.on(BULLET_LAYER, PLAYER1_LAYER | PLAYER2_LAYER, bullet_hits_ship, True)
+COLLISIONS.on(BULLET_LAYER, ASTEROID_LAYER, bullet_hits_asteroid, True)
+COLLISIONS.on(PLAYER1_LAYER | PLAYER2_LAYER, ASTEROID_LAYER, ship_hits_asteroid, True)
+
+def check_collisions():
+    """Checks every collision between ships, bullets and asteroids at once in SpaceWars"""
+    COLLISIONS.update()
 
 def check_win():
     """Check win condition and change state if a player has won the game"""
@@ -772,7 +1176,7 @@ def check_replay_click(event):
             MY.state = 0  
 
 def update_bullets(delta_time):
-    """Update the bullets and check for collisions"""
+    """Update the bullets and remove the ones that leave the screen"""
     # Update bullets
     for i in range(len(MY.bullets)):
         # ignore if not active
@@ -781,12 +1185,6 @@ def update_bullets(delta_time):
             # Destroy bullets that hit the screen edge.
             if screen_wrap(MY.bullets[i], MY.window):
                 MY.bullets[i].active = False
-                continue
-            for j in range(len(MY.asteroids)):
-                if MY.bullets[i].collides_with(MY.asteroids[j]):
-                    MY.bullets[i].active = False
-            #check collisions
-            check_collision(i)
 
 def update_asteroids(delta_time):
     """Updates the position of the asteroids in the game window."""
@@ -794,10 +1192,6 @@ def update_asteroids(delta_time):
         if asteroid.active:
             asteroid.update(delta_time)
             screen_wrap(asteroid, MY.window)
-        if MY.player1.collides_with(asteroid):
-            MY.player1.velocity = pygame.math.Vector2(0, 0)
-        if MY.player2.collides_with(asteroid):
-            MY.player2.velocity = pygame.math.Vector2(0, 0)
 
 def update_players(delta_time):
     """Updates the position of the players in the game window."""
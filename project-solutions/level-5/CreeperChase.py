@@ -1,6 +1,25 @@
 #Runs the Init.py file and imports the libraries
 from init import *
 
+def hit_hazard(player, hazard):
+    MY.player_health -= 2
+    if MY.player_health <= 0:
+        change(1)
+    else:
+        MY.player.location = MY.player_start_position
+        MY.player.set_velocity(0, 0)
+        MY.player.sprite = MY.paul_pain_right
+        # the player went back to the start, so skip the other hazards it touched
+        COLLISIONS.ignore(player)
+
+def pick_up_coin(player, coin):
+    MY.coins.remove(coin)
+    COLLISIONS.remove(coin)
+    MY.player_health += 1
+
+COLLISIONS.on(PLAYER_LAYER, HAZARD_LAYER, hit_hazard, True)
+COLLISIONS.on(PLAYER_LAYER, COIN_LAYER, pick_up_coin)
+
 def update(delta_time):
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
@@ -38,50 +57,13 @@ def update(delta_time):
     #Gravity
     MY.player.velocity.y = min(MY.player.velocity.y + GRAVITY_ACCEL, PLAYER_TERMINAL_VEL)
 
-    #Check for hazard collisions
-    for hazard in MY.hazards:
-        if MY.player.collides_with(hazard):
-            MY.player_health -= 2
-            if MY.player_health <= 0:
-                change(1)
-            else:
-                MY.player.location = MY.player_start_position
-                MY.player.set_velocity(0, 0)
-                MY.player.sprite = MY.paul_pain_right
-                break
-    for coin in MY.coins:
-        if MY.player.collides_with(coin):
-            MY.coins.remove(coin)
-            MY.player_health += 1
+    #Check for hazard and coin collisions, this calls hit_hazard and pick_up_coin
+    COLLISIONS.update()
     
-    MY.player.update(delta_time)
-
-    # check for wall collisions
-    touching = False
-    for wall in MY.walls:
-        if MY.player.collides_with(wall):
-            if MY.player.collision[DOWN]:
-                MY.player.snap_to_object_y(wall, DOWN)
-                MY.player.velocity.y = 0
-                MY.grounded = touching = True
-                continue
-            if MY.player.collision[LEFT]:
-                MY.player.snap_to_object_x(wall, LEFT)
-                MY.player.velocity.x = 0
-                touching = True
-                continue
-            if MY.player.collision[RIGHT]:
-                MY.player.snap_to_object_x(wall, RIGHT)
-                MY.player.velocity.x = 0
-                touching = True
-                continue
-            if MY.player.collision[UP]:
-                MY.player.snap_to_object_y(wall, UP)
-                MY.player.velocity.y = 0
-                touching = True
-                continue
-    if not touching:
-        MY.grounded = False
+    # move the player and stop at walls, only checking the tiles the player passes
+    contacts = move_and_collide(MY.player, delta_time, MY.tiles)
+    MY.player.sprite.update(delta_time)
+    MY.grounded = contacts[DOWN]
     
     update_level(delta_time)
 
@@ -16,7 +16,7 @@ def update(delta_time):
         MY.player.location.y = WINDOW_LENGTH - (MY.wall_height + 20)
 
     #TODO: Copy the code here for Paul to lose health if he collides with the Creeper
-    if MY.player.collides_with(MY.boss):
+    if MY.player.collides_with(MY.boss, True):
         player_pain_anim()
         MY.player_health -= 1
         MY.player_hitbox.active = False
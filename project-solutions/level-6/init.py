@@ -5,6 +5,7 @@ import math
 import random
 import time
 import sys
+import collections
 import pygame
 
 # colors
@@ -26,6 +27,9 @@ _data = {}
 X_VALUE = 0
 Y_VALUE = 0
 
+# keys held down this frame, read once by the state machine at the start of the frame.
+_keys = None
+
 #============================================================
 #PART 2: CREATING A FRAMEWORK OF GENERAL CLASSES AND FUNCTIONS
 def start(window, name):
@@ -126,7 +130,9 @@ def key_held_down(key):
             do_things();
     """
     if isinstance(key, str):
-        return pygame.key.get_pressed()[ord(key)]
+        key = ord(key)
+    if _keys is not None:
+        return _keys[key]
     return pygame.key.get_pressed()[key]
 
 def get_file(filename):
@@ -181,12 +187,15 @@ class Machine:
 
     def run(self, screen, window, fill_color):
         """Runs the state given machine."""
+        global _keys
         clock = pygame.time.Clock()
         # first run initialize!
         self.states[self.current]['initialize'](window)
 
         while True:
             delta_time = clock.tick(60) / 1000
+            pygame.event.pump()
+            _keys = pygame.key.get_pressed()
             if self.current != self.previous:
                 self.states[self.current]['cleanup']()
                 self.states[self.current]['initialize'](window)
@@ -310,6 +319,36 @@ class Animator:
     def surface(self):
         return self.current.surface()
 
+# every collision layer, the default mask of an object
+ALL_LAYERS = -1
+
+# collision masks by (frame, rotation step, scale). The least recently used
+# ones are dropped once there are more than MASK_CACHE_SIZE.
+MASK_CACHE_SIZE = 512
+MASK_ROTATION_STEP = 5
+_masks = collections.OrderedDict()
+
+def get_mask(surface, rotation, scale):
+    """
+    Returns the collision mask of a surface rotated and scaled the way objects
+    draw it. The rotation is rounded to MASK_ROTATION_STEP degrees so close
+    angles share a mask.
+
+        mask = get_mask(obj.sprite.surface(), obj.rotation, obj.scale);
+    """
+    step = int(round(rotation / MASK_ROTATION_STEP)) % (360 // MASK_ROTATION_STEP)
+    key = (surface, step, scale)
+    mask = _masks.get(key)
+    if mask is None:
+        rotated = pygame.transform.rotozoom(surface, step * MASK_ROTATION_STEP, scale)
+        mask = pygame.mask.from_surface(rotated)
+        _masks[key] = mask
+        if len(_masks) > MASK_CACHE_SIZE:
+            _masks.popitem(last=False)
+    else:
+        _masks.move_to_end(key)
+    return mask
+
 class Object:
     """
     Object class used to organize and track common game object data, such as location and appearance
@@ -319,6 +358,13 @@ class Object:
     location = pygame.math.Vector2(0, 0)
     scale = 1
     velocity = pygame.math.Vector2(0, 0)
+    fast = False
+    swept = None
+    collision_layer = 0
+    collision_mask = ALL_LAYERS
+    collision_active_only = False
+    static = False
+    layer = None
 
     def __init__(self, image):
         self.sprite = image
@@ -339,6 +385,10 @@ class Object:
         else:
             self.__dict__[name] = value
 
+        # static objects ask their layer to redraw when they change.
+        if self.layer is not None and name in ("location", "rotation", "scale", "sprite"):
+            self.layer.invalidate()
+
     def get_transformed_rect(self):
         """
         Returns a transformed version of the object sprite. Generally for internal use only.
@@ -410,13 +460,31 @@ class Object:
         self.velocity = pygame.math.Vector2(-1 * math.cos(math.radians(degrees - 90)) * speed,
                                             math.sin(math.radians(degrees - 90)) * speed)
 
-    def collides_with(self, other_obj):
+    def get_mask(self):
         """
-        Check if this object collides with the given object.
+        Returns the object's collision mask for its current frame, rotation and scale.
+
+            mask = obj.get_mask();
+        """
+        return get_mask(self.sprite.surface(), self.rotation, self.scale)
+
+    def collides_with(self, other_obj, precise=False):
+        """
+        Check if this object collides with the given object. With precise on,
+        objects whose rectangles touch only collide if their pixels overlap.
 
             if obj1.collides_with(obj2):
                 do_things();
+
+            if bullet.collides_with(asteroid, True):
+                do_things();
         """
+        # fast objects check the whole path they moved this frame.
+        if self.fast:
+            return self.sweep(other_obj, precise)
+        if other_obj.fast:
+            return other_obj.sweep(self, precise)
+
         # check for early rejection.
         dist = (self.location - other_obj.location).length_squared()
         # if distance between objects is greater then 64^2
@@ -432,6 +500,15 @@ class Object:
         if not rect1.colliderect(rect2):
             return False
 
+        if precise:
+            mask1 = self.get_mask()
+            mask2 = other_obj.get_mask()
+            # both masks are centered on their object's location.
+            offset = (int(other_obj.location.x - mask2.get_size()[0] / 2 - (self.location.x - mask1.get_size()[0] / 2)),
+                      int(other_obj.location.y - mask2.get_size()[1] / 2 - (self.location.y - mask1.get_size()[1] / 2)))
+            if mask1.overlap(mask2, offset) is None:
+                return False
+
         self.collision[DOWN] = rect2.collidepoint((rect1.center[0] - rect1.width / 4, rect1.center[1] + rect1.height / 2)) or rect2.collidepoint((rect1.center[0] + rect1.width / 4, rect1.center[1] + rect1.height / 2))
         self.collision[UP] = rect2.collidepoint((rect1.center[0] - rect1.width / 4, rect1.center[1] - rect1.height / 2)) or rect2.collidepoint((rect1.center[0] + rect1.width / 4, rect1.center[1] - rect1.height / 2))
         self.collision[LEFT] = rect2.collidepoint((rect1.center[0] - rect1.width / 2, rect1.center[1] + rect1.height / 4)) or rect2.collidepoint((rect1.center[0] - rect1.width / 2, rect1.center[1] - rect1.height / 4))
@@ -439,6 +516,48 @@ class Object:
 
         return True
 
+    def sweep(self, other_obj, precise=False):
+        """
+        Check if this object hit the given object anywhere along the path it
+        moved in its last update, so fast objects can't skip through things
+        between frames. collides_with does this for objects marked fast.
+
+            bullet.fast = True;
+
+            if bullet.collides_with(ship):
+                do_things();
+        """
+        end = self.location
+        start = end
+        # a path that doesn't end where the object is means it was moved by hand since.
+        if self.swept is not None and self.swept[1] == end:
+            start = self.swept[0]
+
+        rect1 = self.get_transformed_rect()
+        rect2 = other_obj.get_transformed_rect()
+        # growing the target by this object's size lets the path be checked as a line.
+        bounds = rect2.inflate(rect1.width, rect1.height)
+        if start == end:
+            if not bounds.collidepoint(end):
+                return False
+        elif not bounds.clipline(start, end):
+            return False
+        if not precise:
+            return True
+
+        # check the pixels at steps of half this object's size along the path.
+        mask1 = self.get_mask()
+        mask2 = other_obj.get_mask()
+        path = end - start
+        steps = int(path.length() / max(1, min(rect1.width, rect1.height) / 2)) + 1
+        corner2 = other_obj.location - pygame.math.Vector2(mask2.get_size()) / 2
+        for i in range(steps + 1):
+            corner1 = start + path * (i / steps) - pygame.math.Vector2(mask1.get_size()) / 2
+            offset = corner2 - corner1
+            if mask1.overlap(mask2, (int(offset.x), int(offset.y))) is not None:
+                return True
+        return False
+
     def snap_to_object_x(self, other_obj, facing):
         """
         Snaps the object to the left or right of the other object given.
@@ -488,7 +607,10 @@ class Object:
         return rect.collidepoint(point)
 
     def update(self, delta_time):
+        start = pygame.math.Vector2(self.location)
         self.location += self.velocity * delta_time
+        # remember the path for sweep, and where it ended to notice later moves.
+        self.swept = (start, pygame.math.Vector2(self.location))
         self.sprite.update(delta_time)
 
     def draw(self, screen):
@@ -503,6 +625,208 @@ class Object:
         rect.center = self.location
         screen.blit(sprite, rect)
 
+class Collisions:
+    """
+    Finds every contact between a set of objects once a frame and calls the
+    handler declared for each pair of layers. Layers are bits, so an object can
+    be in several and its mask says which layers it can touch. The objects are
+    sorted into a grid first, so only objects near each other are compared.
+
+        PLAYER = 1;
+        COIN = 2;
+        COLLISIONS = Collisions();
+        COLLISIONS.add(MY.player, PLAYER);
+        COLLISIONS.add(coin, COIN);
+        COLLISIONS.on(PLAYER, COIN, pick_up_coin);
+
+        # once a frame, calls pick_up_coin(player, coin) for each coin touched
+        COLLISIONS.update();
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.objects = []
+        self.pairs = []
+        self.skipped = set()
+
+    def add(self, obj, layer, mask=ALL_LAYERS, active_only=False):
+        """
+        Adds an object in the given layers. With active_only, the object is
+        left out while obj.active is False, for example pooled bullets.
+
+            COLLISIONS.add(bullet, BULLET, ASTEROID | SHIP, True);
+        """
+        obj.collision_layer = layer
+        obj.collision_mask = mask
+        obj.collision_active_only = active_only
+        if obj not in self.objects:
+            self.objects.append(obj)
+
+    def remove(self, obj):
+        """
+        Takes an object out. It is safe to call from a handler: the object's
+        other contacts this frame are skipped.
+        """
+        if obj in self.objects:
+            self.objects.remove(obj)
+        self.skipped.add(id(obj))
+
+    def ignore(self, obj):
+        """Skips the object's remaining contacts this frame. Call from a handler."""
+        self.skipped.add(id(obj))
+
+    def clear(self):
+        """Takes every object out, keeping the declared pairs."""
+        self.objects = []
+
+    def on(self, layer_a, layer_b, handler=None, precise=False):
+        """
+        Declares that objects in layer_a and layer_b collide. handler is called
+        with the layer_a object first. With precise on, pixels are compared too.
+        Declaring the same layers again replaces the earlier handler.
+
+            COLLISIONS.on(BULLET, ASTEROID, hit_asteroid, True);
+        """
+        self.pairs = [pair for pair in self.pairs if pair[:2] != (layer_a, layer_b)]
+        self.pairs.append((layer_a, layer_b, handler, precise))
+
+    def match(self, obj1, obj2):
+        """Internal helper that returns (first, second, pair) for two objects that may collide, or None."""
+        if not (obj1.collision_mask & obj2.collision_layer and obj2.collision_mask & obj1.collision_layer):
+            return None
+        for pair in self.pairs:
+            if obj1.collision_layer & pair[0] and obj2.collision_layer & pair[1]:
+                return (obj1, obj2, pair)
+            if obj2.collision_layer & pair[0] and obj1.collision_layer & pair[1]:
+                return (obj2, obj1, pair)
+        return None
+
+    def contacts(self):
+        """
+        Returns every (first, second, handler) contact this frame without calling
+        the handlers. Each pair of objects is checked once.
+        """
+        objects = [obj for obj in self.objects
+                   if obj.collision_layer and not (obj.collision_active_only and not obj.active)]
+        rects = [obj.get_transformed_rect() for obj in objects]
+        size = self.cell_size
+
+        # sort the objects into grid cells by their rectangles, and the path fast ones moved.
+        cells = {}
+        for (index, obj) in enumerate(objects):
+            area = rects[index]
+            if obj.fast and obj.swept is not None and obj.swept[1] == obj.location:
+                area = area.union(area.move(obj.swept[0] - obj.location))
+            for x in range(int(area.left // size), int(area.right // size) + 1):
+                for y in range(int(area.top // size), int(area.bottom // size) + 1):
+                    cells.setdefault((x, y), []).append(index)
+
+        candidates = set()
+        for members in cells.values():
+            for i in range(len(members)):
+                for j in range(i + 1, len(members)):
+                    candidates.add((members[i], members[j]))
+
+        found = []
+        # sorted so handlers run in the same order every time.
+        for (i, j) in sorted(candidates):
+            matched = self.match(objects[i], objects[j])
+            if matched is None:
+                continue
+            (first, second, pair) = matched
+            if first.fast or second.fast:
+                (mover, other) = (first, second) if first.fast else (second, first)
+                if not mover.sweep(other, pair[3]):
+                    continue
+            elif not rects[i].colliderect(rects[j]):
+                continue
+            elif pair[3]:
+                mask1 = first.get_mask()
+                mask2 = second.get_mask()
+                offset = (int(second.location.x - mask2.get_size()[0] / 2 - (first.location.x - mask1.get_size()[0] / 2)),
+                          int(second.location.y - mask2.get_size()[1] / 2 - (first.location.y - mask1.get_size()[1] / 2)))
+                if mask1.overlap(mask2, offset) is None:
+                    continue
+            found.append((first, second, pair[2]))
+        return found
+
+    def update(self):
+        """
+        Finds this frame's contacts, then calls their handlers. Returns the
+        contacts as (first, second) pairs.
+
+            for (bullet, ship) in COLLISIONS.update():
+                do_things();
+        """
+        found = self.contacts()
+        self.skipped = set()
+        touched = []
+        for (first, second, handler) in found:
+            # handlers can remove objects or turn them off while this runs.
+            if id(first) in self.skipped or id(second) in self.skipped:
+                continue
+            if ((first.collision_active_only and not first.active)
+                    or (second.collision_active_only and not second.active)):
+                continue
+            touched.append((first, second))
+            if handler is not None:
+                handler(first, second)
+        self.skipped = set()
+        return touched
+
+class StaticLayer:
+    """
+    A layer of objects that don't move, drawn once onto a window sized surface
+    and then blitted in one go every frame.
+
+        pillars = StaticLayer(WINDOW);
+        pillars.add(pillar);
+        pillars.draw(SCREEN);
+    """
+
+    def __init__(self, size, transparent=True):
+        self.size = (int(size[0]), int(size[1]))
+        self.transparent = transparent
+        self.objects = []
+        self.surface = None
+        self.dirty = True
+
+    def add(self, obj):
+        """Adds an object to the layer and marks it static."""
+        self.objects.append(obj)
+        obj.static = True
+        obj.layer = self
+        self.dirty = True
+
+    def remove(self, obj):
+        """Takes an object off the layer so it can move again."""
+        if obj in self.objects:
+            self.objects.remove(obj)
+            obj.static = False
+            obj.layer = None
+            self.dirty = True
+
+    def invalidate(self):
+        """Redraws the layer before it is next drawn."""
+        self.dirty = True
+
+    def rebuild(self):
+        """Draws every object onto the layer surface."""
+        if self.surface is None:
+            if self.transparent:
+                self.surface = pygame.Surface(self.size, pygame.SRCALPHA, 32).convert_alpha()
+            else:
+                self.surface = pygame.Surface(self.size).convert()
+        self.surface.fill((0, 0, 0, 0))
+        for obj in self.objects:
+            obj.draw(self.surface)
+        self.dirty = False
+
+    def draw(self, screen):
+        """Draws the layer to the screen, rebuilding it first if something changed."""
+        if self.dirty:
+            self.rebuild()
+        screen.blit(self.surface, (0, 0))
+
 class CountdownTimer:
     """
     Countdown timer class for timer logic.
@@ -576,6 +900,12 @@ BOSS = 1
 GRASS = 4
 TILE_SIZE = 32
 
+#collision layers
+PLAYER_LAYER = 1
+PROJECTILE_LAYER = 2
+
+COLLISIONS = Collisions()
+
 class Data:
     """
     Data loads the changeable data for gameplay
@@ -644,6 +974,11 @@ class Data:
     pillar_bottom_3 = Object(Image("assets/PillarBottom.png"))
     pillar_top_4 = Object(Image("assets/PillarTop.png"))
     pillar_bottom_4 = Object(Image("assets/PillarBottom.png"))
+    pillars = StaticLayer(WINDOW)
+    pillars.add(pillar_top_1)
+    pillars.add(pillar_top_2)
+    pillars.add(pillar_top_3)
+    pillars.add(pillar_top_4)
     projectile_sheet = SpriteSheet("assets/PlasmaBall.png", (32, 32))
     projectile_anim = Animator(projectile_sheet, 6)
     projectile = Object(projectile_sheet.image_at(0))
@@ -678,7 +1013,9 @@ def initialize(window):
         proj.location = (window.x / 2, window.y/ 2 - 35)
         proj.sprite = MY.projectile_anim
         MY.projectiles.append(proj)
+        COLLISIONS.add(proj, PROJECTILE_LAYER, ALL_LAYERS, True)
         count += 1
+    COLLISIONS.add(MY.player, PLAYER_LAYER)
 
 def draw(screen):
     """Draws the state to the given screen for BossBattle."""
@@ -693,10 +1030,7 @@ def draw(screen):
             MY.projectiles[i].draw(screen)
 
     MY.boss.draw(screen)
-    MY.pillar_top_1.draw(screen)
-    MY.pillar_top_2.draw(screen)
-    MY.pillar_top_3.draw(screen)
-    MY.pillar_top_4.draw(screen)
+    MY.pillars.draw(screen)
     MY.player_text.draw(screen)
     health_bar(screen, MY.player_health, 100, (100, 20), (85, 3))
     health_bar(
@@ -712,6 +1046,7 @@ def draw(screen):
 def cleanup():
     """Cleans up the Intro State."""
     MY.projectiles = []
+    COLLISIONS.clear()
 
 def player_attack_anim():
     """Updates animations for player while attacking"""
@@ -746,7 +1081,7 @@ def player_move_update(delta_time):
     moving = (key_held_down(pygame.K_RIGHT) or key_held_down(pygame.K_LEFT) or
               key_held_down(pygame.K_DOWN) or key_held_down(pygame.K_UP))
 
-    if not moving and not key_held_down(pygame.K_SPACE) and not MY.player.collides_with(MY.boss):
+    if not moving and not key_held_down(pygame.K_SPACE) and not MY.player.collides_with(MY.boss, True):
         MY.player_hitbox.active = False
         if MY.player_dir == UP:
             MY.player.sprite = MY.idle_backward
@@ -792,11 +1127,14 @@ def fire_projectile(delta_time):
             if projectile.location.x < MY.wall_height or projectile.location.x > WINDOW_WIDTH - MY.wall_height or projectile.location.y < MY.wall_height or projectile.location.y > WINDOW_LENGTH - (MY.wall_height + 20):
                 projectile.active = False
                 continue'''
-            if projectile.collides_with(MY.player):
-                MY.player_health -= 0.1
-                player_pain_anim()
-                projectile.active = False
-                continue
+
+def projectile_hits_player(projectile, player):
+    """Hurts the player when a projectile hits them"""
+    MY.player_health -= 0.1
+    player_pain_anim()
+    projectile.active = False
+
+COLLISIONS.on(PROJECTILE_LAYER, PLAYER_LAYER, projectile_hits_player, True)
 
 def boss_attack(delta_time):
     """shoot out lots of projectiles."""
@@ -832,6 +1170,9 @@ def update_assets(delta_time):
         MY.boss.sprite = MY.boss_idle
     MY.boss.update(delta_time)
 
+    # projectiles are checked against the player once, after they have all moved
+    COLLISIONS.update()
+
 def check_win():
     """Check win condition and change state if a player has won the game"""
     if MY.boss_health < 1:
@@ -1,58 +1,18 @@
 from init import *
+from ai import AIOpponent
 
-# Create all of the Cards		
-annie_conda = Card('Annie Conda', 'python', 'java', 'bash', annie_conda_img, icon_python)
-bayo_wolf = Card('Bayo Wolf', 'scratch', 'small_basic', 'java', bayo_wolf_img, icon_scratch)
-captain_javo = Card('Captain Javo', 'java', 'scratch', 'python', captain_javo_img, icon_java)
-cryptic_creeper = Card('Cryptic Creeper', 'bash', 'python', 'small_basic', cryptic_creeper_img, icon_bash)
-emily_airheart = Card('Emily Airheart', 'small_basic', 'bash', 'scratch', emily_airheart_img, icon_small_basic)
-grafika_turtle = Card('Grafika Turtle', 'small_basic', 'bash', 'scratch', grafika_turtle_img, icon_small_basic)
-intelli_scents = Card('Intelli-Scents', 'scratch', 'small_basic', 'java', intelli_scents_img, icon_scratch)
-java_lynn = Card('Java Lynn', 'java', 'scratch', 'python', java_lynn_img, icon_java)
-jitter_bug = Card('Jitter Bug', 'java', 'scratch', 'python', jitter_bug_img, icon_java)
-justin_timbersnake = Card('Justin Timbersnake', 'python', 'java', 'bash', justin_timbersnake_img, icon_python)
-mrs_scratcher = Card('Mrs. Scratcher', 'scratch', 'small_basic', 'java', mrs_scratcher_img, icon_scratch)
-paul_python = Card('Paul Python', 'python', 'java', 'bash', paul_python_img, icon_python)
-queen_cobra = Card('Queen Cobra', 'python', 'java', 'bash', queen_cobra_img, icon_python)
-ram_rom = Card('Ram Rom', 'java', 'scratch', 'python', ram_rom_img, icon_java)
-sidewinder = Card('Sidewinder', 'python', 'java', 'bash', sidewinder_img, icon_python)
-syntax_turtle = Card('Syntax Turtle', 'small_basic', 'bash', 'scratch', syntax_turtle_img, icon_small_basic)
-viralmuto = Card('Viralmuto', 'bash', 'python', 'scratch', viralmuto_img, icon_bash)
-virobotica = Card('Virobotica', 'bash', 'python', 'small_basic', virobotica_img, icon_bash)
-virobots = Card('Virobots', 'bash', 'python', 'small_basic', virobots_img, icon_bash)
-woodchuck_norris = Card('Woodchuck Norris', 'scratch', 'small_basic', 'java', woodchuck_norris_img, icon_scratch)
-
-DECK = []
-
-# Add all cards to deck
-DECK.append(annie_conda)
-DECK.append(bayo_wolf)
-DECK.append(captain_javo)
-DECK.append(cryptic_creeper)
-DECK.append(emily_airheart)
-DECK.append(grafika_turtle)
-DECK.append(intelli_scents)
-DECK.append(java_lynn)
-DECK.append(jitter_bug)
-DECK.append(justin_timbersnake)
-DECK.append(mrs_scratcher)
-DECK.append(paul_python)
-DECK.append(queen_cobra)
-DECK.append(ram_rom)
-DECK.append(sidewinder)
-DECK.append(syntax_turtle)
-DECK.append(viralmuto)
-DECK.append(virobotica)
-DECK.append(virobots)
-DECK.append(woodchuck_norris)
+# Create all of the Cards from the deck file
+DECK = load_deck()
 
 random.shuffle(DECK)
 
 class GameScreen(GameState):
 	
-	def __init__(self):
+	# ai is an AIOpponent that plays for the computer player, if there is one
+	def __init__(self, ai = None):
 		super().__init__()
 		self.next_state = "Victory"
+		self.ai = ai
 
 		self.tech_attack_button = Button("Tech Type Attack", X_CENTER-105, 575, 210, 40, ondeck_teal, round_dark_blue, parent = self)		
 		# self.coded_attack_button = Button("Coded Attack", X_CENTER-85, 625, 170, 40, coin_yellow, coin_dark_yellow, parent = self)
@@ -84,12 +44,30 @@ class GameScreen(GameState):
 		self.dialog_box = DialogBox((200,300), (X_CENTER-100, 50))
 		
 	def get_event(self, event):
-		if not self.flipping:
+		if not self.flipping and not self.attacker.computer:
 			self.tech_attack_button.get_event(event)
 	
 		self.player1_ondeck.get_event(event)
 		self.player2_ondeck.get_event(event)
 		
+	def busy(self):
+		return self.flipping or self.attacking or self.attacker.computer
+		
+	def computer_turn(self):
+		# ask the AI once per turn and keep drawing frames until its move comes back
+		if not self.ai.thinking:
+			battle = engine.Battle(
+				[[card.code for card in self.attacker.hand], [card.code for card in self.defender.hand]],
+				[[card.HP for card in self.attacker.hand], [card.HP for card in self.defender.hand]],
+				[self.attacker.hand_index(), self.defender.hand_index()],
+				0)
+			self.ai.ask(battle)
+		
+		move = self.ai.poll()
+		if move is not None:
+			self.attacker.set_card(self.attacker.hand[move])
+			self.button_action(None)
+		
 	def button_action(self, params):
 		self.coin_side = self.flip_coin()
 		self.coin.set_side(self.coin_side)
@@ -105,6 +83,9 @@ class GameScreen(GameState):
 		self.player1_card_display.update()
 		self.player2_card_display.update()
 		
+		if self.attacker.computer and not self.flipping and not self.attacking:
+			self.computer_turn()
+		
 		if self.flipping:
 			self.flipping = self.coin.update(dt)
 			if not self.flipping:
@@ -151,7 +132,7 @@ class GameScreen(GameState):
 				self.done = True
 			
 	def flip_coin(self):
-		side = "Heads" if random.random() < 0.5 else "Tails"
+		side = "Heads" if engine.flip_coin() else "Tails"
 		if side == "Heads":
 			self.attacker.heads_count += 1
 		else:
@@ -201,14 +182,28 @@ class GameScreen(GameState):
 		
 if __name__=="__main__":		
 	
+	# python IncrediCards_Solution.py --ai 2 plays against the computer, thinking 2 seconds a move
+	ai = None
+	computer_name = None
+	if "--ai" in sys.argv:
+		index = sys.argv.index("--ai")
+		think_time = float(sys.argv[index + 1]) if index + 1 < len(sys.argv) else 1.0
+		ai = AIOpponent(think_time)
+		computer_name = "Computer"
+	
 	states = {
 			"Title" : TitleScreen(),
-			"GetNames": GetNameScreen(),
+			"GetNames": GetNameScreen(computer_name),
 			"CoinFlip": CoinFlipScreen(),
 			"ChooseHand" : ChooseHandScreen(DECK),
-			"Game" : GameScreen(),
+			"Game" : GameScreen(ai),
 			"Victory" : VictoryScreen()
 			 }
 
-game = GameRunner(SCREEN, states, "Title")
+	try:
+		game = GameRunner(SCREEN, states, "Title")
+	finally:
+		# closing the window exits the game, so the AI's worker is stopped here
+		if ai is not None:
+			ai.stop()
 
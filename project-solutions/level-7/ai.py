@@ -0,0 +1,133 @@
+#============================================================
+# A computer opponent for IncrediCards. It picks which card to attack with by
+# Monte Carlo tree search over the engine's rules. The search runs in its own
+# process for a fixed think time, so the game loop never waits on it: ask()
+# hands over the battle and poll() picks up the move once it is ready.
+import math
+import random
+import sys
+import time
+from multiprocessing import Process, Queue
+from queue import Empty
+
+import engine
+
+class Node(object):
+	# One move in the search tree. wins are counted for the player who made it.
+	def __init__(self, move = None, player = None):
+		self.move = move
+		self.player = player
+		self.children = {}
+		self.visits = 0
+		self.wins = 0
+
+	def best_child(self, moves, exploration):
+		log_visits = math.log(self.visits)
+		best = None
+		best_score = -1
+		for move in moves:
+			child = self.children[move]
+			score = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+			if score > best_score:
+				best = child
+				best_score = score
+		return best
+
+def search(battle, think_time, exploration = 1.4, rng = random):
+	# Coin flips are drawn again on every pass, so each pass down the tree plays
+	# one possible game and the moves that win most often get the most visits.
+	moves = battle.moves()
+	if len(moves) == 1:
+		return moves[0]
+		
+	root = Node()
+	end = time.perf_counter() + think_time
+	passes = 0
+	
+	while passes % 64 or time.perf_counter() < end:
+		passes += 1
+		state = battle.copy()
+		node = root
+		path = [root]
+		
+		# walk down the tree, adding one new move when we reach the edge of it
+		while state.winner() is None:
+			moves = state.moves()
+			untried = [move for move in moves if move not in node.children]
+			if untried:
+				move = rng.choice(untried)
+				node.children[move] = Node(move, state.attacker)
+				node = node.children[move]
+				state.play(move, rng)
+				path.append(node)
+				break
+			node = node.best_child(moves, exploration)
+			state.play(node.move, rng)
+			path.append(node)
+			
+		# then finish the game with random moves
+		while state.winner() is None:
+			state.play(rng.choice(state.moves()), rng)
+			
+		winner = state.winner()
+		for node in path:
+			node.visits += 1
+			if node.player == winner:
+				node.wins += 1
+	
+	return max(root.children.values(), key = lambda child: child.visits).move
+
+def _think(requests, results, think_time, exploration):
+	# runs in the worker process until it is sent None
+	rng = random.Random()
+	while True:
+		request = requests.get()
+		if request is None:
+			break
+		number, battle = request
+		results.put((number, search(battle, think_time, exploration, rng)))
+
+class AIOpponent(object):
+	# think_time is how many seconds the AI searches per move. Longer is stronger.
+	def __init__(self, think_time = 1.0, exploration = 1.4):
+		self.requests = Queue()
+		self.results = Queue()
+		self.number = 0
+		self.thinking = False
+		self.process = Process(target = _think, args = (self.requests, self.results, think_time, exploration))
+		self.process.daemon = True
+		
+		# With the spawn start method (Windows and macOS) the worker imports the
+		# main module again. The game's main module imports init, which opens a
+		# window, so this module stands in as the main module while it starts.
+		main = sys.modules["__main__"]
+		sys.modules["__main__"] = sys.modules[__name__]
+		try:
+			self.process.start()
+		finally:
+			sys.modules["__main__"] = main
+		
+	def ask(self, battle):
+		# answers to older questions are dropped by poll()
+		self.number += 1
+		self.thinking = True
+		self.requests.put((self.number, battle))
+		
+	def poll(self):
+		# returns the chosen move once it is ready, without waiting for it
+		while self.thinking:
+			try:
+				number, move = self.results.get_nowait()
+			except Empty:
+				return None
+			if number == self.number:
+				self.thinking = False
+				return move
+		return None
+		
+	def stop(self):
+		# asks the worker to finish, and ends it if it is still searching
+		self.requests.put(None)
+		self.process.join(1)
+		if self.process.is_alive():
+			self.process.terminate()
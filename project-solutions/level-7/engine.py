@@ -0,0 +1,223 @@
+#============================================================
+# IncrediCards battle rules without pygame. The game screens use these rules,
+# and because nothing here touches the screen, whole games can be played out
+# in worker processes to see how often each card and matchup wins.
+#
+#	python engine.py python/java/bash java/scratch/python --games 1000000
+import argparse
+import random
+from multiprocessing import Pool, cpu_count
+
+TECH_TYPES = ["python", "java", "scratch", "bash", "small_basic"]
+TYPE_CODES = {name: code for code, name in enumerate(TECH_TYPES)}
+NO_TYPE = 7
+START_HP = 15
+BASE_DAMAGE = 3
+
+# A card is packed into one small int: 3 bits each for its tech type,
+# weakness and resistance. Cards with the same rules get the same code.
+def encode_card(techtype, weakness, resistance):
+	return (TYPE_CODES[techtype]
+		| TYPE_CODES.get(weakness, NO_TYPE) << 3
+		| TYPE_CODES.get(resistance, NO_TYPE) << 6)
+
+def tech_type(code):
+	return code & 7
+
+def weakness(code):
+	return code >> 3 & 7
+
+def resistance(code):
+	return code >> 6 & 7
+
+def _damage(attack_type, defense_code):
+	if attack_type == resistance(defense_code):
+		return BASE_DAMAGE - 1
+	elif attack_type == weakness(defense_code):
+		return BASE_DAMAGE + 1
+	return BASE_DAMAGE
+
+# damage for every attacking tech type against every card, so an attack is one lookup
+DAMAGE = [_damage(attack_type, defense_code) for attack_type in range(8) for defense_code in range(512)]
+
+def damage(attack_code, defense_code):
+	return DAMAGE[tech_type(attack_code) << 9 | defense_code]
+
+def flip_coin(rng = random):
+	# True for heads
+	return rng.random() < 0.5
+
+def play_game(codes, hand1, hand2, rng = random, knockouts = None):
+	# Plays one game where each player fights with the first card left in their
+	# hand. Hands are lists of indexes into codes. Returns (winner, turns) with
+	# winner 0 or 1. If knockouts is given, knockouts[a][b] counts card a beating b.
+	hands = [list(hand1), list(hand2)]
+	hp = [START_HP, START_HP]
+	attacker = rng.getrandbits(1)
+	getrandbits = rng.getrandbits
+	turns = 0
+
+	while True:
+		turns += 1
+		defender = 1 - attacker
+		if getrandbits(1):
+			attack_card = hands[attacker][0]
+			defense_card = hands[defender][0]
+			hp[defender] -= DAMAGE[(codes[attack_card] & 7) << 9 | codes[defense_card]]
+
+			if hp[defender] <= 0:
+				if knockouts is not None:
+					knockouts[attack_card][defense_card] += 1
+				del hands[defender][0]
+				if not hands[defender]:
+					return attacker, turns
+				hp[defender] = START_HP
+
+		attacker = defender
+
+class Battle(object):
+	# A game in progress as plain lists: each player's card codes and HP, which
+	# card each player has out and whose turn it is. Moves are hand indexes.
+	def __init__(self, codes, hp, current, attacker):
+		self.codes = codes
+		self.hp = hp
+		self.current = current
+		self.attacker = attacker
+		
+	def copy(self):
+		return Battle(self.codes, [list(self.hp[0]), list(self.hp[1])], list(self.current), self.attacker)
+		
+	def moves(self):
+		# the attacker can fight with any card still standing
+		return [card for card, hp in enumerate(self.hp[self.attacker]) if hp > 0]
+		
+	def play(self, move, rng = random):
+		# attack with the chosen card and pass the turn, returning the damage done
+		attacker = self.attacker
+		defender = 1 - attacker
+		self.current[attacker] = move
+		done = 0
+		
+		if flip_coin(rng):
+			defense_card = self.current[defender]
+			done = damage(self.codes[attacker][move], self.codes[defender][defense_card])
+			self.hp[defender][defense_card] = max(0, self.hp[defender][defense_card] - done)
+			
+			# a knocked out card is replaced by the first card left, like refresh_hand
+			if self.hp[defender][defense_card] == 0:
+				left = [card for card, hp in enumerate(self.hp[defender]) if hp > 0]
+				if left:
+					self.current[defender] = left[0]
+		
+		self.attacker = defender
+		return done
+		
+	def winner(self):
+		# the player whose opponent has no cards standing, or None while playing
+		for player in (0, 1):
+			if not any(self.hp[1 - player]):
+				return player
+		return None
+
+def _simulate(job):
+	# runs in a worker process, so only plain lists go in and out
+	codes, hand_size, games, seed = job
+	rng = random.Random(seed)
+	count = len(codes)
+	wins = [0] * count
+	played = [0] * count
+	knockouts = [[0] * count for _ in range(count)]
+	cards = range(count)
+
+	for _ in range(games):
+		dealt = rng.sample(cards, hand_size * 2)
+		hand1 = dealt[:hand_size]
+		hand2 = dealt[hand_size:]
+		winner, turns = play_game(codes, hand1, hand2, rng, knockouts)
+
+		for card in dealt:
+			played[card] += 1
+		for card in (hand1 if winner == 0 else hand2):
+			wins[card] += 1
+
+	return wins, played, knockouts
+
+class Report(object):
+	# Totals from simulate(). win_rate is how often a player holding the card
+	# won, and matchup is how often card a knocked out card b when they met.
+	def __init__(self, names, games):
+		count = len(names)
+		self.names = names
+		self.games = games
+		self.wins = [0] * count
+		self.played = [0] * count
+		self.knockouts = [[0] * count for _ in range(count)]
+
+	def add(self, result):
+		wins, played, knockouts = result
+		for card in range(len(self.names)):
+			self.wins[card] += wins[card]
+			self.played[card] += played[card]
+			for other in range(len(self.names)):
+				self.knockouts[card][other] += knockouts[card][other]
+
+	def win_rate(self, card):
+		return self.wins[card] / self.played[card] if self.played[card] else 0.0
+
+	def matchup(self, card, other):
+		fights = self.knockouts[card][other] + self.knockouts[other][card]
+		return self.knockouts[card][other] / fights if fights else 0.0
+
+	def __str__(self):
+		width = max(len(name) for name in self.names)
+		lines = ["{} games".format(self.games)]
+		for card in sorted(range(len(self.names)), key = self.win_rate, reverse = True):
+			lines.append("{:<{}}  {:6.2%}".format(self.names[card], width, self.win_rate(card)))
+		return "\n".join(lines)
+
+def simulate(codes, games, hand_size = 1, names = None, processes = None, seed = None):
+	# Plays games between random hands dealt from codes across a process pool
+	# and returns a Report. Each worker gets its own seed so runs don't overlap.
+	if names is None:
+		names = [str(code) for code in codes]
+	if processes is None:
+		processes = cpu_count()
+
+	rng = random.Random(seed)
+	chunks = processes * 4
+	jobs = []
+	for chunk in range(chunks):
+		chunk_games = games // chunks + (1 if chunk < games % chunks else 0)
+		if chunk_games:
+			jobs.append((list(codes), hand_size, chunk_games, rng.getrandbits(64)))
+
+	report = Report(list(names), games)
+	if processes == 1:
+		for job in jobs:
+			report.add(_simulate(job))
+	else:
+		with Pool(processes) as pool:
+			for result in pool.imap_unordered(_simulate, jobs):
+				report.add(result)
+	return report
+
+def main():
+	parser = argparse.ArgumentParser(description = "Simulate IncrediCards games to balance cards.")
+	parser.add_argument("cards", nargs = "+", help = "cards as techtype/weakness/resistance")
+	parser.add_argument("--games", type = int, default = 100000)
+	parser.add_argument("--hand-size", type = int, default = 1)
+	parser.add_argument("--processes", type = int, default = None)
+	parser.add_argument("--seed", type = int, default = None)
+	args = parser.parse_args()
+
+	codes = [encode_card(*card.split("/")) for card in args.cards]
+	report = simulate(codes, args.games, args.hand_size, args.cards, args.processes, args.seed)
+	print(report)
+
+	for card, name in enumerate(args.cards):
+		for other, other_name in enumerate(args.cards):
+			if card < other:
+				print("{} vs {}: {:.2%}".format(name, other_name, report.matchup(card, other)))
+
+if __name__ == "__main__":
+	main()
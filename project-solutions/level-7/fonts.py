@@ -0,0 +1,97 @@
+#============================================================
+# pygame.font.SysFont looks through every installed font the first time it is
+# called, which on Linux means running fc-list. sys_font() remembers which file
+# each family/bold/italic resolved to in a small file in the user's cache folder,
+# so later starts open the font file straight away. The cache is thrown out when
+# a font folder changes. Fonts asked for twice share one pygame Font object.
+import json
+import os
+import sys
+from os import path
+
+import pygame
+
+CACHE_FILE = path.join(os.environ.get("XDG_CACHE_HOME", path.join(path.expanduser("~"), ".cache")), "incredicards", "fonts.json")
+
+# resolved file paths by "family|bold|italic", and Font objects by request
+resolved = None
+fonts = {}
+
+def font_dirs():
+	if sys.platform.startswith("win"):
+		dirs = [path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+			path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts")]
+	elif sys.platform == "darwin":
+		dirs = ["/Library/Fonts", "/System/Library/Fonts", path.expanduser("~/Library/Fonts")]
+	else:
+		dirs = ["/usr/share/fonts", "/usr/local/share/fonts", path.expanduser("~/.fonts"),
+			path.expanduser("~/.local/share/fonts")]
+	return [folder for folder in dirs if path.isdir(folder)]
+
+def fonts_stamp():
+	# modification times of the font folders and the folders right inside them,
+	# since installing a font usually only touches a subfolder
+	stamp = {}
+	for folder in font_dirs():
+		stamp[folder] = os.stat(folder).st_mtime
+		for entry in os.scandir(folder):
+			if entry.is_dir():
+				stamp[entry.path] = entry.stat().st_mtime
+	return stamp
+
+def load_cache():
+	global resolved
+	resolved = {}
+	stamp = fonts_stamp()
+	try:
+		with open(CACHE_FILE) as file:
+			data = json.load(file)
+		if data.get("stamp") == stamp:
+			resolved = data["fonts"]
+	except (OSError, ValueError, KeyError):
+		pass
+	return stamp
+
+def save_cache(stamp):
+	# write to a temporary file first so a crash never leaves half a cache
+	try:
+		os.makedirs(path.dirname(CACHE_FILE), exist_ok = True)
+		temp_file = CACHE_FILE + ".tmp"
+		with open(temp_file, "w") as file:
+			json.dump({"stamp": stamp, "fonts": resolved}, file)
+		os.replace(temp_file, CACHE_FILE)
+	except OSError:
+		pass
+
+def resolve(name, bold, italic, refresh = False):
+	# returns [file path or None, fake bold, fake italic] like SysFont works them out
+	key = "{}|{}|{}".format(name.lower(), int(bold), int(italic))
+	if resolved is None:
+		stamp = load_cache()
+	else:
+		stamp = None
+
+	if refresh or key not in resolved:
+		font_file = pygame.font.match_font(name, bold, italic)
+		fake_bold = bold and font_file == pygame.font.match_font(name, False, italic)
+		fake_italic = italic and font_file == pygame.font.match_font(name, bold, False)
+		resolved[key] = [font_file, fake_bold, fake_italic]
+		save_cache(stamp if stamp is not None else fonts_stamp())
+
+	return resolved[key]
+
+def sys_font(name, size, bold = False, italic = False):
+	# a drop in for pygame.font.SysFont
+	request = (name.lower(), size, bool(bold), bool(italic))
+	font = fonts.get(request)
+	if font is None:
+		font_file, fake_bold, fake_italic = resolve(name, bold, italic)
+		if font_file is not None and not path.exists(font_file):
+			# the file went away without the folder changing, so look it up again
+			font_file, fake_bold, fake_italic = resolve(name, bold, italic, True)
+
+		font = pygame.font.Font(font_file, size)
+		font.set_bold(fake_bold)
+		font.set_italic(fake_italic)
+		fonts[request] = font
+	return font
@@ -3,8 +3,11 @@
 import pygame
 import random
 import sys
+import csv
 from os import path
 import textwrap
+import engine
+import fonts
 
 base_dir = path.dirname(__file__)
 assets_path = path.join(base_dir, 'Assets')
@@ -29,6 +32,7 @@ CARD_R_POS = pygame.math.Vector2(800,305)
 INSTRUCTIONS = ["Click Tech Type Attack", "to flip the coin: heads", "does 3 damage and", "tails misses.", "Be sure to check out", "your card's weaknesses", "and resistance. You can", "give more damage to a", "weak Tech Type, and you", "can receive less damage if", "you're resistant to a", "Tech Type."]
 CHALLENGE_INSTRUCTIONS = "Click Tech Type Attack to flip the coin - heads does 3 damage (or more/less depending on your weakness and resistance) and tails misses. Or click Coded Attack to do 1 damage. Flip the coin - heads will do your card's special move!"
 FPS = 30
+IDLE_TIMEOUT = 500
 
 pygame.init()
 SCREEN = pygame.display.set_mode(WINDOW)
@@ -42,15 +46,19 @@ class GameObject(object):
 		self.name = name
 		self.image = image
 		self.location = location
+		self.layer = None
 		
-		if self.image is not None:
-			self.rect = self.image.get_rect()
+		if image is not None:
+			self.rect = image.get_rect()
 			self.rect.center = self.location
 				
 	def set_location(self, location):
 		self.location = location
 		self.rect.center = self.location
 		
+		if self.layer is not None:
+			self.layer.invalidate()
+		
 	def update(self, dt):
 		pass
 		
@@ -63,6 +71,41 @@ class GameObject(object):
 		
 		return data
 
+class StaticLayer(object):
+	# Objects that don't move are drawn once onto a window sized surface, which
+	# is then blitted in one go every frame until something on it changes.
+	def __init__(self, size, transparent = True):
+		self.size = size
+		self.transparent = transparent
+		self.objects = []
+		self.surface = None
+		self.dirty = True
+		
+	def add(self, obj):
+		self.objects.append(obj)
+		obj.layer = self
+		self.dirty = True
+		
+	def invalidate(self):
+		self.dirty = True
+		
+	def rebuild(self):
+		if self.surface is None:
+			if self.transparent:
+				self.surface = pygame.Surface(self.size, pygame.SRCALPHA).convert_alpha()
+			else:
+				self.surface = pygame.Surface(self.size).convert()
+		
+		self.surface.fill((0, 0, 0, 0))
+		for obj in self.objects:
+			obj.draw(self.surface)
+		self.dirty = False
+		
+	def draw(self, surf):
+		if self.dirty:
+			self.rebuild()
+		surf.blit(self.surface, (0, 0))
+
 class AnimatedObject(GameObject):
 	def __init__(self, name, images, location):
 		super().__init__(name)
@@ -90,30 +133,41 @@ class AnimatedObject(GameObject):
 		surf.blit(self.image, self.rect)
 		
 class Card(GameObject):
-	def __init__(self, name, techtype, weakness, resistance, image, typelogo):
-		super().__init__(name, image)
+	def __init__(self, name, techtype, weakness, resistance, art, typelogo):
+		# art is the image file name, loaded when the card is first drawn
+		self.art = art
+		super().__init__(name)
+		
+		self.rect = pygame.Rect((0, 0), CARD_SIZE)
+		self.rect.center = self.location
 
 		self.techtype = techtype
 		self.weakness = weakness
 		self.resistance = resistance
-		self.HP = 15
+		self.code = engine.encode_card(techtype, weakness, resistance)
+		self.HP = engine.START_HP
 		self.alive = True
 		self.typelogo = typelogo
 	
 	def attacked_by(self, offense_card):
-		damage = 3 # default value
-		
-		# check strength/weakness and determine damage	
-		if offense_card.techtype == self.resistance:
-			damage = damage - 1
-		elif offense_card.techtype == self.weakness:
-			damage = damage + 1
+		# the engine checks strength/weakness and determines damage
+		damage = engine.damage(offense_card.code, self.code)
 		
 		# take damage and return the damage amount
 		self.take_damage(damage)
 		return damage
 
 	
+	@property
+	def image(self):
+		if self._image is None:
+			self._image = load_card_art(self.art)
+		return self._image
+		
+	@image.setter
+	def image(self, image):
+		self._image = image
+	
 	def take_damage(self, damage):
 		self.HP = self.HP - damage
 		if self.HP <= 0:
@@ -138,6 +192,7 @@ class Player(object):
 		self.active = True
 		self.active_turn = False
 		self.heads_count = 0
+		self.computer = False
 		
 		self.winner = False
 		
@@ -163,6 +218,9 @@ class Player(object):
 
 	def get_current_card(self):
 		return self.current_card
+		
+	def hand_index(self):
+		return self.hand.index(self.current_card)
 
 	# this lets you print the player with print(self.player1)
 
@@ -189,8 +247,12 @@ class GameState(object):
 	def get_event(self, event):
 		pass
 		
+	# return True while something animates so the game keeps drawing every frame
+	def busy(self):
+		return False
+		
 	def draw(self, surf):
-		surf.blit(BACKGROUND_IMAGE, (0,0))
+		BACKGROUND_LAYER.draw(surf)
 
 class TitleScreen(GameState):
 	def __init__(self):
@@ -207,24 +269,28 @@ class TitleScreen(GameState):
 		self.start_button.get_event(event)
 		
 	def draw(self, surf):
-		super().draw(surf)
-		surf.blit(TITLE_IMAGE, (0,0))
-		surf.blit(TITLE_LOGO, (75,30))        
+		TITLE_LAYER.draw(surf)
 		self.start_button.draw(surf)
 
 	def button_action(self, params):
 		self.done = True
 
 class GetNameScreen(GameState):
-	def __init__(self):
+	# if computer_name is given, player 2 is played by the computer
+	def __init__(self, computer_name = None):
 		super().__init__()
 		self.next_state = "CoinFlip" 
-		self.input_box = InputBox(X_CENTER-150, 375, 300, 50, active_purple, inactive_dark_green, parent = self)
+		self.computer_name = computer_name
+		self.input_box = TextInput(X_CENTER-150, 375, 300, 50, active_purple, inactive_dark_green, parent = self)
 		
 	def start(self, players):
 		players["player1"] = Player("player 1")
 		players["player2"] = Player("player 2")
 		self.players = players
+		
+		if self.computer_name is not None:
+			players["player2"].name = self.computer_name
+			players["player2"].computer = True
 		self.current_player = players["player1"]	
 		self.text = ""
 		
@@ -234,9 +300,6 @@ class GetNameScreen(GameState):
 		self.info_box = InfoBox([prompt_1, prompt_2], bold_font, BLACK, (600,300), (X_CENTER, 320), 200, True)
 
 	def update(self, dt):
-		
-		self.input_box.update()
-		
 		self.prompt_1 = "Click in the box to type in the"
 		self.prompt_2 = "name for {} and press Enter.".format(self.current_player.name)
 
@@ -246,7 +309,7 @@ class GetNameScreen(GameState):
 		done = self.input_box.get_event(event)
 		
 		if done:
-			if self.current_player == self.players["player1"]:
+			if self.current_player == self.players["player1"] and self.computer_name is None:
 				self.current_player = self.players["player2"]
 			else:
 				self.done = True
@@ -254,6 +317,9 @@ class GetNameScreen(GameState):
 	def set_name(self, name):
 		self.current_player.name = name
 		
+	def busy(self):
+		return self.input_box.blinking()
+		
 	def draw(self, surf):
 		super().draw(surf)
 		self.info_box.draw(surf)	
@@ -279,8 +345,9 @@ class CoinFlipScreen(GameState):
 
 		self.coin = Coin(coin_img, (X_CENTER, 375))
 		
-		self.winner = self.player1 if random.random() < 0.5 else self.player2
+		self.winner = self.player1 if engine.flip_coin() else self.player2
 		self.winner.active_turn = True
+		self.winner_box = InfoBox(["{} will go first!".format(self.winner.name)], bold_font, BLACK, (550,100),(X_CENTER,200),200)
 		
 	def get_event(self, event):
 		if self.choosing and not self.flipping:
@@ -293,8 +360,9 @@ class CoinFlipScreen(GameState):
 			self.flipping = self.coin.update(dt)
 			if not self.flipping:
 				self.choosing = False
-		else:
-			self.winner_box = InfoBox(["{} will go first!".format(self.winner.name)], bold_font, BLACK, (550,100),(X_CENTER,200),200)
+		
+	def busy(self):
+		return self.flipping
 		
 	def button_action(self, params):
 		if self.choosing and not self.flipping:
@@ -356,25 +424,32 @@ class ChooseHandScreen(GameState):
 			x = x + 100
 	
 	def get_event(self, event):
-		if event.type == pygame.MOUSEBUTTONDOWN:
+		if event.type == pygame.MOUSEBUTTONDOWN and not self.current_player.computer:
 			for card in self.current_player.hand[::-1]:
 				if card.rect.collidepoint(event.pos):
-					self.current_player.set_card(card)
-	
-					self.count += 1
-					if self.count == 2:
-						break
-					
-					self.current_player = self.player2 if self.player1.active_turn else self.player1
-					
-					name = "{},".format(self.current_player.name)
-					self.info_box.change_line(name, 0)
+					self.choose(card)
 					return
 					
 			if self.current_player == self.player2:
 				self.done = True
+				
+	def choose(self, card):
+		self.current_player.set_card(card)
+
+		self.count += 1
+		if self.count == 2:
+			return
+		
+		self.current_player = self.player2 if self.player1.active_turn else self.player1
+		
+		name = "{},".format(self.current_player.name)
+		self.info_box.change_line(name, 0)
 			
 	def update(self, dt):
+		# the computer starts with its first card and picks again in the game
+		if self.count < 2 and self.current_player.computer:
+			self.choose(self.current_player.hand[0])
+			
 		if self.count == 2:
 			self.done = True
 		
@@ -388,7 +463,7 @@ class ChooseHandScreen(GameState):
 	def reset_cards(self):
 		# Reset cards
 		for card in self.deck:
-			card.HP = 15
+			card.HP = engine.START_HP
 			card.alive = True
 
 		# Shuffle deck
@@ -449,12 +524,30 @@ class GameRunner(object):
 		
 	def run(self):
 		self.running = True
+		self.redraw = True
 
 		while self.running:
+			if not self.redraw and not self.state.busy():
+				self.wait()
+			
 			dt = self.clock.tick(FPS)
+			busy = self.state.busy()
 			self.get_events()
 			self.update(dt)
-			self.draw()
+			
+			# only draw when there was input or something is moving
+			if self.redraw or busy or self.state.busy():
+				self.draw()
+				
+	def wait(self):
+		# sleep until there is input, or the timeout passes so states can still update
+		event = pygame.event.wait(IDLE_TIMEOUT)
+		if event.type != pygame.NOEVENT:
+			waiting = pygame.event.get()
+			pygame.event.post(event)
+			for other in waiting:
+				pygame.event.post(other)
+			self.redraw = True
 			
 	def get_events(self):
 		for event in pygame.event.get():
@@ -478,6 +571,7 @@ class GameRunner(object):
 		self.state_name = next_state
 		self.state = self.states[self.state_name]
 		self.state.start(self.players)
+		self.redraw = True
 				
 	def quit(self):
 		pygame.quit()
@@ -486,19 +580,20 @@ class GameRunner(object):
 	def draw(self):
 		self.state.draw(self.screen)
 		pygame.display.update()
+		self.redraw = False
 
 #============================================================
 #PART 3: SETUP FOR THE BATTLE CARDS GAME
 
 # Fonts
-bold_font = pygame.font.SysFont('Arial', 35)
-button_font = pygame.font.SysFont('Arial', 25)
-round_font = pygame.font.SysFont('Arial', 25, True)
-dialog_font = pygame.font.SysFont('Arial', 14)
-dialog_bold = pygame.font.SysFont('Arial', 14, True)
-dialog_inst = pygame.font.SysFont('Arial', 16)
-status_font = pygame.font.SysFont('Arial', 12)
-cardshand_font = pygame.font.SysFont('Arial', 16, True)
+bold_font = fonts.sys_font('Arial', 35)
+button_font = fonts.sys_font('Arial', 25)
+round_font = fonts.sys_font('Arial', 25, True)
+dialog_font = fonts.sys_font('Arial', 14)
+dialog_bold = fonts.sys_font('Arial', 14, True)
+dialog_inst = fonts.sys_font('Arial', 16)
+status_font = fonts.sys_font('Arial', 12)
+cardshand_font = fonts.sys_font('Arial', 16, True)
 
 # Colors
 button_orange = (220,90,25)
@@ -599,6 +694,15 @@ player2_ondeck_data = {
 					"on_deck_label_pos" : (24, 10),
 					}
 
+# backgrounds are composited once and reused every frame
+BACKGROUND_LAYER = StaticLayer(WINDOW, False)
+BACKGROUND_LAYER.add(GameObject("background", BACKGROUND_IMAGE, CENTER_COORD))
+
+TITLE_LAYER = StaticLayer(WINDOW, False)
+TITLE_LAYER.add(GameObject("background", BACKGROUND_IMAGE, CENTER_COORD))
+TITLE_LAYER.add(GameObject("title", TITLE_IMAGE, TITLE_IMAGE.get_rect().center))
+TITLE_LAYER.add(GameObject("logo", TITLE_LOGO, TITLE_LOGO.get_rect(topleft = (75,30)).center))
+
 coin_img = pygame.image.load(path.join(assets_path, "CoinFlip03.png"))
 
 # icon images
@@ -610,31 +714,114 @@ icon_small_basic = pygame.image.load(path.join(assets_path, "icon_smallbasic.png
 icon_ondeck = pygame.image.load(path.join(assets_path, "icon_ondeck.png"))
 icon_codedattack = pygame.image.load(path.join(assets_path, "icon_codedattack.png"))
 
-# card images
-annie_conda_img = pygame.image.load(path.join(assets_path, "Annie_Highlight_02.png")).convert()
-bayo_wolf_img = pygame.image.load(path.join(assets_path, "Bayo_Highlight_02.png")).convert()
-captain_javo_img = pygame.image.load(path.join(assets_path, "Cpt_Javo_Highlight_02.png")).convert()
-cryptic_creeper_img = pygame.image.load(path.join(assets_path, "Creeper_Highlight_02.png")).convert()
-emily_airheart_img = pygame.image.load(path.join(assets_path, "Emily_AirHeart_Highlight_02.png")).convert()
-grafika_turtle_img = pygame.image.load(path.join(assets_path, "Grafika_Highlight_02.png")).convert()
-intelli_scents_img = pygame.image.load(path.join(assets_path, "Intelliscents_Highlight_02.png")).convert()
-java_lynn_img = pygame.image.load(path.join(assets_path, "Java_Lynn_Highlight_02.png")).convert()
-jitter_bug_img = pygame.image.load(path.join(assets_path, "Jitter_Bug_Highlight_02.png")).convert()
-justin_timbersnake_img = pygame.image.load(path.join(assets_path, "Justin_TSnake_Highlight_02.png")).convert()
-mrs_scratcher_img = pygame.image.load(path.join(assets_path, "Scratcher_Highlight_02.png")).convert()
-paul_python_img = pygame.image.load(path.join(assets_path, "Paul_Highlight_02.png")).convert()
-queen_cobra_img = pygame.image.load(path.join(assets_path, "Queen_Cobra_Highlight_02.png")).convert()
-ram_rom_img = pygame.image.load(path.join(assets_path, "RAM_ROM_Highlight_02.png")).convert()
-sidewinder_img = pygame.image.load(path.join(assets_path, "SideWinder_Highlight_02.png")).convert()
-syntax_turtle_img = pygame.image.load(path.join(assets_path, "Syntax_Highlight_02.png")).convert()
-viralmuto_img = pygame.image.load(path.join(assets_path, "ViralMuto_Highlight_02.png")).convert()
-virobotica_img = pygame.image.load(path.join(assets_path, "Virobotica_Highlight_02.png")).convert()
-virobots_img = pygame.image.load(path.join(assets_path, "ViroBots_Highlight_02.png")).convert()
-woodchuck_norris_img = pygame.image.load(path.join(assets_path, "Woodchuck_Highlight_02.png")).convert()
-
-class Button(object):
+# card images are only decoded the first time a card is shown, then kept here
+CARD_SIZE = (300, 421)
+card_art = {}
+
+def load_card_art(filename):
+	image = card_art.get(filename)
+	if image is None:
+		image = pygame.image.load(path.join(assets_path, filename)).convert()
+		card_art[filename] = image
+	return image
+
+TYPE_ICONS = {
+	"bash" : icon_bash,
+	"java" : icon_java,
+	"python" : icon_python,
+	"scratch" : icon_scratch,
+	"small_basic" : icon_small_basic
+	}
+
+# Each row of the deck file is one card: name, techtype, weakness, resistance, art
+def load_deck(filename = "cards.csv"):
+	deck = []
+	with open(path.join(base_dir, filename), newline = "") as file:
+		for row in csv.DictReader(file):
+			card = Card(row["name"], row["techtype"], row["weakness"], row["resistance"], row["art"], TYPE_ICONS[row["techtype"]])
+			deck.append(card)
+	return deck
+
+class Widget(object):
+	# A retained-mode piece of UI. render() composes the widget onto its own
+	# surface, and draw() just blits that surface until the data it shows
+	# changes. Use bind() to set shown data so unchanged values cost nothing.
+	def __init__(self, rect):
+		self.rect = pygame.Rect(rect)
+		self.surface = None
+		self.dirty = True
+		
+	def invalidate(self):
+		self.dirty = True
+		
+	def bind(self, name, value):
+		if getattr(self, name, None) != value:
+			setattr(self, name, value)
+			self.dirty = True
+			
+	def render(self):
+		return pygame.Surface(self.rect.size, pygame.SRCALPHA)
+		
+	def get_surface(self):
+		if self.dirty:
+			self.surface = self.render()
+			self.dirty = False
+		return self.surface
+		
+	def draw(self, surf):
+		surf.blit(self.get_surface(), self.rect)
+
+class ListWidget(Widget):
+	# A vertical list with one row widget per item. set_items() compares the new
+	# items with the old ones, so rows are only created for new items and only
+	# moved for the rest, and all rows are composed into one cached surface.
+	def __init__(self, x, y, width, row_height, make_row):
+		super().__init__((x, y, width, 0))
+		self.row_height = row_height
+		self.make_row = make_row
+		self.items = []
+		self.rows = {}
+		
+	def set_items(self, items):
+		items = list(items)
+		if items == self.items:
+			return
+		
+		for item in list(self.rows):
+			if item not in items:
+				del self.rows[item]
+				
+		for index, item in enumerate(items):
+			row = self.rows.get(item)
+			if row is None:
+				row = self.make_row(item)
+				self.rows[item] = row
+			row.rect.topleft = (self.rect.x, self.rect.y + index * self.row_height)
+		
+		self.items = items
+		self.rect.height = len(items) * self.row_height
+		self.invalidate()
+		
+	def item_at(self, pos):
+		# rows are evenly spaced so the row under a point is found directly
+		if not self.rect.collidepoint(pos):
+			return None
+		index = (pos[1] - self.rect.y) // self.row_height
+		item = self.items[index]
+		if self.rows[item].rect.collidepoint(pos):
+			return item
+		return None
+		
+	def render(self):
+		surf = pygame.Surface((self.rect.width, max(self.rect.height, 1)), pygame.SRCALPHA)
+		for item in self.items:
+			row = self.rows[item]
+			surf.blit(row.get_surface(), (row.rect.x - self.rect.x, row.rect.y - self.rect.y))
+		return surf
+
+class Button(Widget):
 	def __init__(self, text, x, y, width, height, color, outline_color, font_color = BLACK, font = button_font, parent = None):
-		self.rect = pygame.Rect(x, y, width, height)
+		super().__init__((x, y, width, height))
 		self.text = text
 		self.color = color
 		self.outline_color = outline_color
@@ -643,27 +830,27 @@ class Button(object):
 		self.parent = parent
 		self.action_params = None
 		
-		self.highlight_x = x + 3
-		self.highlight_y = y + 3
-		
-		self.highlight = pygame.Surface((width-10, height/5))
-		self.highlight.set_alpha(150)
-		self.highlight.fill(WHITE)
-		
-		self.text_surf = font.render(self.text, True, self.font_color)
-		self.text_rect = self.text_surf.get_rect()
-		self.text_rect.center = self.rect.center
-		
 	def get_event(self, event):
 		if event.type == pygame.MOUSEBUTTONDOWN:
 			if self.rect.collidepoint(event.pos):
 				self.parent.button_action(self.action_params)
 			
-	def draw(self, surf):
-		pygame.draw.rect(surf, self.color, self.rect, 0, 3)
-		surf.blit(self.highlight, (self.highlight_x, self.highlight_y))
-		surf.blit(self.text_surf, self.text_rect)
-		pygame.draw.rect(surf, self.outline_color, self.rect, 3, 3)
+	def render(self):
+		surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+		local_rect = surf.get_rect()
+		
+		highlight = pygame.Surface((local_rect.width-10, local_rect.height/5))
+		highlight.set_alpha(150)
+		highlight.fill(WHITE)
+		
+		text_surf = self.font.render(self.text, True, self.font_color)
+		text_rect = text_surf.get_rect(center = local_rect.center)
+		
+		pygame.draw.rect(surf, self.color, local_rect, 0, 3)
+		surf.blit(highlight, (3, 3))
+		surf.blit(text_surf, text_rect)
+		pygame.draw.rect(surf, self.outline_color, local_rect, 3, 3)
+		return surf
 
 class Coin(AnimatedObject):
 	def __init__(self, images, location):
@@ -711,152 +898,245 @@ class Coin(AnimatedObject):
 	def draw(self, surf):
 		super().draw(surf)
 
-class InputBox(pygame.Surface):	
-	def __init__(self, x, y, width, height, active_border_color, inactive_border_color, parent = None):
-		super().__init__((width, height))
-		self.fill(WHITE)
-		self.rect = self.get_rect()
-		self.rect.x = x
-		self.rect.y = y
+class TextInput(Widget):
+	# A one line text box. Every character is rendered once into a shared glyph
+	# cache and blitted onto the end of a text surface that doubles in width when
+	# it fills up, so a keystroke draws one glyph instead of the whole string. The
+	# cursor is drawn over the finished box, so blinking never re-renders text.
+	glyphs = {}
+	
+	def __init__(self, x, y, width, height, active_border_color, inactive_border_color, font = bold_font, max_length = 15, parent = None):
+		super().__init__((x, y, width, height))
+		self.min_width = width
 		self.active_border_color = active_border_color
 		self.inactive_border_color = inactive_border_color
-		self.text = ""
+		self.font = font
+		self.max_length = max_length
 		self.parent = parent
-		self.text_color = BLACK
 		
 		self.active = False
-		self.text_surface = bold_font.render(self.text, True, self.text_color)
+		self.cursor_shown = False
+		self.color = inactive_border_color
+		self.text = ""
+		self.composition = ""
+		self.advances = []
+		self.text_surface = pygame.Surface((64, font.get_height()), pygame.SRCALPHA)
 		
 	def get_event(self, event):
 		if event.type == pygame.MOUSEBUTTONDOWN:
 			if self.rect.collidepoint(event.pos):
-				self.active = not self.active
+				self.set_active(not self.active)
 				return
+		
+		if not self.active:
+			return False
 			
 		if event.type == pygame.KEYDOWN:
-			if self.active:
-				if event.key == pygame.K_RETURN:
-					if len(self.text) > 15:
-						self.text = self.text [:15]
-					self.parent.set_name(self.text)
-					self.clear()
-					return True
-					
-				elif event.key == pygame.K_BACKSPACE:
-					self.text = self.text[:-1]
-				else:
-					self.text += event.unicode
-	
-			return False
-	
-	def update(self):
-		self.color = active_purple if self.active else inactive_dark_green
-		pygame.draw.rect(self, self.color, (0, 0, self.rect.width - 1 , self.rect.height - 1), 2)
-		
-		self.text_surface = bold_font.render(self.text, True, self.color)
-		
-		# Resize the box if the text is too long.
-		width = max(200, self.text_surface.get_width()+10)
-		if width > self.rect.width:
-			self.rect.width = width
-			super().__init__((self.rect.width, self.rect.height))
+			if event.key == pygame.K_RETURN:
+				self.parent.set_name(self.text[:self.max_length])
+				self.clear()
+				return True
+			elif event.key == pygame.K_BACKSPACE:
+				if not self.composition:
+					self.backspace()
+			elif not hasattr(pygame, "TEXTINPUT") and event.unicode.isprintable():
+				# older pygame has no text input events, so typed text comes from keys
+				self.append(event.unicode)
+				
+		elif event.type == getattr(pygame, "TEXTINPUT", None):
+			self.composition = ""
+			self.append(event.text)
+			
+		elif event.type == getattr(pygame, "TEXTEDITING", None):
+			# text an input method is still putting together, shown after the typed text
+			self.bind("composition", event.text)
+			
+		return False
+		
+	def set_active(self, active):
+		self.active = active
+		self.color = self.active_border_color if active else self.inactive_border_color
+		self.composition = ""
+		self.restyle()
+		
+		if hasattr(pygame.key, "start_text_input"):
+			if active:
+				pygame.key.start_text_input()
+				pygame.key.set_text_input_rect(self.rect)
+			else:
+				pygame.key.stop_text_input()
+		
+	def glyph(self, char):
+		key = (self.font, char, tuple(self.color))
+		glyph = TextInput.glyphs.get(key)
+		if glyph is None:
+			glyph = self.font.render(char, True, self.color)
+			TextInput.glyphs[key] = glyph
+		return glyph
+		
+	def text_width(self):
+		return self.advances[-1] if self.advances else 0
+		
+	def reserve(self, width):
+		# grow by doubling so a long name only reallocates a few times
+		old_width = self.text_surface.get_width()
+		if width <= old_width:
+			return
+		new_width = old_width
+		while new_width < width:
+			new_width *= 2
+		text_surface = pygame.Surface((new_width, self.text_surface.get_height()), pygame.SRCALPHA)
+		text_surface.blit(self.text_surface, (0, 0))
+		self.text_surface = text_surface
+		
+	def append(self, text):
+		for char in text:
+			glyph = self.glyph(char)
+			x = self.text_width()
+			self.reserve(x + glyph.get_width())
+			self.text_surface.blit(glyph, (x, 0))
+			self.text += char
+			self.advances.append(x + glyph.get_width())
+		self.invalidate()
+		
+	def backspace(self):
+		if self.text:
+			self.text = self.text[:-1]
+			self.advances.pop()
+			x = self.text_width()
+			self.text_surface.fill((0, 0, 0, 0), (x, 0, self.text_surface.get_width() - x, self.text_surface.get_height()))
+			self.invalidate()
+			
+	def restyle(self):
+		# the color changed, so lay the cached glyphs out again in the new color
+		text = self.text
+		self.text = ""
+		self.advances = []
+		self.text_surface.fill((0, 0, 0, 0))
+		self.append(text)
 		
 	def clear(self):
-		self.fill(WHITE)
 		self.text = ""
-		self.text_surface = bold_font.render(self.text, True, self.text_color)
+		self.composition = ""
+		self.advances = []
+		self.text_surface.fill((0, 0, 0, 0))
+		self.invalidate()
+		
+	def render(self):
+		composition = None
+		width = self.text_width()
+		if self.composition:
+			composition = self.font.render(self.composition, True, self.color)
+			width += composition.get_width()
+		
+		# resize the box if the text is too long
+		self.rect.width = max(self.min_width, width + 10)
+		if self.surface is None or self.surface.get_size() != self.rect.size:
+			self.surface = pygame.Surface(self.rect.size)
 			
+		surface = self.surface
+		surface.fill(WHITE)
+		pygame.draw.rect(surface, self.color, (0, 0, self.rect.width - 1, self.rect.height - 1), 2)
+		surface.blit(self.text_surface, (5, 5), (0, 0, self.text_width(), self.text_surface.get_height()))
+		
+		if composition is not None:
+			x = 5 + self.text_width()
+			surface.blit(composition, (x, 5))
+			bottom = 5 + composition.get_height() - 2
+			pygame.draw.line(surface, self.color, (x, bottom), (x + composition.get_width(), bottom))
+		
+		return surface
+		
+	def cursor_visible(self):
+		# blink every half second
+		return self.active and pygame.time.get_ticks() // 500 % 2 == 0
+		
+	def blinking(self):
+		return self.cursor_visible() != self.cursor_shown
+		
 	def draw(self, surf):
-		self.blit(self.text_surface, (5, 5))
-		surf.blit(self, self.rect)
+		super().draw(surf)
+		
+		self.cursor_shown = self.cursor_visible()
+		if self.cursor_shown:
+			x = self.rect.x + 5 + self.text_width()
+			pygame.draw.line(surf, self.color, (x, self.rect.y + 8), (x, self.rect.y + self.font.get_height()), 2)
  
-class InfoBox(pygame.Surface):
+class InfoBox(Widget):
 	def __init__(self, text, font, font_color, size, center_pos, alpha, input_box = False, bg_color = WHITE):
-		super().__init__(size)
+		super().__init__(((0, 0), size))
+		self.rect.center = center_pos
 		self.bg_color = bg_color
-		self.fill(bg_color)
 		
-		self.text = text
+		self.text = list(text)
 		self.font = font
 		self.font_color = font_color
 		self.alpha = alpha
-		self.set_alpha(alpha)
 		self.input_box = input_box # used if there is a text box on the panel
-		self.rect = self.get_rect(center = center_pos)
-
-		self.set_text_surfs(self.text)
+			
+	def update(self, new_text):
+		self.bind("text", list(new_text))
+	
+	def change_line(self, text, line_number):
+		if self.text[line_number] != text:
+			self.text[line_number] = text
+			self.invalidate()
 		
-	def set_text_surfs(self, text):
-		self.text_surfs = []
+	def render(self):
+		panel = pygame.Surface(self.rect.size)
+		panel.fill(self.bg_color)
+		panel.set_alpha(self.alpha)
 		
 		index = 1
-		for line in text:
-			surf = self.font.render(line, True, self.font_color, self.bg_color)
+		for line in self.text:
+			line_surf = self.font.render(line, True, self.font_color, self.bg_color)
 		
 			# this calculates the spacing and positioning of the lines of text, taking into account
 			# whether there is an input box drawn on the surface.
 			if self.input_box:
-				division = (self.rect.height // (len(text) + 2))
+				division = (self.rect.height // (len(self.text) + 2))
 			else:
-				division = (self.rect.height // (len(text) + 1))
+				division = (self.rect.height // (len(self.text) + 1))
 				
-			rect = surf.get_rect(centery = division * index)
+			rect = line_surf.get_rect(centery = division * index)
 			rect.centerx = self.rect.width//2
-			self.text_surfs.append([surf, rect])
+			panel.blit(line_surf, rect)
 			index += 1
-			
-	def update(self, new_text):
-		self.set_text_surfs(new_text)
-	
-	def change_line(self, text, line_number):
-		surf = self.font.render(text, True, self.font_color, WHITE)
-		self.text_surfs[line_number][0] = surf
-		old_rect = self.text_surfs[line_number][1]
-		rect = surf.get_rect(centery = old_rect.centery)
-		rect.centerx = self.rect.width//2
-		self.text_surfs[line_number][1] = rect
 		
-	def draw(self, surf):
-		self.fill(self.bg_color)
-		for line in self.text_surfs:
-			self.blit(line[0], line[1])
-		surf.blit(self, self.rect)
-		pygame.draw.rect(surf, (84,84,84), self.rect, 3)
+		surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+		surf.blit(panel, (0, 0))
+		pygame.draw.rect(surf, (84,84,84), surf.get_rect(), 3)
+		return surf
 
-class Label(object):
+class Label(Widget):
 	def __init__(self, text, img = None, x = 0, y = 0, width = 50, height = 27, label_font = cardshand_font, font_color = BLACK, alpha = 255):
+		super().__init__((x, y, width, height))
 		self.text = text
 		self.img = img
-		self.rect = pygame.Rect(x, y, width, height)
 		self.font = label_font
 		self.font_color = font_color
 		self.alpha = alpha
 		
-		self.text_surf = self.font.render(self.text, True, self.font_color, ondeck_box_color)
-		self.text_rect = self.text_surf.get_rect()
-
-		if self.img is not icon_ondeck:
-			self.img_x = self.rect.x + 3
-			self.img_y = self.rect.y + 1
-
-			self.text_rect.x = self.rect.x + 30
-			self.text_rect.y = self.rect.y + 4
+	def render(self):
+		surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+		local_rect = surf.get_rect()
+		text_surf = self.font.render(self.text, True, self.font_color, ondeck_box_color)
 		
+		if self.img is not icon_ondeck:
+			img_pos = (3, 1)
+			text_pos = (30, 4)
 		else:
-			self.img_x = self.rect.x + 15
-			self.img_y = self.rect.y + 3
-
-			self.text_rect.x = self.rect.x + 50
-			self.text_rect.y = self.rect.y + 5
+			img_pos = (15, 3)
+			text_pos = (50, 5)
 			
-	def draw(self, surf):
-		pygame.draw.rect(surf, ondeck_box_color, self.rect, 0, 8)
-		pygame.draw.rect(surf, ondeck_teal, self.rect, 1, 8)
+		pygame.draw.rect(surf, ondeck_box_color, local_rect, 0, 8)
+		pygame.draw.rect(surf, ondeck_teal, local_rect, 1, 8)
 
 		if self.img is not None:
-			surf.blit(self.img, (self.img_x, self.img_y))
+			surf.blit(self.img, img_pos)
 
-		surf.blit(self.text_surf, (self.text_rect.x, self.text_rect.y))
+		surf.blit(text_surf, text_pos)
+		return surf
 
 class OnDeck(pygame.Surface):
 	def __init__(self, player, deck_dict):
@@ -898,32 +1178,22 @@ class OnDeck(pygame.Surface):
 		# on deck title box
 		self.ondeck_title = Label("On Deck", icon_ondeck, title_x, title_y, title_w, title_h, cardshand_font, ondeck_text)
 		
+		# one label per card, only made when a card first shows up on deck
+		self.cards = ListWidget(self.label_x, self.label_y, 200, 32, self.make_label)
 		self.update()
 		
+	def make_label(self, card):
+		return Label(card.name, card.typelogo, 0, 0, 200, 27, cardshand_font, BLACK)
+		
 	def get_event(self, event):
-		if event.type == pygame.MOUSEBUTTONDOWN:
-			for card_label in self.cards:
-				if card_label.rect.collidepoint(event.pos):
-					self.player.switch_card(card_label.text)
-					break
+		if event.type == pygame.MOUSEBUTTONDOWN and not self.player.computer:
+			card = self.cards.item_at(event.pos)
+			if card is not None:
+				self.player.switch_card(card.name)
 					
-	def update(self):	
-		self.cards = []
-		label_y = self.label_y
-		
-		for card in self.player.hand:
-			if card.alive:
-				if card == self.player.current_card:
-					continue
-	
-				card_label = Label(card.name, card.typelogo, self.label_x, label_y, 200, 27, cardshand_font, BLACK)	
-				self.cards.append(card_label)
-				label_y += 32
-			else:
-				for card_label in self.cards:
-					if card_label.text == card.name:
-						self.cards.remove(card_label)
-						break
+	def update(self):
+		current_card = self.player.current_card
+		self.cards.set_items(card for card in self.player.hand if card.alive and card != current_card)
 			
 	def draw(self, surf):
 		self.ondeck_title.draw(surf)
@@ -932,15 +1202,17 @@ class OnDeck(pygame.Surface):
 		
 		pygame.draw.rect(surf, ondeck_outline_blue, (self.pos, self.box_size), 2, 3)
 		
-		for card in self.cards:
-			card.draw(surf)
+		self.cards.draw(surf)
 	
-class Healthbar(object):
+class Healthbar(Widget):
 	def __init__(self, player, settings_dict):
+		super().__init__((0, 0, 0, 0))
 		self.player = player
-		self.player_health = 15
+		self.player_health = engine.START_HP
+		self.name = player.name
 		self.settings_dict = settings_dict
 		self.setup()
+		self.rect.topleft = (self.name_x, self.name_y)
 		
 	def setup(self):
 	
@@ -976,13 +1248,18 @@ class Healthbar(object):
 				self.font_color = val
 
 	def update(self):
-		self.player_health = self.player.current_card.HP
+		# only re-rendered when the HP or name actually change
+		self.bind("player_health", self.player.current_card.HP)
+		self.bind("name", self.player.name)
 		
-	def draw(self, surf):
-		name = bold_font.render(self.player.name, True, BLACK)
-		surf.blit(name, (self.name_x, self.name_y))
-
-		hb_size = (self.width, self.height)
+	def render(self):
+		name = bold_font.render(self.name, True, BLACK)
+		
+		# everything is drawn relative to the name's top left corner
+		bar_pos = (self.healthbar_x - self.name_x, self.healthbar_y - self.name_y)
+		self.rect.size = (max(bar_pos[0] + self.width, name.get_width()), bar_pos[1] + self.height)
+		surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+		surf.blit(name, (0, 0))
 
 		if self.player_health < 8:
 			p1_color = hb_yellow
@@ -991,25 +1268,26 @@ class Healthbar(object):
 
 		p1_bar = self.width * self.player_health / self.health_inc
 
-		pygame.draw.rect(surf, hb_red, (self.healthbar_pos, (self.width, self.height)), 0, 2)
-		pygame.draw.rect(surf, p1_color, (self.healthbar_pos, (p1_bar, self.height)), 0, 2)
+		pygame.draw.rect(surf, hb_red, (bar_pos, (self.width, self.height)), 0, 2)
+		pygame.draw.rect(surf, p1_color, (bar_pos, (p1_bar, self.height)), 0, 2)
 		
 		# add highlight to healthbars
 		hl_w = p1_bar-10 if (p1_bar-10) >0 else 0
-		hl_pos = (self.name_x + 5, self.name_y + 48)
-		hl_size = (hl_w, self.height/3)
-		hl = pygame.Surface(hl_size)
+		hl = pygame.Surface((hl_w, self.height/3))
 		hl.set_alpha(75)
 		hl.fill(WHITE)
 
-		surf.blit(hl, hl_pos)
+		surf.blit(hl, (5, 48))
 		
-		health = dialog_font.render("{}/15".format(self.player_health), True, hb_grey)
-		surf.blit(health, (self.name_x + 5, self.name_y + 50))
+		health = dialog_font.render("{}/{}".format(self.player_health, engine.START_HP), True, hb_grey)
+		surf.blit(health, (5, 50))
+		return surf
 
-class CardDisplay(object):
+class CardDisplay(Widget):
 	def __init__(self, player, data_dict):
+		super().__init__((0, 0, 0, 0))
 		self.player = player
+		self.active_turn = player.active_turn
 		self.cards = player.hand
 		self.active_card = self.player.get_current_card()
 		
@@ -1048,26 +1326,39 @@ class CardDisplay(object):
 		self.active_card.set_location((self.card_x, self.card_y))
 
 	def update(self):
-		self.active_card = self.player.get_current_card()
-		self.active_card.set_location((self.card_x, self.card_y))
-
-	def draw(self, surf):
-		if self.player.active_turn:
-			pygame.draw.rect(surf, active_cyan, (self.box_pos, active_box_size), 3, 10)
-			surf.blit(self.active_surface_s, self.box_pos_s)
+		card = self.player.get_current_card()
+		if card is not self.active_card:
+			self.active_card = card
+			self.active_card.set_location((self.card_x, self.card_y))
+			self.invalidate()
+		self.bind("active_turn", self.player.active_turn)
+
+	def render(self):
+		box_rect = pygame.Rect(self.box_pos, self.active_box_size)
+		shadow_rect = self.card_shadow.get_rect(topleft = self.shadow_pos)
+		self.rect = box_rect.union(shadow_rect).union(self.active_card.rect)
+		
+		offset = (-self.rect.x, -self.rect.y)
+		surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+		
+		if self.active_turn:
+			pygame.draw.rect(surf, active_cyan, box_rect.move(offset), 3, 10)
+			surf.blit(self.active_surface_s, (self.box_pos_s[0] + offset[0], self.box_pos_s[1] + offset[1]))
 	
 		# draw shadow first
-		surf.blit(self.card_shadow, self.shadow_pos)
-		self.active_card.draw(surf)
+		surf.blit(self.card_shadow, shadow_rect.move(offset))
+		surf.blit(self.active_card.image, self.active_card.rect.move(offset))
+		return surf
 
-class DialogBox(object):
+class DialogBox(Widget):
 	def __init__(self, size, position):
+		super().__init__(((0, 0), size))
 		self.size = size
 		self.position = position
-		self.surface = pygame.Surface(size)
-		self.surface.set_alpha(200)
-		self.surface.fill(WHITE)
-		self.rect = self.surface.get_rect(center=(X_CENTER, position[1]+150))
+		self.background = pygame.Surface(size)
+		self.background.set_alpha(200)
+		self.background.fill(WHITE)
+		self.rect = self.background.get_rect(center=(X_CENTER, position[1]+150))
 		self.message = None
 			
 	def set_message(self, message):
@@ -1077,40 +1368,47 @@ class DialogBox(object):
 		self.player = self.lines[1]
 		self.coin = self.lines[2]
 		self.status = self.lines[3:]
+		self.invalidate()
+	
+	def render(self):
+		# everything is drawn relative to the box, which is the same as self.position
+		surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+		surf.blit(self.background, (0, 0))
+		pygame.draw.rect(surf, (84,84,84), surf.get_rect(), 3)
+		
+		# render Round Number
+		round_num = round_font.render(self.rd, True, round_dark_blue)
+		round_surf = round_num.get_rect()
+		round_surf.top = 10
+		round_surf.centerx = self.rect.width//2
+		
+		surf.blit(round_num, round_surf)
 	
+		# render line separator
+		pygame.draw.rect(surf, round_dark_blue, ((5, 40), (190, 3)))
+		# render current player
+		current_player = dialog_bold.render("Player:", True, BLACK)
+		surf.blit(current_player, (10, 70))
+		player_name = dialog_font.render(self.player, True, BLACK)
+		surf.blit(player_name, (current_player.get_width() + 12, 70))
+		# render Coin Toss
+		coin_toss = dialog_bold.render("Coin Toss:", True, BLACK)
+		surf.blit(coin_toss, (10, 100))
+		coin_result = dialog_font.render(self.coin, True, BLACK)
+		surf.blit(coin_result, (10 + coin_toss.get_width(), 100))
+		# render turn result - may be over multiple lines
+		x = 10
+		y = 130
+		for line in self.status:
+			dlg_pos = (x,y)
+			dlg_line = status_font.render(line, True, (BLACK))
+			surf.blit(dlg_line, dlg_pos)
+			y = y + 20
+		return surf
+		
 	def draw(self, surf):
 		if self.message is not None:
-			surf.blit(self.surface, self.rect)
-			pygame.draw.rect(surf, (84,84,84), self.rect, 3)
-			
-			# render Round Number
-			round_num = round_font.render(self.rd, True, round_dark_blue)
-			round_surf = round_num.get_rect()
-			round_surf.top = self.position[1] + 10
-			round_surf.centerx = WINDOW_WIDTH//2
-			
-			surf.blit(round_num, round_surf)
-		
-			# render line separator
-			pygame.draw.rect(surf, round_dark_blue, ((self.position[0] + 5, self.position[1] + 40), (190, 3)))
-			# render current player
-			current_player = dialog_bold.render("Player:", True, BLACK)
-			surf.blit(current_player, (self.position[0] + 10, self.position[1] + 70))
-			player_name = dialog_font.render(self.player, True, BLACK)
-			surf.blit(player_name, (self.position[0] + current_player.get_width() + 12, self.position[1] + 70))
-			# render Coin Toss
-			coin_toss = dialog_bold.render("Coin Toss:", True, BLACK)
-			surf.blit(coin_toss, (self.position[0] + 10, self.position[1] + 100))
-			coin_result = dialog_font.render(self.coin, True, BLACK)
-			surf.blit(coin_result, (self.position[0] + 10 + coin_toss.get_width(), self.position[1] + 100))
-			# render turn result - may be over multiple lines
-			x = self.position[0] + 10
-			y = self.position[1] + 130
-			for line in self.status:
-				dlg_pos = (x,y)
-				dlg_line = status_font.render(line, True, (BLACK))
-				surf.blit(dlg_line, dlg_pos)
-				y = y + 20
+			super().draw(surf)
 
 def add_to_message(msg, text_add):
     # Helper method to build game dialog messages and wrap over lines